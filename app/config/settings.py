@@ -7,21 +7,169 @@ class Settings(BaseSettings):
     """Application settings from environment variables"""
 
     # Database settings
+    STORAGE_BACKEND: str = "mongodb"  # "mongodb" or "sqlite"
     MONGODB_URL: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "whatsapp_ai"
+    MONGODB_VERIFY_QUERY_PLANS: bool = False  # Explain the history query at startup
+
+    # Embedded SQLite store (STORAGE_BACKEND=sqlite)
+    SQLITE_PATH: str = "whatsapp_ai.db"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 16384
+    SQLITE_TTL_INTERVAL_SECONDS: float = 60.0  # Purge documents past their TTL index
+
+    # Write-behind buffer for conversation inserts
+    DB_WRITE_BUFFER_ENABLED: bool = True
+    DB_WRITE_BATCH_SIZE: int = 100
+    DB_WRITE_FLUSH_INTERVAL_MS: int = 500
+    DB_WRITE_MAX_PENDING: int = 5000
+
+    # Conversation history cache settings
+    HISTORY_CACHE_ENABLED: bool = True  # Off with more than one worker: caches are per process
+    HISTORY_CACHE_MAX_ENTRIES: int = 10000
+    HISTORY_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    HISTORY_CACHE_TTL_SECONDS: float = 900.0
+
+    # Pre-aggregated analytics behind /stats
+    ANALYTICS_FLUSH_INTERVAL_SECONDS: float = 5.0
+    ANALYTICS_WINDOW_HOURS: int = 24
+    ANALYTICS_BACKFILL_BATCH_SIZE: int = 1000
+
+    # Conversation export (turns read per page)
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Conversation retention (0 disables a limit)
+    RETENTION_MAX_AGE_DAYS: float = 0
+    RETENTION_MAX_TURNS_PER_USER: int = 0
+    RETENTION_BATCH_SIZE: int = 500
+    RETENTION_BATCH_PAUSE_MS: float = 100
+    RETENTION_INTERVAL_HOURS: float = 24
+    RETENTION_USE_TTL_INDEX: bool = False  # MongoDB expires old turns; the job skips the age rule
+
+    # Durable outbox for outbound replies (sent and retried in the background)
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_CONCURRENCY: int = 20
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 2.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_LEASE_SECONDS: float = 60.0  # A crashed worker's replies are resent after this
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 2.0
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 300.0
 
     # Twilio WhatsApp API settings
     TWILIO_ACCOUNT_SID: str
     TWILIO_AUTH_TOKEN: str
     TWILIO_PHONE_NUMBER: str = "whatsapp:+14155238886"
+    TWILIO_API_BASE_URL: str = "https://api.twilio.com"  # Point at a stub to benchmark
+    TWILIO_USE_HTTPX: bool = True  # Pooled async sender instead of the SDK client
+    TWILIO_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    TWILIO_READ_TIMEOUT_SECONDS: float = 10.0
+    TWILIO_MAX_CONNECTIONS: int = 50
+    TWILIO_MAX_KEEPALIVE_CONNECTIONS: int = 20
 
     # Google Gemini API settings
     GEMINI_API_KEY: str
     GEMINI_MODEL: str = "gemini-1.5-flash"
+    GEMINI_TIMEOUT_SECONDS: float = 8.0
+    GEMINI_USE_ASYNC_CLIENT: bool = True  # Native async calls can be truly cancelled
+    GEMINI_MAX_CONCURRENCY: int = 8  # Size of the dedicated LLM executor
+    GEMINI_QUEUE_TIMEOUT_SECONDS: float = 2.0
+
+    # Circuit breaker and request hedging around Gemini
+    GEMINI_BREAKER_ENABLED: bool = True
+    GEMINI_BREAKER_WINDOW: int = 20
+    GEMINI_BREAKER_MIN_CALLS: int = 10
+    GEMINI_BREAKER_ERROR_RATE: float = 0.5
+    GEMINI_BREAKER_SLOW_CALL_MS: float = 5000.0
+    GEMINI_BREAKER_SLOW_RATE: float = 0.8
+    GEMINI_BREAKER_OPEN_SECONDS: float = 30.0
+    GEMINI_BREAKER_HALF_OPEN_PROBES: int = 2
+    GEMINI_HEDGE_ENABLED: bool = False
+    GEMINI_HEDGE_PERCENTILE: float = 0.95
+    GEMINI_HEDGE_MIN_DELAY_MS: float = 500.0
+
+    # Client-side rate limits (token buckets shared fairly across users)
+    GEMINI_RATE_LIMIT_RPM: float = 300.0
+    GEMINI_RATE_LIMIT_BURST: int = 10
+    GEMINI_RATE_LIMIT_MAX_WAIT_SECONDS: float = 3.0
+    GEMINI_RATE_LIMIT_BACKOFF_SECONDS: float = 10.0
+    TWILIO_RATE_LIMIT_PER_SECOND: float = 20.0
+    TWILIO_RATE_LIMIT_BURST: int = 20
+    TWILIO_RATE_LIMIT_MAX_WAIT_SECONDS: float = 10.0
+
+    # Response cache for repeated prompts
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 5000
+    RESPONSE_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+    RESPONSE_CACHE_TTL_SECONDS: float = 3600.0
+    RESPONSE_CACHE_MAX_MESSAGE_CHARS: int = 200
+
+    # Prompt building: rolling summary plus the last K turns, capped in tokens
+    PROMPT_INCLUDE_HISTORY: bool = False  # Opt in: replies have been generated without history
+    PROMPT_MAX_TOKENS: int = 1200
+    PROMPT_RECENT_TURNS: int = 3
+    PROMPT_SUMMARY_MAX_TOKENS: int = 300
+    SUMMARY_QUEUE_MAXSIZE: int = 1000
+    SUMMARY_CACHE_MAX_ENTRIES: int = 10000
+    SUMMARY_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+    SUMMARY_CACHE_TTL_SECONDS: float = 900.0
+
+    # Answer pure small talk (greetings, thanks, ...) without calling Gemini
+    LOCAL_INTENT_ANSWERS: bool = True
+    LOCAL_INTENT_MIN_CONFIDENCE: float = 1.0
+
+    # Local knowledge base: BM25 over FAQ/Markdown files, top-k entries go into the prompt
+    KNOWLEDGE_BASE_PATH: str = ""  # File or directory (.json/.jsonl/.md/.txt); empty disables
+    KNOWLEDGE_TOP_K: int = 3
+    KNOWLEDGE_MIN_SCORE: float = 1.0
+    KNOWLEDGE_MIN_RELATIVE_SCORE: float = 0.5  # Drop entries scoring under this share of the best
+    KNOWLEDGE_PROMPT_MAX_TOKENS: int = 300
+    KNOWLEDGE_BM25_K1: float = 1.5
+    KNOWLEDGE_BM25_B: float = 0.75
+    # Answer with an entry, without Gemini, when the message asks its question outright
+    KNOWLEDGE_DIRECT_ANSWERS: bool = True
+    KNOWLEDGE_DIRECT_MIN_MATCH: float = 0.9
 
     # App settings
     DEBUG: bool = True
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"  # "text" or "json"
+    LOG_ASYNC: bool = True  # Format and write logs on a background thread
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_PER_USER: int = 20  # INFO records per user per window (0 disables sampling)
+    LOG_SAMPLE_WINDOW_SECONDS: float = 60.0
+
+    # Multi-process serving (python -m app.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    # 0: one per CPU (set 1 when running uvicorn directly); rate limits are
+    # split across workers and per-user caches are off with more than one
+    SERVER_WORKERS: int = 0
+    SERVER_PIN_CPUS: bool = False
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: float = 30.0
+    SERVER_READY_TIMEOUT_SECONDS: float = 60.0
+
+    # Startup: build SDK clients in lifespan (False = on first use) and pre-check them
+    EAGER_CLIENT_INIT: bool = True
+    STARTUP_WARMUP: bool = False
+    STARTUP_WARMUP_TIMEOUT_SECONDS: float = 5.0
+
+    # Webhook processing settings
+    WEBHOOK_ACK_MODE: bool = False  # Return 200 immediately, reply from workers
+    WEBHOOK_SHARDS: int = 16  # user_phone hashes to a shard; FIFO per user
+    WEBHOOK_WORKERS: int = 4  # Concurrent users per shard
+    WEBHOOK_QUEUE_MAXSIZE: int = 1000
+    WEBHOOK_MAX_PENDING_PER_USER: int = 20
+
+    # MessageSid deduplication of Twilio retries
+    IDEMPOTENCY_RECENT_MAX: int = 50000
+    IDEMPOTENCY_TTL_HOURS: float = 48.0
+    WEBHOOK_SHUTDOWN_TIMEOUT_SECONDS: float = 30.0
+
+    # Merge a user's messages that arrive in quick succession (0 disables)
+    COALESCE_WINDOW_MS: int = 0
+    COALESCE_MAX_WAIT_MS: int = 3000
+    COALESCE_MAX_MESSAGES: int = 10
 
     class Config:
         env_file = ".env.example"
@@ -30,3 +178,9 @@ class Settings(BaseSettings):
 
 # Global settings instance
 settings = Settings()
+
+
+def worker_count(workers: Optional[int] = None) -> int:
+    """Server worker processes: workers or SERVER_WORKERS, 0 meaning one per CPU"""
+    workers = settings.SERVER_WORKERS if workers is None else workers
+    return workers or os.cpu_count() or 1
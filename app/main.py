@@ -1,16 +1,31 @@
+import time
+
+# Everything below is the app's own import cost in the startup report
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
+from app.services.service_registry import service_registry
 from app.routes import webhook
 from app.services.database_service import db_service
-from app.config.settings import settings
+from app.services.message_queue import message_queue
+from app.services.message_coalescer import message_coalescer
+from app.services.whatsapp_service import whatsapp_service
+from app.services.llm_executor import llm_executor
+from app.services.idempotency_service import idempotency_service
+from app.services.summary_service import summary_service
+from app.services.analytics_service import analytics_service
+from app.services.retention_service import retention_service
+from app.services.outbox_service import outbox_service
+from app.services.log_pipeline import log_pipeline
+from app.config.settings import settings, worker_count
 import logging
 import uvicorn
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+service_registry.record("app_modules", "import", time.perf_counter() - _import_started)
+
+# Configure logging (queued, written on a background thread)
+log_pipeline.start()
 
 
 @asynccontextmanager
@@ -21,17 +36,47 @@ async def lifespan(app: FastAPI):
 
     try:
         # Connect to database
-        await db_service.connect_to_database()
+        with service_registry.timed("database", "init"):
+            await db_service.connect_to_database()
+        with service_registry.timed("background_services", "init"):
+            idempotency_service.start(db_service.collection("processed_messages"))
+            summary_service.start(db_service.collection("conversation_summaries"))
+            analytics_service.start(
+                db_service.collection("conversation_rollups"),
+                db_service.collection("analytics_markers"),
+            )
+            retention_service.start(db_service.store, on_deleted=db_service.history_cache.clear)
+            outbox_service.start(db_service.store, db_service.collection("outbox_dead_letters"))
+
+        # Build SDK clients now rather than on the first webhook
+        if settings.EAGER_CLIENT_INIT:
+            service_registry.build_all()
+        if settings.STARTUP_WARMUP:
+            await service_registry.warm_up(settings.STARTUP_WARMUP_TIMEOUT_SECONDS)
+
+        # Start the per-user ordered reply scheduler
+        with service_registry.timed("message_queue", "init"):
+            await message_queue.start(webhook.process_message)
+
+        logging.info("⏱️ Startup timing (ms): %s", service_registry.report())
         logging.info("✅ Application startup complete!")
 
         yield
 
     except Exception as e:
-        logging.error(f"❌ Startup failed: {e}")
+        logging.error("❌ Startup failed: %s", e)
         raise
     finally:
         # Shutdown
         logging.info("🛑 Shutting down...")
+        await message_coalescer.flush_all()
+        await message_queue.stop()
+        await outbox_service.stop()
+        await summary_service.stop()
+        await analytics_service.stop()
+        await retention_service.stop()
+        await whatsapp_service.close()
+        llm_executor.shutdown()
         await db_service.close_connection()
         logging.info("✅ Shutdown complete!")
 
@@ -59,15 +104,23 @@ async def root():
             "webhook": "/api/v1/webhook/whatsapp",
             "health": "/api/v1/health",
             "stats": "/api/v1/stats",
+            "metrics": "/api/v1/metrics",
         },
     }
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=settings.DEBUG,
-        log_level=settings.LOG_LEVEL.lower(),
-    )
+    if worker_count() > 1:
+        # Production: one process per worker (reload does not apply)
+        from app.server import serve
+
+        serve()
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=settings.DEBUG,
+            log_level=settings.LOG_LEVEL.lower(),
+            log_config=None,  # uvicorn's loggers go through the log pipeline too
+        )
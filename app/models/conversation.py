@@ -39,6 +39,9 @@ class ConversationModel(BaseModel):
         default=None, description="Response generation time"
     )
     message_type: str = Field(default="text", description="Type of message")
+    provider: Optional[str] = Field(
+        default=None, description="What produced the reply (gemini, local_intent, ...)"
+    )
 
     model_config = {
         "populate_by_name": True,
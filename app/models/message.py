@@ -0,0 +1,18 @@
+# File: app/models/message.py
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional
+
+
+class InboundMessage(BaseModel):
+    """Inbound WhatsApp message waiting to be answered"""
+
+    user_phone: str = Field(..., description="User's phone number")
+    from_number: str = Field(..., description="Raw Twilio 'From' address")
+    body: str = Field(..., description="Message text from user")
+    message_sid: Optional[str] = Field(default=None, description="Twilio MessageSid")
+    received_at: datetime = Field(default_factory=datetime.utcnow)
+    bypass_cache: bool = Field(default=False, description="Skip the response cache")
+    coalesced: List["InboundMessage"] = Field(
+        default_factory=list, description="Original messages merged into this one"
+    )
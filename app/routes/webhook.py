@@ -124,14 +124,67 @@
 
 
 # # File: app/routes/webhook.py
-from fastapi import APIRouter, Form, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Form, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from app.services.whatsapp_service import whatsapp_service
+from app.services.outbox_service import outbox_service
 from app.services.ai_service import ai_service
 from app.services.database_service import db_service
+from app.services.message_queue import message_queue
+from app.services.message_coalescer import message_coalescer
+from app.services.summary_service import summary_service
+from app.services.rate_limiter import gemini_limiter, twilio_limiter
+from app.services.request_context import current_user_phone, current_request_id
+from app.services.log_pipeline import log_pipeline
+from app.services.knowledge_service import knowledge_service
+from app.services.metrics import metrics, stage_duration, replies
+from app.services.analytics_service import analytics_service
+from app.services.export_service import export_service, decode_cursor
+from app.services.retention_service import retention_service, PURGE_ALL, RETENTION
+from app.services.llm_executor import llm_executor
+from app.services.service_registry import service_registry
+from app.services.idempotency_service import (
+    idempotency_service,
+    NEW,
+    IN_FLIGHT,
+    DUPLICATE_RESPONSE,
+)
+from app.models.message import InboundMessage
+from app.config.settings import settings
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
 import logging
+import asyncio
+import time
+import uuid
 
 router = APIRouter()
 
+# Service stats shown on /stats and exported as gauges on /metrics
+STATS_SOURCES = {
+    "message_queue": message_queue.get_stats,
+    "message_coalescer": message_coalescer.get_stats,
+    "idempotency": idempotency_service.get_stats,
+    "summaries": summary_service.get_stats,
+    "llm_executor": llm_executor.get_stats,
+    "history_cache": db_service.history_cache.get_stats,
+    "write_buffer": db_service.write_buffer.get_stats,
+    "response_cache": ai_service.response_cache.get_stats,
+    "gemini_breaker": ai_service.breaker.get_stats,
+    "gemini_hedging": ai_service.hedger.get_stats,
+    "gemini_rate_limit": gemini_limiter.get_stats,
+    "twilio_rate_limit": twilio_limiter.get_stats,
+    "analytics": analytics_service.get_stats,
+    "exports": export_service.get_stats,
+    "retention": retention_service.get_stats,
+    "startup": service_registry.get_stats,
+    "outbox": outbox_service.get_stats,
+    "logging": log_pipeline.get_stats,
+    "knowledge_base": knowledge_service.get_stats,
+}
+for source, source_stats in STATS_SOURCES.items():
+    metrics.register_stats(source, source_stats)
+
 
 def extract_name_from_phone(phone_number: str) -> str:
     """
@@ -145,75 +198,200 @@ def extract_name_from_phone(phone_number: str) -> str:
 
 @router.post("/webhook/whatsapp")
 async def handle_whatsapp_message(
-    background_tasks: BackgroundTasks,
     Body: str = Form(...),
     From: str = Form(...),
     To: str = Form(...),
     MessageSid: str = Form(None),
+    no_cache: bool = False,
 ):
     """Handle incoming WhatsApp messages with smart personalization"""
+    claimed = False
     try:
-        logging.info(f"📩 Received message from {From}: {Body}")
-
         # Extract phone number
         user_phone = From.replace("whatsapp:", "")
+        current_user_phone.set(user_phone)
+        current_request_id.set(MessageSid or uuid.uuid4().hex)
+
+        logging.info("📩 Received message from %s (%d chars)", From, len(Body))
+        logging.debug("📩 Body: %s", Body)
+
+        message = InboundMessage(
+            user_phone=user_phone,
+            from_number=From,
+            body=Body,
+            message_sid=MessageSid,
+            bypass_cache=no_cache,
+        )
+
+        # Absorb Twilio retries of a message we already have
+        if MessageSid:
+            claim, pending = await idempotency_service.claim(MessageSid)
+            if claim == IN_FLIGHT and not settings.WEBHOOK_ACK_MODE:
+                return await asyncio.shield(pending)
+            if claim != NEW:
+                logging.info("🔁 Ignoring retry of %s", MessageSid)
+                return DUPLICATE_RESPONSE
+            claimed = True
+
+        # Merge quick bursts from the same user into one reply
+        if message_coalescer.enabled:
+            handler = enqueue_message if settings.WEBHOOK_ACK_MODE else message_queue.run
+            result = message_coalescer.submit(message, handler)
+            if settings.WEBHOOK_ACK_MODE:
+                return {"status": "accepted", "message": "Message queued for processing"}
+            return await result
+
+        # Acknowledge now and let the worker pool reply
+        if settings.WEBHOOK_ACK_MODE:
+            if not message_queue.enqueue(message):
+                await idempotency_service.release(
+                    message_sids(message), RuntimeError("Message queue is full")
+                )
+                raise HTTPException(status_code=503, detail="Message queue is full")
+            return {"status": "accepted", "message": "Message queued for processing"}
+
+        # Reply in order with the user's other in-flight messages
+        return await message_queue.run(message)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error("❌ Webhook error: %s", e)
+        if claimed:
+            await idempotency_service.release([MessageSid], e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def message_sids(message: InboundMessage) -> List[str]:
+    """MessageSids covered by a (possibly merged) message"""
+    messages = message.coalesced or [message]
+    return [m.message_sid for m in messages if m.message_sid]
+
 
-        # Get conversation history for context
-        conversation_history = await db_service.get_conversation_history(user_phone)
-        conversation_history = None
-        # conversation_history = None  # Disable history temporarily
+async def enqueue_message(message: InboundMessage) -> Dict:
+    """Hand a (possibly merged) message to the worker pool"""
+    if not message_queue.enqueue(message):
+        error = RuntimeError("Message queue is full")
+        await idempotency_service.release(message_sids(message), error)
+        raise error
+    return {"status": "accepted", "message": "Message queued for processing"}
 
-        # Extract user name (you can enhance this with actual user database)
-        user_name = extract_name_from_phone(user_phone)
 
-        # Generate AI response with smart personalization
-        ai_result = await ai_service.generate_response(
-            Body, conversation_history, user_name
+def conversation_turns(
+    message: InboundMessage, ai_response: str
+) -> List[Tuple[str, str, str]]:
+    """(user_message, ai_response, message_type) rows to store for a reply"""
+    if not message.coalesced:
+        return [(message.body, ai_response, "text")]
+
+    # Every merged message is stored; the reply is attached to the last one
+    turns = [(m.body, "", "coalesced") for m in message.coalesced[:-1]]
+    turns.append((message.coalesced[-1].body, ai_response, "text"))
+    return turns
+
+
+async def process_message(message: InboundMessage) -> Dict:
+    """Generate, send and store the reply for one inbound message"""
+    sids = message_sids(message)
+    try:
+        result = await reply_to_message(message)
+    except Exception as e:
+        await idempotency_service.release(sids, e)
+        raise
+
+    # Retries of these SIDs now get this result (or a no-op) instead of a new reply
+    idempotency_service.complete(sids, result)
+    return result
+
+
+async def reply_to_message(message: InboundMessage) -> Dict:
+    """Run the reply pipeline: history, AI response, send, save"""
+    user_phone = message.user_phone
+    current_user_phone.set(user_phone)
+    current_request_id.set(message.message_sid or uuid.uuid4().hex)
+
+    # Get conversation history (newest first) and rolling summary for context
+    conversation_history, summary = None, None
+    if settings.PROMPT_INCLUDE_HISTORY:
+        conversation_history, summary = await asyncio.gather(
+            db_service.get_conversation_history(
+                user_phone, limit=settings.PROMPT_RECENT_TURNS
+            ),
+            summary_service.get_summary(user_phone),
         )
-        ai_response = ai_result["response"]
-        response_time_ms = ai_result["response_time_ms"]
-        provider = ai_result["provider"]
-
-        logging.info(f"🤖 Generated response using {provider} in {response_time_ms}ms")
-
-        # Send response to user
-        success = await whatsapp_service.send_message(From, ai_response)
-
-        if success:
-            # Save to database in background
-            background_tasks.add_task(
-                save_conversation_background,
-                user_phone,
-                Body,
-                ai_response,
-                response_time_ms,
+
+    # Extract user name (you can enhance this with actual user database)
+    user_name = extract_name_from_phone(user_phone)
+
+    # Generate AI response with smart personalization
+    generate_started = time.perf_counter()
+    ai_result = await ai_service.generate_response(
+        message.body,
+        conversation_history,
+        user_name,
+        bypass_cache=message.bypass_cache,
+        summary=summary,
+    )
+    ai_response = ai_result["response"]
+    response_time_ms = ai_result["response_time_ms"]
+    provider = ai_result["provider"]
+    stage_duration.labels("generate", provider).observe_since(generate_started)
+    replies.labels(provider).inc()
+
+    logging.info("🤖 Generated response using %s in %sms", provider, response_time_ms)
+
+    # Send response to user: through the durable outbox (the dispatcher sends
+    # and retries it), or directly if the outbox is off or cannot be written
+    delivery = "failed"
+    if outbox_service.enabled and await outbox_service.enqueue(
+        message.from_number, ai_response, user_phone, message_sids(message)
+    ):
+        delivery = "queued"
+    elif await whatsapp_service.send_message(message.from_number, ai_response):
+        delivery = "sent"
+
+    if delivery != "failed":
+        # Save before the user's next message runs so its history includes this
+        # turn (the write buffer makes this an in-memory append)
+        turns = conversation_turns(message, ai_response)
+        for user_message, reply, message_type in turns:
+            await save_conversation_background(
+                user_phone, user_message, reply, response_time_ms, message_type, provider
             )
 
-            logging.info(f"✅ Response sent to {user_phone}")
-        else:
-            logging.error(f"❌ Failed to send response to {user_phone}")
+        # Turns pushed out of the recent window get folded into the summary
+        if conversation_history:
+            window = settings.PROMPT_RECENT_TURNS
+            leaving = conversation_history[max(window - len(turns), 0) : window]
+            summary_service.schedule_fold(user_phone, leaving[::-1])
 
-        return {
-            "status": "success",
-            "message": "Message processed",
-            "provider": provider,
-        }
+        logging.info("✅ Response %s for %s", delivery, user_phone)
+    else:
+        logging.error("❌ Failed to send response to %s", user_phone)
 
-    except Exception as e:
-        logging.error(f"❌ Webhook error: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    return {
+        "status": "success",
+        "message": "Message processed",
+        "provider": provider,
+        "delivery": delivery,
+    }
 
 
 async def save_conversation_background(
-    user_phone: str, user_message: str, ai_response: str, response_time_ms: int
+    user_phone: str,
+    user_message: str,
+    ai_response: str,
+    response_time_ms: int,
+    message_type: str = "text",
+    provider: str = None,
 ):
     """Save conversation in background"""
     try:
         await db_service.save_conversation(
-            user_phone, user_message, ai_response, response_time_ms
+            user_phone, user_message, ai_response, response_time_ms, message_type, provider
         )
     except Exception as e:
-        logging.error(f"❌ Background save error: {e}")
+        logging.error("❌ Background save error: %s", e)
 
 
 @router.get("/webhook/whatsapp")
@@ -247,7 +425,7 @@ async def test_gemini_api():
             ),
         }
     except Exception as e:
-        logging.error(f"❌ Gemini test error: {e}")
+        logging.error("❌ Gemini test error: %s", e)
         return {"gemini_status": "error", "message": str(e)}
 
 
@@ -257,22 +435,127 @@ async def get_stats():
     try:
         return {
             "status": "active",
-            "database": "connected" if db_service.db else "disconnected",
+            "database": "connected" if db_service.is_connected else "disconnected",
+            "storage_backend": settings.STORAGE_BACKEND,
             "ai_provider": "Google Gemini",
+            "conversations": await analytics_service.get_summary(),
+            **metrics.collect_stats(),
         }
     except Exception as e:
-        logging.error(f"❌ Stats error: {e}")
+        logging.error("❌ Stats error: %s", e)
         return {"status": "error", "message": str(e)}
 
 
-@router.delete("/clear-all-conversations")
-async def clear_all_conversations():
-    """Clear all conversations for fresh start"""
+@router.post("/stats/backfill")
+async def backfill_stats():
+    """Rebuild analytics rollups from stored conversations (runs in the background)"""
+    if not db_service.is_connected:
+        raise HTTPException(status_code=503, detail="Database not connected")
+    return analytics_service.start_backfill(db_service.store)
+
+
+@router.get("/conversations/export")
+async def export_conversations(
+    phone: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    format: str = "ndjson",
+):
+    """
+    Stream conversations as NDJSON (format=gzip to compress), oldest first.
+    Every line carries a cursor; pass the last one received to resume.
+    """
+    if not db_service.is_connected:
+        raise HTTPException(status_code=503, detail="Database not connected")
+    if format not in ("ndjson", "gzip"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or gzip")
+    if cursor:
+        # Checked here: once streaming starts, an error can only truncate the body
+        try:
+            decode_cursor(cursor, db_service.store)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Include turns still sitting in the write buffer
+    if db_service.write_buffer.is_running:
+        await db_service.write_buffer.flush()
+
+    compress = format == "gzip"
+    filename = "conversations.ndjson.gz" if compress else "conversations.ndjson"
+    return StreamingResponse(
+        export_service.stream(
+            db_service.store,
+            user_phone=phone.replace("whatsapp:", "") if phone else None,
+            since=since,
+            until=until,
+            cursor=cursor,
+            compress=compress,
+        ),
+        media_type="application/gzip" if compress else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Stage latencies, error counts and service stats in Prometheus text format"""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def job_response(request: Request, job) -> Dict:
+    return {
+        **job.to_dict(),
+        "status_url": str(request.url_for("get_retention_job", job_id=job.id)),
+    }
+
+
+@router.delete("/clear-all-conversations", status_code=202)
+async def clear_all_conversations(request: Request):
+    """
+    Start a background purge of all conversations, their summaries and
+    analytics, and return its job handle. Everything goes in throttled
+    batches; poll status_url for progress.
+    """
+    if not db_service.is_connected:
+        raise HTTPException(status_code=503, detail="Database not connected")
     try:
-        result = await db_service.db.conversations.delete_many({})
-        return {
-            "deleted_count": result.deleted_count,
-            "message": "All conversations cleared",
-        }
+        # Buffered turns would otherwise land after the purge
+        if db_service.write_buffer.is_running:
+            await db_service.write_buffer.flush()
+        summary_service.clear()
+        job = retention_service.start_job(PURGE_ALL)
     except Exception as e:
-        return {"error": str(e)}
+        logging.error("❌ Could not start purge: %s", e)
+        raise HTTPException(status_code=500, detail=f"Could not start purge: {e}")
+    return {**job_response(request, job), "message": "Purge started"}
+
+
+@router.post("/retention/run", status_code=202)
+async def run_retention(request: Request):
+    """Apply the retention policy now (max age / per-user cap) as a background job"""
+    if not db_service.is_connected:
+        raise HTTPException(status_code=503, detail="Database not connected")
+    if not retention_service.policy_enabled:
+        raise HTTPException(status_code=400, detail="No retention policy configured")
+    return job_response(request, retention_service.start_job(RETENTION))
+
+
+@router.get("/retention/jobs/{job_id}")
+async def get_retention_job(request: Request, job_id: str):
+    """Progress of a purge or retention job"""
+    job = retention_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job_response(request, job)
+
+
+@router.post("/retention/jobs/{job_id}/cancel")
+async def cancel_retention_job(request: Request, job_id: str):
+    """Cancel a running job; batches already deleted stay deleted"""
+    job = retention_service.cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job_response(request, job)
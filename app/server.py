@@ -0,0 +1,223 @@
+# File: app/server.py
+"""
+Production launcher: N uvicorn worker processes on one listening socket
+
+    python -m app.server --workers 4 --port 8000 --pin-cpus
+
+Workers are spawned, not forked, so each one builds its own Mongo, Gemini
+and Twilio clients in lifespan instead of inheriting the supervisor's.
+SIGHUP restarts the workers one at a time (the replacement is serving
+before the old one drains), SIGTERM/SIGINT drain and stop them all, and a
+worker that dies is replaced.
+"""
+from app.config.settings import settings, worker_count
+from typing import Dict, List, Optional
+import multiprocessing
+import argparse
+import logging
+import signal
+import socket
+import time
+import sys
+import os
+import uvicorn
+
+spawn = multiprocessing.get_context("spawn")
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server that tells the supervisor once lifespan startup is done"""
+
+    def __init__(self, config: uvicorn.Config, ready):
+        super().__init__(config)
+        self.ready = ready
+
+    async def startup(self, sockets: Optional[List[socket.socket]] = None):
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            self.ready.set()
+
+
+def run_worker(app_path: str, sock: socket.socket, index: int, cpu: Optional[int], ready):
+    """Worker process: pin to a CPU if asked, then serve on the shared socket"""
+    if cpu is not None:
+        os.sched_setaffinity(0, {cpu})
+    config = uvicorn.Config(
+        app_path,
+        log_level=settings.LOG_LEVEL.lower(),
+        log_config=None,  # uvicorn's loggers go through the app's log pipeline
+        timeout_graceful_shutdown=int(settings.SERVER_GRACEFUL_TIMEOUT_SECONDS),
+    )
+    server = WorkerServer(config, ready)
+    server.run(sockets=[sock])
+    if not server.started:
+        sys.exit(3)  # Lifespan startup failed
+
+
+class Worker:
+    def __init__(self, index: int, cpu: Optional[int], process, ready):
+        self.index = index
+        self.cpu = cpu
+        self.process = process
+        self.ready = ready
+        self.started_at = time.monotonic()
+
+
+class Supervisor:
+    """Keeps N workers serving; replaces them on SIGHUP (rolling) or when they die"""
+
+    def __init__(self, app_path: str, host: str, port: int, workers: int, pin_cpus: bool = False):
+        self.app_path = app_path
+        self.workers = workers
+        self.config = uvicorn.Config(app_path, host=host, port=port)
+        self.sock: Optional[socket.socket] = None
+        self.slots: Dict[int, Worker] = {}
+        self.cpus: List[int] = []
+        self.should_exit = False
+        self.restart_requested = False
+
+        if pin_cpus:
+            if hasattr(os, "sched_setaffinity"):
+                self.cpus = sorted(os.sched_getaffinity(0))
+            else:
+                logging.warning("⚠️ CPU pinning is not supported on this platform; ignoring")
+
+    def cpu_for(self, index: int) -> Optional[int]:
+        return self.cpus[index % len(self.cpus)] if self.cpus else None
+
+    def spawn_worker(self, index: int) -> Worker:
+        ready = spawn.Event()
+        cpu = self.cpu_for(index)
+        process = spawn.Process(
+            target=run_worker,
+            args=(self.app_path, self.sock, index, cpu, ready),
+            name=f"worker-{index}",
+        )
+        process.start()
+        logging.info(
+            "👷 Worker %s started (pid %s%s)",
+            index,
+            process.pid,
+            f", CPU {cpu}" if cpu is not None else "",
+        )
+        return Worker(index, cpu, process, ready)
+
+    def wait_ready(self, worker: Worker) -> bool:
+        """Wait until the worker's lifespan startup has finished (or it died)"""
+        deadline = time.monotonic() + settings.SERVER_READY_TIMEOUT_SECONDS
+        while time.monotonic() < deadline and not self.should_exit:
+            if worker.ready.wait(0.2):
+                return True
+            if not worker.process.is_alive():
+                return False
+        return False
+
+    def stop_workers(self, workers: List[Worker]):
+        """SIGTERM the workers, let them drain, then kill any that hang"""
+        for worker in workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+        # In-flight requests, then the reply queue drain in lifespan shutdown
+        deadline = (
+            time.monotonic()
+            + settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+            + settings.WEBHOOK_SHUTDOWN_TIMEOUT_SECONDS
+            + 5
+        )
+        for worker in workers:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                logging.warning("⚠️ Worker %s did not drain in time; killing it", worker.index)
+                worker.process.kill()
+                worker.process.join()
+
+    def rolling_restart(self):
+        """Replace each worker in turn; a replacement must be ready before the old one stops"""
+        logging.info("🔄 Rolling restart of all workers")
+        for index in sorted(self.slots):
+            if self.should_exit:
+                return
+            old, new = self.slots[index], self.spawn_worker(index)
+            if not self.wait_ready(new):
+                logging.error(
+                    "❌ Replacement for worker %s failed to start; keeping the old workers", index
+                )
+                self.stop_workers([new])
+                return
+            self.slots[index] = new
+            self.stop_workers([old])
+        logging.info("✅ Rolling restart complete")
+
+    def replace_dead_workers(self):
+        for index, worker in list(self.slots.items()):
+            if worker.process.is_alive():
+                continue
+            logging.error(
+                "❌ Worker %s exited with code %s; replacing it", index, worker.process.exitcode
+            )
+            # Do not spin on a worker that cannot start
+            if time.monotonic() - worker.started_at < 1.0:
+                time.sleep(1.0)
+            self.slots[index] = self.spawn_worker(index)
+
+    def handle_signal(self, signum, frame):
+        if signum == signal.SIGHUP:
+            self.restart_requested = True
+        else:
+            self.should_exit = True
+
+    def run(self):
+        # Workers read SERVER_WORKERS to split process-local quotas (rate limits)
+        os.environ["SERVER_WORKERS"] = str(self.workers)
+        self.sock = self.config.bind_socket()
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+            signal.signal(signum, self.handle_signal)
+
+        logging.info("🚀 Supervisor %s starting %s workers", os.getpid(), self.workers)
+        for index in range(self.workers):
+            self.slots[index] = self.spawn_worker(index)
+
+        while not self.should_exit:
+            if self.restart_requested:
+                self.restart_requested = False
+                self.rolling_restart()
+            self.replace_dead_workers()
+            time.sleep(0.5)
+
+        logging.info("🛑 Stopping workers...")
+        self.stop_workers(list(self.slots.values()))
+        self.sock.close()
+        logging.info("✅ All workers stopped")
+
+
+def serve(
+    app_path: str = "app.main:app",
+    host: str = None,
+    port: int = None,
+    workers: int = None,
+    pin_cpus: bool = None,
+):
+    """Run the multi-process server with settings as defaults"""
+    Supervisor(
+        app_path,
+        host or settings.SERVER_HOST,
+        port or settings.SERVER_PORT,
+        worker_count(workers),
+        settings.SERVER_PIN_CPUS if pin_cpus is None else pin_cpus,
+    ).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the app with multiple worker processes")
+    parser.add_argument("--app", default="app.main:app", help="ASGI app import path")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="Default: SERVER_WORKERS or CPU count")
+    parser.add_argument("--pin-cpus", action="store_true", default=None, help="Pin worker i to CPU i")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    serve(args.app, args.host, args.port, args.workers, args.pin_cpus)
@@ -1,18 +1,95 @@
 # File: app/services/ai_service.py
-import google.generativeai as genai
 from app.config.settings import settings
-from typing import Dict, List, Optional
+from app.services.service_registry import service_registry
+from app.services.llm_executor import llm_executor
+from app.services.response_cache import ResponseCache
+from app.services.intent_matcher import intent_matcher, IntentMatch
+from app.services.prompt_builder import prompt_builder
+from app.services.knowledge_service import knowledge_service
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, Hedger
+from app.services.rate_limiter import gemini_limiter, RateLimitExceeded
+from app.services.request_context import current_user_phone
+from app.services.metrics import stage_duration, stage_errors
+from typing import Any, Dict, List, NamedTuple, Optional
 import logging
 import asyncio
+import time
 from datetime import datetime, timedelta
 
+# Stage metrics, bound once so recording is a plain method call
+PROMPT_BUILD_TIME = stage_duration.labels("prompt_build", "local")
+LLM_CALL_TIME = stage_duration.labels("llm_call", "gemini")
+LLM_CALL_ERRORS = stage_errors.labels("llm_call")
+FALLBACK_TIME = stage_duration.labels("fallback", "local")
+
+
+class GeminiClient(NamedTuple):
+    model: Any
+    generation_config: Any
+
+
+def build_gemini_client() -> GeminiClient:
+    """Import the Gemini SDK and configure the model (first use or lifespan)"""
+    genai = service_registry.import_module("gemini", "google.generativeai")
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+    return GeminiClient(
+        model=genai.GenerativeModel(settings.GEMINI_MODEL),
+        generation_config=genai.types.GenerationConfig(
+            max_output_tokens=150,
+            temperature=0.8,  # More natural responses
+            top_p=0.9,
+            top_k=40,
+        ),
+    )
+
+
+async def check_gemini() -> bool:
+    """Fetch the model's metadata: checks key and reachability without using quota"""
+    genai = service_registry.import_module("gemini", "google.generativeai")
+    service_registry.get("gemini")
+    name = settings.GEMINI_MODEL
+    info = await asyncio.to_thread(
+        genai.get_model, name if name.startswith("models/") else f"models/{name}"
+    )
+    return info is not None
+
+
+service_registry.register("gemini", build_gemini_client)
+service_registry.register_warmup("gemini", check_gemini)
+
 
 class AIService:
     """Intelligent AI Assistant - ChatGPT Style Behavior"""
 
     def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        self.response_cache = ResponseCache()
+        self.breaker = CircuitBreaker(
+            "gemini",
+            window_size=settings.GEMINI_BREAKER_WINDOW,
+            min_calls=settings.GEMINI_BREAKER_MIN_CALLS,
+            error_rate=settings.GEMINI_BREAKER_ERROR_RATE,
+            slow_call_ms=settings.GEMINI_BREAKER_SLOW_CALL_MS,
+            slow_rate=settings.GEMINI_BREAKER_SLOW_RATE,
+            open_seconds=settings.GEMINI_BREAKER_OPEN_SECONDS,
+            half_open_probes=settings.GEMINI_BREAKER_HALF_OPEN_PROBES,
+        )
+        self.hedger = Hedger(
+            percentile=settings.GEMINI_HEDGE_PERCENTILE,
+            min_delay_ms=settings.GEMINI_HEDGE_MIN_DELAY_MS,
+        )
+
+    @property
+    def model(self):
+        return service_registry.get("gemini").model
+
+    @model.setter
+    def model(self, model):
+        # Swapping in a test double never imports the SDK
+        service_registry.set("gemini", GeminiClient(model, None))
+
+    @property
+    def generation_config(self):
+        return service_registry.get("gemini").generation_config
 
     def _is_first_interaction(
         self, conversation_history: Optional[List[Dict]] = None
@@ -41,28 +118,27 @@ class AIService:
 
     def _is_greeting_message(self, message: str) -> bool:
         """Detect if message is a greeting"""
-        greetings = [
-            "salam",
-            "assalam",
-            "aoa",
-            "assalamu alaikum",
-            "hello",
-            "hi",
-            "hey",
-            "good morning",
-            "good afternoon",
-            "good evening",
-            "namaste",
-            "adab",
-        ]
-        msg_lower = message.lower().strip()
-        return any(greeting in msg_lower for greeting in greetings)
+        return intent_matcher.classify(message).is_greeting
+
+    def _prompt_variant(
+        self,
+        use_personalized_greeting: bool,
+        conversation_history: Optional[List[Dict]] = None,
+    ) -> str:
+        """Which system prompt the message will be answered with"""
+        if use_personalized_greeting:
+            return "first_interaction"
+        if conversation_history and len(conversation_history) > 0:
+            return "continuing"
+        return "fresh"
 
     async def generate_response(
         self,
         user_message: str,
         conversation_history: Optional[List[Dict]] = None,
         user_name: str = None,
+        bypass_cache: bool = False,
+        summary: Optional[str] = None,
     ) -> Dict:
         """Generate intelligent AI response like ChatGPT"""
         start_time = datetime.utcnow()
@@ -70,16 +146,75 @@ class AIService:
         try:
             # Check if we should use name (first interaction + greeting)
             is_first = self._is_first_interaction(conversation_history)
-            is_greeting = self._is_greeting_message(user_message)
-            use_personalized_greeting = is_first and is_greeting and user_name
+            intent = intent_matcher.classify(user_message)
+            use_personalized_greeting = is_first and intent.is_greeting and user_name
+
+            # Pure small talk is answered locally without calling Gemini
+            if (
+                settings.LOCAL_INTENT_ANSWERS
+                and intent.confidence >= settings.LOCAL_INTENT_MIN_CONFIDENCE
+            ):
+                response = self._intelligent_fallback(
+                    user_message, use_personalized_greeting, user_name, intent
+                )
+                response_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+                return {
+                    "response": response,
+                    "provider": "local_intent",
+                    "response_time_ms": int(response_time),
+                }
+
+            # Serve repeated prompts from the response cache
+            cache_key = None
+            if settings.RESPONSE_CACHE_ENABLED:
+                variant = self._prompt_variant(
+                    use_personalized_greeting, conversation_history
+                )
+                cache_key = self.response_cache.make_key(
+                    user_message,
+                    variant,
+                    user_name,
+                    has_context=bool(conversation_history or summary),
+                )
+                if bypass_cache:
+                    self.response_cache.bypassed += 1
+                elif cache_key:
+                    cached = self.response_cache.get(cache_key)
+                    if cached:
+                        response_time = (
+                            datetime.utcnow() - start_time
+                        ).total_seconds() * 1000
+                        return {
+                            "response": cached["response"],
+                            "provider": "response_cache",
+                            "response_time_ms": int(response_time),
+                        }
+
+            # Ground the reply in the knowledge base; a question it has
+            # verbatim is answered from it without calling Gemini
+            retrieval = knowledge_service.retrieve(user_message)
+            if retrieval.direct:
+                response_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+                return {
+                    "response": retrieval.direct.entry.answer,
+                    "provider": "knowledge_base",
+                    "response_time_ms": int(response_time),
+                }
 
             # Generate AI response
             response = await self._generate_gemini_response(
-                user_message, conversation_history, use_personalized_greeting, user_name
+                user_message,
+                conversation_history,
+                use_personalized_greeting,
+                user_name,
+                summary,
+                knowledge_service.snippets(retrieval),
             )
 
             if response:
                 response_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+                if cache_key:
+                    self.response_cache.set(cache_key, response, int(response_time))
                 return {
                     "response": response,
                     "provider": "gemini",
@@ -87,9 +222,11 @@ class AIService:
                 }
 
             # Fallback to smart responses
+            fallback_started = time.perf_counter()
             response = self._intelligent_fallback(
-                user_message, use_personalized_greeting, user_name
+                user_message, use_personalized_greeting, user_name, intent
             )
+            FALLBACK_TIME.observe_since(fallback_started)
             response_time = (datetime.utcnow() - start_time).total_seconds() * 1000
 
             return {
@@ -99,7 +236,7 @@ class AIService:
             }
 
         except Exception as e:
-            logging.error(f"AI Service error: {e}")
+            logging.error("AI Service error: %s", e)
             return {
                 "response": "I'm here to help! Could you please ask your question again?",
                 "provider": "error",
@@ -112,71 +249,21 @@ class AIService:
         conversation_history: Optional[List[Dict]] = None,
         use_personalized_greeting: bool = False,
         user_name: str = None,
+        summary: Optional[str] = None,
+        knowledge: Optional[List[str]] = None,
     ) -> Optional[str]:
         """Generate intelligent Gemini response"""
         try:
-            # Build dynamic system prompt based on context
-            if use_personalized_greeting:
-                system_prompt = f"""You are a helpful, intelligent AI assistant. This is your first interaction with the user.
-
-CRITICAL RULES:
-- The user's name appears to be {user_name}, so you can greet them personally this ONE time
-- If they say Islamic greeting (Salam, AOA, Assalam), respond with "Walaikum Assalam {user_name}!"
-- If they say other greetings, respond naturally with their name once
-- Be warm, friendly, and professional
-- Ask how you can help them today
-- Keep response under 100 words
-- NEVER mention WhatsApp, messaging apps, or customer support
-# In system_prompt sections, make sure this line exists:
-- NEVER mention WhatsApp, messaging apps, or customer support unless specifically asked
-- After this greeting, NEVER use their name again unless they specifically ask"""
-
-            elif conversation_history and len(conversation_history) > 0:
-                system_prompt = """You are an intelligent AI assistant continuing a conversation.
-
-CRITICAL RULES:
-- Be helpful, smart, and conversational like ChatGPT
-- NEVER use the user's name (you already greeted them before)
-- Answer any question on any topic - technology, education, life, science, etc.
-- Be concise but informative (under 150 words)
-- Handle multiple languages: English, Urdu, Roman Urdu, Hindi
-- If you don't know something, say so honestly
-- Be natural and engaging
-- NEVER mention WhatsApp, messaging apps, or customer support unless specifically asked
-- NEVER mention WhatsApp, messaging, or customer support unless specifically asked"""
-
-            else:
-                system_prompt = """You are an intelligent AI assistant like ChatGPT.
-
-CRITICAL RULES:
-- Be helpful, smart, and conversational
-- Answer any question on any topic
-- Handle multiple languages: English, Urdu, Roman Urdu, Hindi  
-- Be concise but informative (under 150 words)
-- Be natural, friendly, and engaging
-- If you don't know something, admit it honestly
-- NEVER mention WhatsApp, messaging apps, or customer support unless specifically asked
-- NEVER mention WhatsApp, messaging apps, or customer support unless specifically asked"""
-
-            # Build conversation context
-            full_prompt = system_prompt + "\n\n"
-
-            # Add recent conversation for context (last 3 exchanges)
-            if conversation_history:
-                full_prompt += "Recent conversation context:\n"
-                for conv in conversation_history[-3:]:
-                    full_prompt += f"User: {conv.get('user_message', '')}\n"
-                    full_prompt += f"You: {conv.get('ai_response', '')}\n"
-                full_prompt += "\n"
-
-            # Add current message
-            full_prompt += f"Current user message: {user_message}\n"
-            full_prompt += "Your response:"
-
-            # Generate response with timeout
-            response = await asyncio.wait_for(
-                self._call_gemini_api(full_prompt), timeout=8
+            # Build token-budgeted prompt: system prompt, knowledge, summary, last K turns
+            build_started = time.perf_counter()
+            variant = self._prompt_variant(use_personalized_greeting, conversation_history)
+            full_prompt = prompt_builder.build(
+                variant, user_message, conversation_history, summary, user_name, knowledge
             )
+            PROMPT_BUILD_TIME.observe_since(build_started)
+
+            # Generate response (timeout enforced by the LLM executor)
+            response = await self._call_gemini_api(full_prompt)
 
             # Clean response
             if response:
@@ -189,60 +276,109 @@ CRITICAL RULES:
             return response if response else None
 
         except Exception as e:
-            logging.error(f"Gemini error: {e}")
+            logging.error("Gemini error: %s", e)
             return None
 
     async def _call_gemini_api(self, prompt: str) -> str:
         """Call Gemini API with optimized settings"""
+
+        user_key = current_user_phone.get()
+
+        async def attempt():
+            return await self._invoke_model(prompt)
+
+        async def backup():
+            # A hedge only goes out if it fits in the quota right now
+            if not gemini_limiter.try_acquire(user_key):
+                return None
+            return await self._invoke_model(prompt)
+
+        async def hedged():
+            return await self.hedger.call(attempt, backup)
+
+        call = hedged if settings.GEMINI_HEDGE_ENABLED else attempt
+        started = time.perf_counter()
+        response = None
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.model.generate_content(
-                    prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        max_output_tokens=150,
-                        temperature=0.8,  # More natural responses
-                        top_p=0.9,
-                        top_k=40,
+            if settings.GEMINI_BREAKER_ENABLED:
+                # Fail fast while open instead of waiting for (and spending) a token
+                self.breaker.reject_if_open()
+            await gemini_limiter.acquire(user_key)
+            if settings.GEMINI_BREAKER_ENABLED:
+                response = await self.breaker.call(call)
+            else:
+                response = await call()
+        except CircuitOpenError:
+            # Gemini is degraded; go straight to the fallback
+            pass
+        except RateLimitExceeded as e:
+            logging.warning("Gemini rate limit: %s", e)
+        except asyncio.TimeoutError:
+            logging.error("Gemini API timed out after %ss", settings.GEMINI_TIMEOUT_SECONDS)
+        except Exception as e:
+            logging.error("Gemini API error: %s", e)
+
+        LLM_CALL_TIME.observe_since(started)
+        if response is None:
+            LLM_CALL_ERRORS.inc()
+        return response
+
+    async def _invoke_model(self, prompt: str) -> Optional[str]:
+        """One Gemini request through the LLM executor; raises on failure"""
+        timeout = settings.GEMINI_TIMEOUT_SECONDS
+        try:
+            if settings.GEMINI_USE_ASYNC_CLIENT and hasattr(
+                self.model, "generate_content_async"
+            ):
+                response = await llm_executor.run_async(
+                    lambda: self.model.generate_content_async(
+                        prompt, generation_config=self.generation_config
                     ),
-                ),
-            )
-            return response.text if response and response.text else None
+                    timeout=timeout,
+                )
+            else:
+                response = await llm_executor.run_blocking(
+                    lambda: self.model.generate_content(
+                        prompt, generation_config=self.generation_config
+                    ),
+                    timeout=timeout,
+                )
         except Exception as e:
-            logging.error(f"Gemini API error: {e}")
-            return None
+            # 429 / quota exhausted: stop sending until the quota window resets
+            if type(e).__name__ in ("ResourceExhausted", "TooManyRequests"):
+                gemini_limiter.backoff(settings.GEMINI_RATE_LIMIT_BACKOFF_SECONDS)
+            raise
+        return response.text if response and response.text else None
 
     def _intelligent_fallback(
         self,
         user_message: str,
         use_personalized_greeting: bool = False,
         user_name: str = None,
+        intent: Optional[IntentMatch] = None,
     ) -> str:
         """Intelligent fallback responses"""
-        msg_lower = user_message.lower().strip()
+        intents = (intent or intent_matcher.classify(user_message)).intents
 
         # Personalized greetings for first interaction
         if use_personalized_greeting and user_name:
-            if any(greet in msg_lower for greet in ["salam", "aoa", "assalam"]):
+            if "islamic_greeting" in intents:
                 return f"Walaikum Assalam {user_name}! How can I help you today?"
-            elif any(greet in msg_lower for greet in ["hello", "hi", "hey"]):
+            elif "greeting" in intents:
                 return f"Hello {user_name}! How can I assist you today?"
 
         # Regular responses (no name)
-        if any(greet in msg_lower for greet in ["salam", "aoa", "assalam"]):
+        if "islamic_greeting" in intents:
             return "Walaikum Assalam! How can I help you?"
-        elif any(greet in msg_lower for greet in ["hello", "hi", "hey"]):
+        elif "greeting" in intents:
             return "Hello! How can I assist you today?"
-        elif (
-            "thanks" in msg_lower or "thank you" in msg_lower or "shukriya" in msg_lower
-        ):
+        elif "thanks" in intents:
             return "You're welcome! Is there anything else I can help you with?"
-        elif "bye" in msg_lower or "goodbye" in msg_lower or "alvida" in msg_lower:
+        elif "farewell" in intents:
             return "Goodbye! Feel free to reach out anytime you need help."
-        elif "how are you" in msg_lower or "kya haal" in msg_lower:
+        elif "wellbeing" in intents:
             return "I'm doing well, thank you! How can I help you today?"
-        elif any(word in msg_lower for word in ["help", "madad", "sahayata"]):
+        elif "help" in intents:
             return "I'm here to help! What do you need assistance with?"
         else:
             return "I'm here to assist you! Could you please tell me what you'd like to know or discuss?"
@@ -255,7 +391,7 @@ CRITICAL RULES:
             )
             return test_response is not None and "successful" in test_response.lower()
         except Exception as e:
-            logging.error(f"Gemini test failed: {e}")
+            logging.error("Gemini test failed: %s", e)
             return False
 
 
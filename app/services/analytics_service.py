@@ -0,0 +1,293 @@
+# File: app/services/analytics_service.py
+from collections import defaultdict
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError
+from app.config.settings import settings
+from app.services.index_manager import index_manager
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+from bisect import bisect_left
+import logging
+import asyncio
+
+# Upper bounds (ms) of the response-time histogram kept in every hour bucket
+LATENCY_BOUNDS_MS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+# "<scope>:<bucket>:<user>" markers make active-user counts exact across
+# workers: only the insert that creates the marker increments the rollup
+index_manager.register(
+    "analytics_markers",
+    [IndexModel("created_at", name="created_at_ttl", expireAfterSeconds=3 * 86400)],
+)
+
+
+def hour_key(at: datetime) -> str:
+    return f"hour:{at:%Y-%m-%dT%H}"
+
+
+def day_key(at: datetime) -> str:
+    return f"day:{at:%Y-%m-%d}"
+
+
+def latency_field(response_time_ms: int) -> str:
+    index = bisect_left(LATENCY_BOUNDS_MS, response_time_ms)
+    return f"latency_le_{LATENCY_BOUNDS_MS[index]}" if index < len(LATENCY_BOUNDS_MS) else "latency_le_inf"
+
+
+def rollup_increments(turn: Dict) -> Dict[str, int]:
+    """$inc fields one saved turn contributes to its hour bucket"""
+    if turn.get("message_type") == "coalesced":
+        # Merged into a burst: the burst's last turn carries its one reply
+        # (provider and latency), so these only count as messages
+        return {"messages": 1}
+    increments = {"messages": 1, f"provider_{turn.get('provider') or 'unknown'}": 1}
+    response_time_ms = turn.get("response_time_ms")
+    if response_time_ms is not None:
+        increments["response_time_sum"] = response_time_ms
+        increments["response_time_count"] = 1
+        increments[latency_field(response_time_ms)] = 1
+    return increments
+
+
+def latency_percentile(bucket: Dict, q: float) -> Optional[int]:
+    """Upper bound of the histogram bucket holding the q-th percentile"""
+    total = bucket.get("response_time_count", 0)
+    if not total:
+        return None
+    seen = 0
+    for bound in LATENCY_BOUNDS_MS:
+        seen += bucket.get(f"latency_le_{bound}", 0)
+        if seen >= q * total:
+            return bound
+    return None  # Beyond the last bound
+
+
+class AnalyticsService:
+    """
+    Pre-aggregated conversation stats. Saved turns are added up in memory
+    and flushed as one $inc upsert per hour bucket, so /stats reads a fixed
+    number of small rollup documents however large conversations grows.
+    """
+
+    def __init__(self):
+        self.rollups = None
+        self.markers = None
+        # hour key -> pending $inc fields
+        self.pending: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        # (scope key, user) pairs already marked by this process
+        self.seen_users: Set[Tuple[str, str]] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self.backfill_task: Optional[asyncio.Task] = None
+        self.backfill_status: Dict = {"state": "idle"}
+
+        # Counters
+        self.recorded = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def start(self, rollups, markers):
+        """Start flushing into the rollup and marker collections"""
+        self.rollups = rollups
+        self.markers = markers
+        self._flusher = asyncio.create_task(self._flush_loop(), name="analytics-flusher")
+
+    def record(self, turn: Dict):
+        """Count a saved turn (cheap: in-memory until the next flush)"""
+        if self.rollups is None:
+            return
+        bucket = self.pending[hour_key(turn["timestamp"])]
+        for field, amount in rollup_increments(turn).items():
+            bucket[field] += amount
+        self.recorded += 1
+
+        user = turn["user_phone"]
+        for scope in (hour_key(turn["timestamp"]), day_key(turn["timestamp"])):
+            if (scope, user) not in self.seen_users:
+                self.seen_users.add((scope, user))
+                self.pending.setdefault(f"markers:{scope}", defaultdict(int))[user] = 1
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.ANALYTICS_FLUSH_INTERVAL_SECONDS)
+            try:
+                await self.flush()
+            except Exception as e:
+                self.flush_errors += 1
+                logging.error("❌ Analytics flush error: %s", e)
+
+    async def flush(self):
+        """Write pending increments: one upsert per bucket, one insert per new user"""
+        pending, self.pending = self.pending, defaultdict(lambda: defaultdict(int))
+        now = datetime.utcnow()
+
+        try:
+            for key in list(pending):
+                fields = pending[key]
+                if key.startswith("markers:"):
+                    scope = key[len("markers:") :]
+                    new_users = await self._mark_users(scope, list(fields), now)
+                    if new_users:
+                        await self.rollups.update_one(
+                            {"_id": scope}, {"$inc": {"active_users": new_users}}, upsert=True
+                        )
+                else:
+                    await self.rollups.update_one(
+                        {"_id": key},
+                        {"$inc": dict(fields), "$set": {"updated_at": now}},
+                        upsert=True,
+                    )
+                del pending[key]
+        finally:
+            # Keep whatever was not written for the next flush
+            for key, fields in pending.items():
+                bucket = self.pending[key]
+                for field, amount in fields.items():
+                    bucket[field] = amount if key.startswith("markers:") else bucket[field] + amount
+        self.flushes += 1
+
+        # Only the current hour/day can still produce markers
+        current = (hour_key(now), day_key(now))
+        self.seen_users = {pair for pair in self.seen_users if pair[0] in current}
+
+    async def _mark_users(self, scope: str, users: List[str], now: datetime) -> int:
+        """Insert scope markers; returns how many users were new to the scope"""
+        new_users = 0
+        for user in users:
+            try:
+                await self.markers.insert_one({"_id": f"{scope}:{user}", "created_at": now})
+                new_users += 1
+            except DuplicateKeyError:
+                pass  # Counted already (earlier flush, other worker, or backfill)
+        return new_users
+
+    async def get_summary(self, hours: int = None) -> Dict:
+        """Rollup-based stats for the last N hours (a fixed number of lookups)"""
+        if self.rollups is None:
+            return {}
+        hours = hours or settings.ANALYTICS_WINDOW_HOURS
+        now = datetime.utcnow()
+        keys = [hour_key(now - timedelta(hours=h)) for h in range(hours)]
+
+        docs = await asyncio.gather(
+            *(self.rollups.find_one({"_id": key}) for key in keys + [day_key(now)])
+        )
+        buckets, today = [doc or {} for doc in docs[:-1]], docs[-1] or {}
+
+        # Add increments not flushed yet so the numbers are current
+        for key, bucket in zip(keys, buckets):
+            for field, amount in self.pending.get(key, {}).items():
+                bucket[field] = bucket.get(field, 0) + amount
+
+        totals: Dict[str, int] = defaultdict(int)
+        for bucket in buckets:
+            for field, value in bucket.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[field] += value
+
+        count = totals.get("response_time_count", 0)
+        return {
+            "window_hours": hours,
+            "messages": totals.get("messages", 0),
+            "messages_per_hour": {
+                key[len("hour:") :]: bucket.get("messages", 0)
+                for key, bucket in reversed(list(zip(keys, buckets)))
+            },
+            "provider_mix": {
+                field[len("provider_") :]: value
+                for field, value in totals.items()
+                if field.startswith("provider_")
+            },
+            "avg_response_time_ms": round(totals["response_time_sum"] / count, 1) if count else None,
+            "p95_response_time_ms": latency_percentile(totals, 0.95),
+            "active_users_last_hour": buckets[0].get("active_users", 0),
+            "active_users_today": today.get("active_users", 0),
+        }
+
+    def start_backfill(self, store) -> Dict:
+        """Rebuild rollups for turns saved before the current hour (background job)"""
+        if self.backfill_task is not None and not self.backfill_task.done():
+            return self.backfill_status
+        cutoff = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        self.backfill_status = {"state": "running", "cutoff": cutoff.isoformat(), "scanned": 0}
+        self.backfill_task = asyncio.create_task(self._backfill(store, cutoff), name="analytics-backfill")
+        return self.backfill_status
+
+    async def _backfill(self, store, cutoff: datetime):
+        """
+        Live recording only touches hours at or after cutoff, so hours before
+        it are recomputed and $set (safe to re-run). The cutoff day is shared
+        with live traffic, so its users go through the markers instead.
+        """
+        hours: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        hour_users: Dict[str, Set[str]] = defaultdict(set)
+        day_users: Dict[str, Set[str]] = defaultdict(set)
+        after_id = None
+        try:
+            while True:
+                batch = await store.scan_conversations(
+                    after_id, settings.ANALYTICS_BACKFILL_BATCH_SIZE, before=cutoff
+                )
+                if not batch:
+                    break
+                for turn in batch:
+                    key = hour_key(turn["timestamp"])
+                    for field, amount in rollup_increments(turn).items():
+                        hours[key][field] += amount
+                    hour_users[key].add(turn["user_phone"])
+                    day_users[day_key(turn["timestamp"])].add(turn["user_phone"])
+                after_id = batch[-1]["_id"]
+                self.backfill_status["scanned"] += len(batch)
+                await asyncio.sleep(0)  # Let live traffic run between pages
+
+            now = datetime.utcnow()
+            for key, fields in hours.items():
+                await self.rollups.update_one(
+                    {"_id": key},
+                    {"$set": {**fields, "active_users": len(hour_users[key]), "updated_at": now}},
+                    upsert=True,
+                )
+
+            cutoff_day = day_key(cutoff)
+            for key, users in day_users.items():
+                if key == cutoff_day:
+                    new_users = await self._mark_users(key, sorted(users), now)
+                    if new_users:
+                        await self.rollups.update_one(
+                            {"_id": key}, {"$inc": {"active_users": new_users}}, upsert=True
+                        )
+                else:
+                    await self.rollups.update_one(
+                        {"_id": key}, {"$set": {"active_users": len(users)}}, upsert=True
+                    )
+
+            self.backfill_status.update(state="done", hours=len(hours), days=len(day_users))
+            logging.info("📊 Analytics backfill done: %s", self.backfill_status)
+        except Exception as e:
+            self.backfill_status.update(state="failed", error=str(e))
+            logging.error("❌ Analytics backfill failed: %s", e)
+
+    async def stop(self):
+        """Cancel background work and flush what is pending"""
+        for task in (self.backfill_task, self._flusher):
+            if task is not None and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._flusher = None
+        if self.rollups is not None and self.pending:
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error("❌ Analytics final flush failed: %s", e)
+
+    def get_stats(self) -> Dict:
+        return {
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "pending_buckets": len(self.pending),
+            "backfill_state": self.backfill_status["state"],
+        }
+
+
+# Global analytics service instance
+analytics_service = AnalyticsService()
@@ -0,0 +1,247 @@
+# File: app/services/circuit_breaker.py
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+import logging
+import asyncio
+import time
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency while its breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Trips when the error rate or slow-call rate over the last calls is too high.
+    While open every call fails fast; after a cooldown a few half-open probes
+    decide whether to close again or re-open.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int,
+        min_calls: int,
+        error_rate: float,
+        slow_call_ms: float,
+        slow_rate: float,
+        open_seconds: float,
+        half_open_probes: int,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate
+        self.slow_call_ms = slow_call_ms
+        self.slow_rate_threshold = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.probe_successes = 0
+        # (failed, slow) for the most recent calls
+        self.outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+
+        # Counters
+        self.trips = 0
+        self.rejected = 0
+
+    def _transition(self, state: str):
+        if state != self.state:
+            logging.warning("⚡ Circuit '%s': %s -> %s", self.name, self.state, state)
+            self.state = state
+
+    def allow(self) -> bool:
+        """Whether a call may go through right now"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self._transition(HALF_OPEN)
+            self.probes_in_flight = 0
+            self.probe_successes = 0
+
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                self.rejected += 1
+                return False
+            self.probes_in_flight += 1
+
+        return True
+
+    def reject_if_open(self):
+        """
+        Raise CircuitOpenError if a call made now would be rejected, without
+        taking a half-open probe slot. Lets callers fail fast before queueing
+        for other resources (e.g. a rate-limit token).
+        """
+        cooling_down = self.state == OPEN and time.monotonic() - self.opened_at < self.open_seconds
+        probes_busy = self.state == HALF_OPEN and self.probes_in_flight >= self.half_open_probes
+        if cooling_down or probes_busy:
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit '{self.name}' is {self.state}")
+
+    def record(self, latency_ms: float, failed: bool):
+        """Record the outcome of an allowed call"""
+        slow = latency_ms >= self.slow_call_ms
+
+        if self.state == HALF_OPEN:
+            self.probes_in_flight -= 1
+            if failed or slow:
+                self._trip()
+            else:
+                self.probe_successes += 1
+                if self.probe_successes >= self.half_open_probes:
+                    self.outcomes.clear()
+                    self._transition(CLOSED)
+            return
+
+        self.outcomes.append((failed, slow))
+        if self.state == CLOSED and len(self.outcomes) >= self.min_calls:
+            error_rate, slow_rate = self.rates()
+            if error_rate >= self.error_rate_threshold or slow_rate >= self.slow_rate_threshold:
+                self._trip()
+
+    def _trip(self):
+        self.trips += 1
+        self.opened_at = time.monotonic()
+        self._transition(OPEN)
+
+    def rates(self) -> Tuple[float, float]:
+        """(error rate, slow-call rate) over the window"""
+        if not self.outcomes:
+            return 0.0, 0.0
+        total = len(self.outcomes)
+        failed = sum(1 for f, _ in self.outcomes if f)
+        slow = sum(1 for _, s in self.outcomes if s)
+        return failed / total, slow / total
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn through the breaker, failing fast while it is open"""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is {self.state}")
+
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            if self.state == HALF_OPEN:
+                self.probes_in_flight -= 1
+            raise
+        except Exception:
+            self.record((time.monotonic() - started) * 1000, failed=True)
+            raise
+        self.record((time.monotonic() - started) * 1000, failed=result is None)
+        return result
+
+    def get_stats(self) -> Dict:
+        error_rate, slow_rate = self.rates()
+        return {
+            "state": self.state,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "window_calls": len(self.outcomes),
+            "error_rate": round(error_rate, 3),
+            "slow_rate": round(slow_rate, 3),
+        }
+
+
+class LatencyTracker:
+    """Fixed-size ring buffer of latencies with a cached percentile"""
+
+    def __init__(self, size: int = 200, refresh_every: int = 20):
+        self.samples = [0.0] * size
+        self.size = size
+        self.count = 0
+        self.refresh_every = refresh_every
+        self._cached: Dict[float, float] = {}
+
+    def add(self, latency_ms: float):
+        self.samples[self.count % self.size] = latency_ms
+        self.count += 1
+        if self.count % self.refresh_every == 0:
+            self._cached.clear()
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-th percentile of the buffered samples, None until enough data"""
+        filled = min(self.count, self.size)
+        if filled < self.refresh_every:
+            return None
+        if q not in self._cached:
+            ordered = sorted(self.samples[:filled])
+            self._cached[q] = ordered[min(int(q * filled), filled - 1)]
+        return self._cached[q]
+
+
+class Hedger:
+    """Sends a backup attempt when the first one runs past the tracked percentile"""
+
+    def __init__(self, percentile: float, min_delay_ms: float):
+        self.percentile = percentile
+        self.min_delay_ms = min_delay_ms
+        self.latency = LatencyTracker()
+
+        # Counters
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def delay_ms(self) -> Optional[float]:
+        p = self.latency.percentile(self.percentile)
+        return None if p is None else max(p, self.min_delay_ms)
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        backup: Optional[Callable[[], Awaitable[T]]] = None,
+    ) -> T:
+        """Run fn, racing a backup attempt (fn by default) if it is slower than usual"""
+        self.calls += 1
+        started = time.monotonic()
+        delay = self.delay_ms()
+
+        first = asyncio.ensure_future(fn())
+        if delay is None:
+            result = await first
+            self.latency.add((time.monotonic() - started) * 1000)
+            return result
+
+        done, _ = await asyncio.wait({first}, timeout=delay / 1000)
+        if done:
+            self.latency.add((time.monotonic() - started) * 1000)
+            return first.result()
+
+        self.hedges += 1
+        second = asyncio.ensure_future((backup or fn)())
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    # A failed or empty attempt only counts if nothing else is left
+                    if task.exception() is None and task.result() is not None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        self.latency.add((time.monotonic() - started) * 1000)
+                        return task.result()
+            return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "delay_ms": self.delay_ms(),
+        }
@@ -0,0 +1,123 @@
+# File: app/services/conversation_store.py
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+
+
+class ConversationStore(ABC):
+    """
+    Storage backend behind DatabaseService.
+
+    conversations is the write target for turns (insert_one, and
+    insert_many(docs, ordered=False) for the write buffer). collection(name)
+    returns an _id-keyed document collection with the Motor calls the other
+    services use: insert_one, find_one, update_one ($set/$inc, upsert),
+    delete_one and delete_many.
+    """
+
+    backend = "base"
+
+    @abstractmethod
+    async def connect(self):
+        """Open the backend and create its indexes"""
+
+    @abstractmethod
+    async def close(self):
+        """Flush and release the backend's connections"""
+
+    @property
+    @abstractmethod
+    def conversations(self):
+        """Collection the conversation turns are written to"""
+
+    @abstractmethod
+    def collection(self, name: str):
+        """_id-keyed document collection for a service"""
+
+    def parse_id(self, value: str):
+        """A conversation _id from its string form; ValueError if it cannot be one"""
+        return value
+
+    @abstractmethod
+    async def recent_history(self, user_phone: str, limit: int) -> List[Dict]:
+        """Newest-first turns for a user (user_message, ai_response, timestamp)"""
+
+    @abstractmethod
+    async def scan_conversations(
+        self,
+        after_id=None,
+        limit: int = 500,
+        before: Optional[datetime] = None,
+        since: Optional[datetime] = None,
+        user_phone: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Next page of full turn documents in _id order, resuming after after_id
+        (keyset paging: every page is an index range, memory stays per page)
+        """
+
+    @abstractmethod
+    async def delete_conversations_page(
+        self,
+        limit: int,
+        before: Optional[datetime] = None,
+        user_phone: Optional[str] = None,
+    ) -> int:
+        """
+        Delete the oldest page (by _id) of matching turns as one _id range,
+        so each call is a bounded index-range delete; returns how many went
+        """
+
+    @abstractmethod
+    async def delete_documents_page(self, collection: str, limit: int) -> int:
+        """Delete up to limit documents from a service collection; returns how many went"""
+
+    @abstractmethod
+    async def users_over_cap(self, cap: int) -> List[Tuple[str, int]]:
+        """(user_phone, turn count) for users storing more than cap turns"""
+
+    @abstractmethod
+    async def clear_conversations(self) -> int:
+        """Delete every stored turn; returns how many were removed"""
+
+    @abstractmethod
+    async def outbox_add(self, message: Dict) -> bool:
+        """Store an outbound message; False if one with its _id is already queued"""
+
+    @abstractmethod
+    async def outbox_claim(self, now: datetime, lease_until: datetime, limit: int) -> List[Dict]:
+        """
+        Lease up to limit due messages (next_attempt_at and lease_until both
+        <= now), at most one per user and only a user's oldest pending
+        message, so replies to a user go out in order. Claims are atomic, so
+        concurrent dispatchers in other workers never get the same message.
+        """
+
+    @abstractmethod
+    async def outbox_claim_next(
+        self, user_phone: str, now: datetime, lease_until: datetime
+    ) -> Optional[Dict]:
+        """Lease the user's oldest pending message if it is due and not leased"""
+
+    @abstractmethod
+    async def outbox_reschedule(
+        self, message_id: str, next_attempt_at: datetime, attempts: int, error: Optional[str]
+    ):
+        """Release a message's lease and make it due again at next_attempt_at"""
+
+    @abstractmethod
+    async def outbox_remove(self, message_id: str):
+        """Drop a message that was sent or dead-lettered"""
+
+
+def create_store(backend: str) -> ConversationStore:
+    """Store for the configured backend (imported lazily so each needs only its driver)"""
+    if backend == "sqlite":
+        from app.services.sqlite_store import SQLiteConversationStore
+
+        return SQLiteConversationStore()
+    if backend == "mongodb":
+        from app.services.mongo_store import MongoConversationStore
+
+        return MongoConversationStore()
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}' (expected mongodb or sqlite)")
@@ -1,87 +1,170 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from app.config.settings import settings
-from app.models.conversation import ConversationModel
+from app.config.settings import settings, worker_count
+from app.services.cache import LRUCache
+from app.services.conversation_store import ConversationStore, create_store
+from app.services.write_buffer import WriteBehindBuffer
+from app.services.metrics import stage_duration, stage_errors
+from app.services.analytics_service import analytics_service
+from bson import ObjectId
 from typing import List, Dict, Optional
 import logging
+import time
 from datetime import datetime
 
+# Stage metrics for the conversation store (store timings are labelled
+# with the backend once it is known)
+HISTORY_CACHE_TIME = stage_duration.labels("history_fetch", "cache")
+HISTORY_FETCH_ERRORS = stage_errors.labels("history_fetch")
+SAVE_ERRORS = stage_errors.labels("db_save")
+
 
 class DatabaseService:
-    """Service for MongoDB operations"""
+    """Service for conversation storage (MongoDB or SQLite)"""
 
     def __init__(self):
-        self.client: AsyncIOMotorClient = None
-        self.db = None
-
-    async def connect_to_database(self):
-        """Initialize database connection"""
+        self.store: Optional[ConversationStore] = None
+        # user_phone -> {"limit": int, "items": newest-first history}
+        self.history_cache = LRUCache(
+            max_entries=settings.HISTORY_CACHE_MAX_ENTRIES,
+            max_bytes=settings.HISTORY_CACHE_MAX_BYTES,
+            ttl_seconds=settings.HISTORY_CACHE_TTL_SECONDS,
+        )
+        # Write-through only reaches this process's cache, and a user's next
+        # message may land on another worker
+        self.cache_history = settings.HISTORY_CACHE_ENABLED and worker_count() == 1
+        self.write_buffer = WriteBehindBuffer(
+            "conversations",
+            batch_size=settings.DB_WRITE_BATCH_SIZE,
+            flush_interval_ms=settings.DB_WRITE_FLUSH_INTERVAL_MS,
+            max_pending=settings.DB_WRITE_MAX_PENDING,
+        )
+
+    @property
+    def is_connected(self) -> bool:
+        return self.store is not None
+
+    async def connect_to_database(self, store: ConversationStore = None):
+        """Open the configured storage backend (or the given store)"""
         try:
-            self.client = AsyncIOMotorClient(settings.MONGODB_URL)
-            self.db = self.client[settings.DATABASE_NAME]
+            store = store or create_store(settings.STORAGE_BACKEND)
+            await store.connect()
+            self.store = store
+            self._fetch_time = stage_duration.labels("history_fetch", store.backend)
+            self._save_time = stage_duration.labels("db_save", store.backend)
 
-            # Test connection
-            await self.client.admin.command("ping")
-            logging.info("✅ Connected to MongoDB successfully!")
+            if settings.DB_WRITE_BUFFER_ENABLED:
+                self.write_buffer.start(store.conversations)
 
         except Exception as e:
-            logging.error(f"❌ Failed to connect to MongoDB: {e}")
+            logging.error("❌ Failed to open %s storage: %s", settings.STORAGE_BACKEND, e)
             raise
 
+    def collection(self, name: str):
+        """Document collection for services that keep their own state"""
+        return self.store.collection(name)
+
     async def save_conversation(
         self,
         user_phone: str,
         user_message: str,
         ai_response: str,
         response_time_ms: int = None,
+        message_type: str = "text",
+        provider: str = None,
     ) -> Optional[str]:
         """Save conversation to database"""
+        started = time.perf_counter()
         try:
-            conversation = ConversationModel(
-                user_phone=user_phone,
-                user_message=user_message,
-                ai_response=ai_response,
-                response_time_ms=response_time_ms,
+            # Plain document matching ConversationModel, without per-call validation
+            conversation = {
+                "_id": ObjectId(),
+                "user_phone": user_phone,
+                "user_message": user_message,
+                "ai_response": ai_response,
+                "timestamp": datetime.utcnow(),
+                "response_time_ms": response_time_ms,
+                "message_type": message_type,
+                "provider": provider,
+            }
+
+            if self.write_buffer.is_running:
+                await self.write_buffer.add(conversation)
+            else:
+                await self.store.conversations.insert_one(conversation)
+                logging.info("💾 Conversation saved with ID: %s", conversation["_id"])
+
+            analytics_service.record(conversation)
+            self._write_through_history(
+                user_phone,
+                {
+                    "user_message": user_message,
+                    "ai_response": ai_response,
+                    "timestamp": conversation["timestamp"],
+                },
             )
-
-            result = await self.db.conversations.insert_one(
-                conversation.dict(by_alias=True, exclude_unset=True)
-            )
-
-            logging.info(f"💾 Conversation saved with ID: {result.inserted_id}")
-            return str(result.inserted_id)
+            return str(conversation["_id"])
 
         except Exception as e:
-            logging.error(f"❌ Database save error: {e}")
+            logging.error("❌ Database save error: %s", e)
+            SAVE_ERRORS.inc()
             return None
+        finally:
+            if self.store is not None:
+                self._save_time.observe_since(started)
 
     async def get_conversation_history(
         self, user_phone: str, limit: int = 5
     ) -> List[Dict]:
         """Get recent conversations for context"""
-        try:
-            cursor = (
-                self.db.conversations.find({"user_phone": user_phone})
-                .sort("timestamp", -1)
-                .limit(limit)
-            )
+        started = time.perf_counter()
+        if self.cache_history:
+            cached = self.history_cache.get(user_phone)
+            if cached is not None and cached["limit"] >= limit:
+                HISTORY_CACHE_TIME.observe_since(started)
+                return list(cached["items"][:limit])
 
-            conversations = await cursor.to_list(length=limit)
+        try:
+            conversations = await self.store.recent_history(user_phone, limit)
 
-            # Convert ObjectId to string
-            for conv in conversations:
-                conv["_id"] = str(conv["_id"])
+            if self.cache_history:
+                self.history_cache.set(
+                    user_phone, {"limit": limit, "items": list(conversations)}
+                )
 
+            self._fetch_time.observe_since(started)
             return conversations
 
         except Exception as e:
-            logging.error(f"❌ Database fetch error: {e}")
+            logging.error("❌ Database fetch error: %s", e)
+            HISTORY_FETCH_ERRORS.inc()
             return []
 
+    def _write_through_history(self, user_phone: str, conversation: Dict):
+        """Prepend a freshly saved turn to the user's cached history"""
+        if not self.cache_history:
+            return
+
+        # Only extend entries loaded from the database, so the cache never
+        # claims to hold a complete history it has not seen
+        cached = self.history_cache.peek(user_phone)
+        if cached is None:
+            return
+
+        items = [conversation] + cached["items"][: cached["limit"] - 1]
+        self.history_cache.set(user_phone, {"limit": cached["limit"], "items": items})
+
+    async def clear_conversations(self) -> int:
+        """Delete every stored turn and drop cached history"""
+        deleted = await self.store.clear_conversations()
+        self.history_cache.clear()
+        return deleted
+
     async def close_connection(self):
         """Close database connection"""
-        if self.client:
-            self.client.close()
-            logging.info("🔌 Database connection closed")
+        # Flush buffered turns before the client goes away
+        await self.write_buffer.stop(settings.WEBHOOK_SHUTDOWN_TIMEOUT_SECONDS)
+
+        if self.store is not None:
+            await self.store.close()
 
 
 # Global database service instance
@@ -0,0 +1,126 @@
+# File: app/services/export_service.py
+from app.config.settings import settings
+from typing import AsyncIterator, Dict, Optional
+from datetime import datetime, timezone
+import logging
+import base64
+import json
+import zlib
+
+EXPORT_FIELDS = (
+    "user_phone",
+    "user_message",
+    "ai_response",
+    "timestamp",
+    "response_time_ms",
+    "message_type",
+    "provider",
+)
+
+
+def encode_cursor(last_id) -> str:
+    """Opaque resume token for the last exported turn"""
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, store):
+    """The _id a resume token points at; ValueError unless it is a valid _id for store"""
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        return store.parse_id(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        raise ValueError("Invalid export cursor")
+
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored timestamps are naive UTC; convert aware query bounds to match"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def to_record(turn: Dict) -> Dict:
+    """JSON-safe export record; cursor resumes the export right after it"""
+    record = {"cursor": encode_cursor(turn["_id"])}
+    for field in EXPORT_FIELDS:
+        value = turn.get(field)
+        record[field] = value.isoformat() if isinstance(value, datetime) else value
+    return record
+
+
+class ExportService:
+    """
+    Streams conversations out as NDJSON (optionally gzip) one page at a
+    time, so memory stays at one page however many turns are exported.
+    """
+
+    def __init__(self):
+        # Counters
+        self.exports = 0
+        self.active = 0
+        self.documents = 0
+        self.bytes_sent = 0
+
+    async def stream(
+        self,
+        store,
+        user_phone: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        compress: bool = False,
+    ) -> AsyncIterator[bytes]:
+        """Yield NDJSON (or gzip) chunks, one per page of turns"""
+        after_id = decode_cursor(cursor, store) if cursor else None
+        since, until = to_naive_utc(since), to_naive_utc(until)
+        gzipper = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # 31: gzip header
+        batch_size = settings.EXPORT_BATCH_SIZE
+
+        self.exports += 1
+        self.active += 1
+        exported = 0
+        try:
+            while True:
+                page = await store.scan_conversations(
+                    after_id, batch_size, before=until, since=since, user_phone=user_phone
+                )
+                if not page:
+                    break
+                chunk = "".join(
+                    json.dumps(to_record(turn), ensure_ascii=False) + "\n" for turn in page
+                ).encode()
+                after_id = page[-1]["_id"]
+                exported += len(page)
+
+                if gzipper is not None:
+                    chunk = gzipper.compress(chunk)
+                if chunk:
+                    self.bytes_sent += len(chunk)
+                    yield chunk
+                if len(page) < batch_size:
+                    break
+
+            if gzipper is not None:
+                tail = gzipper.flush()
+                self.bytes_sent += len(tail)
+                yield tail
+        except Exception as e:
+            # Headers are already sent; the client resumes from the last cursor it got
+            logging.error("❌ Export stopped after %s turns: %s", exported, e)
+            raise
+        finally:
+            self.active -= 1
+            self.documents += exported
+            logging.info("📤 Exported %s turns", exported)
+
+    def get_stats(self) -> Dict:
+        return {
+            "exports": self.exports,
+            "active": self.active,
+            "documents": self.documents,
+            "bytes_sent": self.bytes_sent,
+        }
+
+
+# Global export service instance
+export_service = ExportService()
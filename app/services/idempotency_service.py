@@ -0,0 +1,127 @@
+# File: app/services/idempotency_service.py
+from collections import OrderedDict
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError
+from app.config.settings import settings
+from app.services.index_manager import index_manager
+from typing import Dict, Iterable, Optional, Tuple
+from datetime import datetime
+import logging
+import asyncio
+
+NEW = "new"
+IN_FLIGHT = "in_flight"
+DUPLICATE = "duplicate"
+
+DUPLICATE_RESPONSE = {"status": "duplicate", "message": "Message already processed"}
+
+# _id is the MessageSid, so the _id unique index rejects a second claim;
+# the TTL index keeps the collection from growing forever
+index_manager.register(
+    "processed_messages",
+    [
+        IndexModel(
+            "created_at",
+            name="created_at_ttl",
+            expireAfterSeconds=int(settings.IDEMPOTENCY_TTL_HOURS * 3600),
+        )
+    ],
+)
+
+
+class IdempotencyService:
+    """Deduplicates Twilio webhook retries by MessageSid"""
+
+    def __init__(self, max_recent: int = None):
+        self.max_recent = max_recent or settings.IDEMPOTENCY_RECENT_MAX
+        # Recently completed SIDs, oldest first (bounded, so memory stays flat)
+        self.recent: "OrderedDict[str, None]" = OrderedDict()
+        # SID -> future resolving with the reply result
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.collection = None
+
+        # Counters
+        self.claims = 0
+        self.in_flight_hits = 0
+        self.memory_duplicates = 0
+        self.db_duplicates = 0
+
+    def start(self, collection):
+        """Back the in-memory set with the processed_messages collection"""
+        self.collection = collection
+
+    async def claim(self, message_sid: str) -> Tuple[str, Optional[asyncio.Future]]:
+        """Claim a SID: (NEW, None), (IN_FLIGHT, future) or (DUPLICATE, None)"""
+        if message_sid in self.recent:
+            self.memory_duplicates += 1
+            return DUPLICATE, None
+
+        pending = self.in_flight.get(message_sid)
+        if pending is not None:
+            self.in_flight_hits += 1
+            return IN_FLIGHT, pending
+
+        # Reserve locally before awaiting so a concurrent retry sees it in flight
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[message_sid] = future
+
+        if self.collection is not None:
+            try:
+                await self.collection.insert_one(
+                    {"_id": message_sid, "created_at": datetime.utcnow()}
+                )
+            except DuplicateKeyError:
+                # Handled earlier, or by another worker process
+                del self.in_flight[message_sid]
+                future.set_result(DUPLICATE_RESPONSE)
+                self._remember(message_sid)
+                self.db_duplicates += 1
+                return DUPLICATE, None
+            except Exception as e:
+                logging.warning("⚠️ Idempotency claim not persisted for %s: %s", message_sid, e)
+
+        self.claims += 1
+        return NEW, None
+
+    def complete(self, message_sids: Iterable[str], result: Dict):
+        """Mark SIDs done and hand the result to any retries waiting on them"""
+        for message_sid in message_sids:
+            future = self.in_flight.pop(message_sid, None)
+            if future is not None and not future.done():
+                future.set_result(result)
+            self._remember(message_sid)
+
+    async def release(self, message_sids: Iterable[str], error: Exception):
+        """Forget SIDs whose processing failed so a retry can try again"""
+        for message_sid in message_sids:
+            future = self.in_flight.pop(message_sid, None)
+            if future is not None and not future.done():
+                future.set_exception(error)
+                future.exception()  # Retries may not be waiting on it
+            if self.collection is not None:
+                try:
+                    await self.collection.delete_one({"_id": message_sid})
+                except Exception as e:
+                    logging.warning("⚠️ Could not release %s: %s", message_sid, e)
+
+    def _remember(self, message_sid: str):
+        self.recent[message_sid] = None
+        self.recent.move_to_end(message_sid)
+        while len(self.recent) > self.max_recent:
+            self.recent.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        """Deduplication counters and memory footprint"""
+        return {
+            "recent": len(self.recent),
+            "max_recent": self.max_recent,
+            "in_flight": len(self.in_flight),
+            "claims": self.claims,
+            "in_flight_hits": self.in_flight_hits,
+            "memory_duplicates": self.memory_duplicates,
+            "db_duplicates": self.db_duplicates,
+        }
+
+
+# Global idempotency service instance
+idempotency_service = IdempotencyService()
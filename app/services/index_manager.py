@@ -0,0 +1,80 @@
+# File: app/services/index_manager.py
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from typing import Dict, List
+import logging
+
+# Fields the prompt builder reads from history
+HISTORY_PROJECTION = {"_id": 0, "user_message": 1, "ai_response": 1, "timestamp": 1}
+
+
+class IndexManager:
+    """Creates the indexes each collection needs at startup"""
+
+    def __init__(self):
+        self.indexes: Dict[str, List[IndexModel]] = {
+            "conversations": [
+                # Serves find({"user_phone"}).sort("timestamp", -1) without a sort stage
+                IndexModel(
+                    [("user_phone", ASCENDING), ("timestamp", DESCENDING)],
+                    name="user_phone_timestamp",
+                ),
+            ],
+        }
+
+    def register(self, collection: str, indexes: List[IndexModel]):
+        """Add indexes another service needs on a collection"""
+        self.indexes.setdefault(collection, []).extend(indexes)
+
+    async def ensure_indexes(self, db) -> Dict[str, List[str]]:
+        """Create every registered index (no-op for ones that already exist)"""
+        created = {}
+        for collection, indexes in self.indexes.items():
+            try:
+                created[collection] = await db[collection].create_indexes(indexes)
+            except Exception as e:
+                logging.error("❌ Index creation failed on %s: %s", collection, e)
+        logging.info("🗂️ Indexes ensured: %s", created)
+        return created
+
+    async def explain_history_query(self, db, user_phone: str, limit: int = 5) -> Dict:
+        """Explain output for the history query used by get_conversation_history"""
+        cursor = (
+            db.conversations.find({"user_phone": user_phone}, HISTORY_PROJECTION)
+            .sort("timestamp", -1)
+            .limit(limit)
+        )
+        return await cursor.explain()
+
+    @staticmethod
+    def plan_uses_index(explain: Dict) -> bool:
+        """True if the winning plan scans an index and needs no blocking sort"""
+        stages = []
+        plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        # Newer servers nest the classic plan under queryPlan
+        plan = plan.get("queryPlan", plan)
+        pending = [plan]
+        while pending:
+            stage = pending.pop()
+            stages.append(stage.get("stage"))
+            if "inputStage" in stage:
+                pending.append(stage["inputStage"])
+            pending.extend(stage.get("inputStages", []))
+        return "IXSCAN" in stages and "SORT" not in stages and "COLLSCAN" not in stages
+
+    async def verify_history_plan(self, db) -> bool:
+        """Check the history query is served by the compound index"""
+        try:
+            explain = await self.explain_history_query(db, "+10000000000")
+            uses_index = self.plan_uses_index(explain)
+            if uses_index:
+                logging.info("✅ History query plan uses user_phone_timestamp index")
+            else:
+                logging.warning("⚠️ History query plan is not using an index")
+            return uses_index
+        except Exception as e:
+            logging.error("❌ Query plan check failed: %s", e)
+            return False
+
+
+# Global index manager instance
+index_manager = IndexManager()
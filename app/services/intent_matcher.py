@@ -0,0 +1,174 @@
+# File: app/services/intent_matcher.py
+from typing import Dict, List, NamedTuple, Tuple
+import unicodedata
+
+# Intent -> keywords (English, Urdu, Roman Urdu, Hindi). Order sets priority.
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "islamic_greeting": [
+        "salam",
+        "salaam",
+        "assalam",
+        "asalam",
+        "aoa",
+        "assalamu alaikum",
+        "assalam o alaikum",
+        "asalam o alaikum",
+        "السلام علیکم",
+        "سلام",
+    ],
+    "greeting": [
+        "hello",
+        "hi",
+        "hey",
+        "good morning",
+        "good afternoon",
+        "good evening",
+        "namaste",
+        "adab",
+        "नमस्ते",
+        "ہیلو",
+    ],
+    "thanks": [
+        "thanks",
+        "thank you",
+        "thx",
+        "shukriya",
+        "jazakallah",
+        "शुक्रिया",
+        "धन्यवाद",
+        "شکریہ",
+    ],
+    "farewell": [
+        "bye",
+        "goodbye",
+        "alvida",
+        "khuda hafiz",
+        "allah hafiz",
+        "अलविदा",
+        "خدا حافظ",
+    ],
+    "wellbeing": [
+        "how are you",
+        "kya haal",
+        "kya haal hai",
+        "kaise ho",
+        "kaisay ho",
+        "آپ کیسے ہیں",
+    ],
+    "help": ["help", "madad", "sahayata", "मदद", "مدد"],
+}
+
+GREETING_INTENTS = ("islamic_greeting", "greeting")
+
+# Words that do not change the meaning of a pleasantry ("hi there", "thanks a lot")
+FILLER_WORDS = frozenset(
+    "there all everyone a lot so much very bro sir ji jee जी dear friend again and you".split()
+)
+
+
+
+class _Separators(dict):
+    """
+    str.translate table: punctuation and symbols (emoji included) -> space,
+    everything else kept. Filled lazily per code point, so the table never
+    holds more than the characters actually seen.
+    """
+
+    def __missing__(self, cp: int):
+        value = " " if unicodedata.category(chr(cp))[0] in "PS" else cp
+        self[cp] = value
+        return value
+
+
+_SEPARATORS = _Separators()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Words split on whitespace, punctuation and symbols, like the knowledge
+    base's tokenizer. Unlike a \\w+ regex, this keeps combining marks
+    (Devanagari vowel signs and virama) inside their word.
+    """
+    return text.lower().translate(_SEPARATORS).split()
+
+
+class IntentMatch(NamedTuple):
+    """Intents found in a message, highest priority first"""
+
+    intents: Tuple[str, ...]
+    confidence: float
+
+    @property
+    def primary(self) -> str:
+        return self.intents[0] if self.intents else None
+
+    @property
+    def is_greeting(self) -> bool:
+        return any(intent in GREETING_INTENTS for intent in self.intents)
+
+
+_NO_MATCH = IntentMatch((), 0.0)
+
+
+class IntentMatcher:
+    """
+    Classifies small-talk intents in one pass over the message's words.
+    Keywords are compiled once into a word-level phrase table, so matches
+    always fall on word boundaries ("hi" never matches "this").
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]] = None):
+        self.keywords = keywords or INTENT_KEYWORDS
+        self.priority = {intent: i for i, intent in enumerate(self.keywords)}
+
+        # Single-word keywords resolve with one dict lookup
+        self.single_words: Dict[str, str] = {}
+        # First word -> [(" phrase ", intent, words)], longest phrase first
+        self.phrases: Dict[str, List[Tuple[str, str, Tuple[str, ...]]]] = {}
+        for intent, words in self.keywords.items():
+            for keyword in words:
+                tokens = tuple(tokenize(keyword))
+                if len(tokens) == 1:
+                    self.single_words.setdefault(tokens[0], intent)
+                else:
+                    self.phrases.setdefault(tokens[0], []).append(
+                        (f" {' '.join(tokens)} ", intent, tokens)
+                    )
+        for candidates in self.phrases.values():
+            candidates.sort(key=lambda c: len(c[2]), reverse=True)
+
+        self._first_words = frozenset(self.single_words) | frozenset(self.phrases)
+        # Words that count towards confidence wherever they appear
+        self._covering_words = frozenset(self.single_words) | FILLER_WORDS
+
+    def classify(self, message: str) -> IntentMatch:
+        """Find every intent; confidence is the share of words they cover"""
+        words = tokenize(message)
+        # Most messages contain no keyword at all; reject them with one set op
+        hits = self._first_words.intersection(words)
+        if not hits:
+            return _NO_MATCH
+
+        found = set()
+        covered = sum(map(self._covering_words.__contains__, words))
+        joined = None
+        for word in hits:
+            for phrase, intent, tokens in self.phrases.get(word, ()):
+                if joined is None:
+                    joined = f" {' '.join(words)} "
+                if phrase in joined:
+                    found.add(intent)
+                    covered += sum(1 for t in tokens if t not in self._covering_words)
+                    break
+            if word in self.single_words:
+                found.add(self.single_words[word])
+
+        if not found:
+            return _NO_MATCH
+
+        intents = tuple(sorted(found, key=self.priority.__getitem__))
+        return IntentMatch(intents, min(1.0, covered / len(words)))
+
+
+# Compiled once at import
+intent_matcher = IntentMatcher()
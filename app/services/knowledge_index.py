@@ -0,0 +1,183 @@
+# File: app/services/knowledge_index.py
+from typing import Dict, List, NamedTuple
+from collections import Counter
+from pathlib import Path
+import numpy as np
+import unicodedata
+import json
+import sys
+import re
+
+_HEADING = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+# Punctuation -> space, as normalize_message does (Basic Multilingual Plane)
+_PUNCTUATION = {
+    cp: " "
+    for cp in range(min(sys.maxunicode, 0xFFFF) + 1)
+    if unicodedata.category(chr(cp)).startswith("P")
+}
+
+
+class KnowledgeEntry(NamedTuple):
+    question: str
+    answer: str
+    source: str
+
+
+class KnowledgeHit(NamedTuple):
+    entry: KnowledgeEntry
+    score: float
+    # How much of the entry's question the message asks (1.0 = all of it);
+    # 0 when the message has words the question does not
+    match: float
+
+
+def tokenize(text: str) -> List[str]:
+    """Same normalization as the response cache, split on whitespace"""
+    return text.lower().translate(_PUNCTUATION).split()
+
+
+def _markdown_sections(file: Path) -> List[KnowledgeEntry]:
+    """One entry per heading; text before the first heading is titled after the file"""
+    text = file.read_text(encoding="utf-8")
+    headings = list(_HEADING.finditer(text))
+    sections = []
+    preamble = text[: headings[0].start()] if headings else text
+    if preamble.strip():
+        sections.append(KnowledgeEntry(file.stem.replace("_", " "), preamble.strip(), file.name))
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        body = text[heading.end() : end].strip()
+        if body:
+            sections.append(KnowledgeEntry(heading.group(1), body, file.name))
+    return sections
+
+
+def load_corpus(path: str) -> List[KnowledgeEntry]:
+    """
+    Entries from a file or a directory of files: .json (a list of
+    {"question", "answer"} objects), .jsonl (one object per line), and
+    Markdown/.txt documents (one entry per heading).
+    """
+    root = Path(path)
+    if not root.exists():
+        raise FileNotFoundError(f"Knowledge base not found: {path}")
+    files = sorted(p for p in root.rglob("*") if p.is_file()) if root.is_dir() else [root]
+
+    entries = []
+    for file in files:
+        suffix = file.suffix.lower()
+        if suffix in (".md", ".markdown", ".txt"):
+            entries.extend(_markdown_sections(file))
+            continue
+        if suffix == ".json":
+            records = json.loads(file.read_text(encoding="utf-8"))
+        elif suffix == ".jsonl":
+            lines = file.read_text(encoding="utf-8").splitlines()
+            records = [json.loads(line) for line in lines if line.strip()]
+        else:
+            continue
+        entries.extend(
+            KnowledgeEntry(record["question"].strip(), record["answer"].strip(), file.name)
+            for record in records
+        )
+    return entries
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the entries' question and answer text. Postings are
+    stored per term as CSR arrays with each (term, entry) weight
+    precomputed, so a query is one bincount over its terms' postings plus
+    a top-k partition.
+    """
+
+    def __init__(self, entries: List[KnowledgeEntry], k1: float = 1.5, b: float = 0.75):
+        self.entries = entries
+        self.vocab: Dict[str, int] = {}
+        # Term IDs of each entry's question, for direct-answer matching
+        self.question_terms: List[frozenset] = []
+
+        term_ids, doc_ids, tfs, in_question = [], [], [], []
+        doc_lengths = np.zeros(len(entries), dtype=np.float32)
+        for doc, entry in enumerate(entries):
+            question_tokens = tokenize(entry.question)
+            counts = Counter(question_tokens)
+            counts.update(tokenize(entry.answer))
+            question_set = set(question_tokens)
+            for token, tf in counts.items():
+                term_ids.append(self.vocab.setdefault(token, len(self.vocab)))
+                doc_ids.append(doc)
+                tfs.append(tf)
+                in_question.append(token in question_set)
+            self.question_terms.append(frozenset(self.vocab[t] for t in question_set))
+            doc_lengths[doc] = sum(counts.values())
+
+        terms = np.array(term_ids, dtype=np.int32)
+        docs = np.array(doc_ids, dtype=np.int32)
+        tf = np.array(tfs, dtype=np.float32)
+        df = np.bincount(terms, minlength=len(self.vocab))
+
+        n = len(entries)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = float(doc_lengths.mean()) if n else 1.0
+        norm = k1 * (1 - b + b * doc_lengths / max(avgdl, 1.0))
+        weights = (idf[terms] * tf * (k1 + 1) / (tf + norm[docs])).astype(np.float32)
+
+        # Score of each entry for its own question: the bar for a direct answer
+        self.self_scores = np.bincount(
+            docs, weights=weights * np.array(in_question, dtype=np.float32), minlength=n
+        )
+
+        order = np.argsort(terms, kind="stable")
+        self.postings_docs = docs[order]
+        self.postings_weights = weights[order]
+        self.indptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=self.indptr[1:])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the NumPy arrays (the vocabulary and entries are not counted)"""
+        return sum(
+            a.nbytes
+            for a in (self.postings_docs, self.postings_weights, self.indptr, self.self_scores)
+        )
+
+    def search(
+        self, query: str, k: int, min_score: float = 0.0, min_relative: float = 0.0
+    ) -> List[KnowledgeHit]:
+        """Top-k entries by BM25 score, best first, skipping those under min_relative x the best"""
+        tokens = set(tokenize(query))
+        terms = {self.vocab[t] for t in tokens if t in self.vocab}
+        if not terms or not self.entries:
+            return []
+
+        spans = [(self.indptr[t], self.indptr[t + 1]) for t in terms]
+        if len(spans) == 1:
+            (start, end), = spans
+            docs, weights = self.postings_docs[start:end], self.postings_weights[start:end]
+        else:
+            docs = np.concatenate([self.postings_docs[s:e] for s, e in spans])
+            weights = np.concatenate([self.postings_weights[s:e] for s, e in spans])
+        scores = np.bincount(docs, weights=weights, minlength=len(self.entries))
+
+        k = min(k, len(self.entries))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(self.entries) else np.arange(k)
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        hits = []
+        # Unknown words mean the message asks something the question does not
+        known_only = len(terms) == len(tokens)
+        for doc in top.tolist():
+            score = float(scores[doc])
+            if score <= 0 or score < min_score:
+                break
+            if hits and score < min_relative * hits[0].score:
+                break
+            match = 0.0
+            if known_only and terms <= self.question_terms[doc] and self.self_scores[doc] > 0:
+                match = score / float(self.self_scores[doc])
+            hits.append(KnowledgeHit(self.entries[doc], score, match))
+        return hits
@@ -0,0 +1,109 @@
+# File: app/services/knowledge_service.py
+from app.config.settings import settings
+from app.services.service_registry import service_registry
+from app.services.metrics import stage_duration
+from typing import Any, Dict, List, NamedTuple, Optional
+import logging
+import time
+
+RETRIEVAL_TIME = stage_duration.labels("retrieval", "knowledge_base")
+
+
+class Retrieval(NamedTuple):
+    hits: List[Any]
+    # Set when the message asks one entry's question outright
+    direct: Optional[Any] = None
+
+
+NO_RETRIEVAL = Retrieval([])
+
+
+def build_knowledge_index():
+    """Load the corpus and build the BM25 index (lifespan or first use)"""
+    module = service_registry.import_module("knowledge_base", "app.services.knowledge_index")
+    entries = module.load_corpus(settings.KNOWLEDGE_BASE_PATH)
+    index = module.BM25Index(entries, settings.KNOWLEDGE_BM25_K1, settings.KNOWLEDGE_BM25_B)
+    logging.info(
+        "📚 Knowledge base: %s entries, %s terms, %.0f KiB of postings",
+        len(index),
+        len(index.vocab),
+        index.nbytes / 1024,
+    )
+    return index
+
+
+class KnowledgeService:
+    """
+    Grounds replies in a local FAQ/document corpus. The BM25 index is built
+    in lifespan (or on first use), each message retrieves its top-k entries
+    for the prompt, and a message that asks an entry's question outright is
+    answered with that entry without calling Gemini.
+    """
+
+    def __init__(self):
+        self.failed = False
+
+        # Counters
+        self.queries = 0
+        self.with_hits = 0
+        self.direct_answers = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.KNOWLEDGE_BASE_PATH) and not self.failed
+
+    def retrieve(self, message: str) -> Retrieval:
+        """Top-k entries for the message, and the entry to answer with directly if any"""
+        if not self.enabled:
+            return NO_RETRIEVAL
+        try:
+            index = service_registry.get("knowledge_base")
+        except Exception as e:
+            # Do not retry the build on every message
+            self.failed = True
+            logging.error("❌ Knowledge base unavailable, continuing without it: %s", e)
+            return NO_RETRIEVAL
+
+        started = time.perf_counter()
+        hits = index.search(
+            message,
+            settings.KNOWLEDGE_TOP_K,
+            settings.KNOWLEDGE_MIN_SCORE,
+            settings.KNOWLEDGE_MIN_RELATIVE_SCORE,
+        )
+        RETRIEVAL_TIME.observe_since(started)
+
+        self.queries += 1
+        if not hits:
+            return NO_RETRIEVAL
+        self.with_hits += 1
+        if settings.KNOWLEDGE_DIRECT_ANSWERS and hits[0].match >= settings.KNOWLEDGE_DIRECT_MIN_MATCH:
+            self.direct_answers += 1
+            return Retrieval(hits, hits[0])
+        return Retrieval(hits)
+
+    @staticmethod
+    def snippets(retrieval: Retrieval) -> List[str]:
+        """Retrieved entries as prompt snippets, best first"""
+        return [f"Q: {hit.entry.question}\nA: {hit.entry.answer}" for hit in retrieval.hits]
+
+    def get_stats(self) -> Dict:
+        stats = {
+            "enabled": self.enabled,
+            "built": service_registry.is_built("knowledge_base"),
+            "queries": self.queries,
+            "with_hits": self.with_hits,
+            "direct_answers": self.direct_answers,
+        }
+        if stats["built"]:
+            index = service_registry.get("knowledge_base")
+            stats.update(entries=len(index), terms=len(index.vocab), index_bytes=index.nbytes)
+        return stats
+
+
+# Global knowledge service instance
+knowledge_service = KnowledgeService()
+
+service_registry.register(
+    "knowledge_base", build_knowledge_index, eager=lambda: knowledge_service.enabled
+)
@@ -0,0 +1,164 @@
+# File: app/services/llm_executor.py
+from concurrent.futures import Future, ThreadPoolExecutor
+from app.config.settings import settings
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+import logging
+import asyncio
+import time
+
+T = TypeVar("T")
+
+
+class LLMCapacityError(Exception):
+    """Raised when no LLM slot frees up within the queue timeout"""
+
+
+class LLMExecutor:
+    """Dedicated, size-limited execution layer for LLM calls"""
+
+    def __init__(self, max_concurrency: int = None, queue_timeout: float = None):
+        self.max_concurrency = max_concurrency or settings.GEMINI_MAX_CONCURRENCY
+        self.queue_timeout = queue_timeout or settings.GEMINI_QUEUE_TIMEOUT_SECONDS
+        self.executor: Optional[ThreadPoolExecutor] = None
+        # One slot per worker thread, so the pool itself never queues work
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        # Counters
+        self.in_flight = 0
+        self.waiting = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.abandoned = 0
+        self.abandoned_running = 0
+        self.total_queue_wait_ms = 0.0
+        self.max_queue_wait_ms = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="llm"
+            )
+        return self.executor
+
+    async def _acquire_slot(self):
+        """Wait for a free slot, recording how long the call queued"""
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise LLMCapacityError(
+                f"No LLM slot free after {self.queue_timeout}s "
+                f"({self.in_flight}/{self.max_concurrency} busy)"
+            )
+        finally:
+            self.waiting -= 1
+
+        wait_ms = (time.monotonic() - started) * 1000
+        self.total_queue_wait_ms += wait_ms
+        self.max_queue_wait_ms = max(self.max_queue_wait_ms, wait_ms)
+        self.submitted += 1
+        self.in_flight += 1
+
+    def _release_slot(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    async def run_async(self, call: Callable[[], Awaitable[T]], timeout: float) -> T:
+        """Run a native coroutine; cancelling it on timeout frees the slot at once"""
+        await self._acquire_slot()
+        try:
+            result = await asyncio.wait_for(call(), timeout=timeout)
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._release_slot()
+
+    async def run_blocking(self, call: Callable[[], T], timeout: float) -> T:
+        """
+        Run a blocking call on the dedicated pool.
+        A thread cannot be interrupted, so on timeout the caller moves on and the
+        slot stays held until the thread actually finishes. The pool is bounded,
+        which keeps abandoned calls from exhausting the default executor.
+        """
+        await self._acquire_slot()
+        loop = asyncio.get_running_loop()
+        abandoned = False
+
+        def on_done(_: Future):
+            try:
+                loop.call_soon_threadsafe(finish)
+            except RuntimeError:
+                pass  # Loop already closed during shutdown
+
+        def finish():
+            if abandoned:
+                self.abandoned_running -= 1
+            self._release_slot()
+
+        try:
+            future = self._get_executor().submit(call)
+        except Exception:
+            self._release_slot()
+            raise
+        future.add_done_callback(on_done)
+
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), timeout=timeout
+            )
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            if not future.done():
+                abandoned = True
+                self.abandoned += 1
+                self.abandoned_running += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+
+    def get_stats(self) -> Dict:
+        """Saturation, queueing time and abandoned calls"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "saturation": round(self.in_flight / self.max_concurrency, 3),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "abandoned": self.abandoned,
+            "abandoned_running": self.abandoned_running,
+            "avg_queue_wait_ms": (
+                round(self.total_queue_wait_ms / self.submitted, 2)
+                if self.submitted
+                else 0.0
+            ),
+            "max_queue_wait_ms": round(self.max_queue_wait_ms, 2),
+        }
+
+    def shutdown(self):
+        """Stop the pool without waiting on abandoned threads"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            logging.info("🔌 LLM executor shut down")
+
+
+# Global LLM executor instance
+llm_executor = LLMExecutor()
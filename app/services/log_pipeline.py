@@ -0,0 +1,162 @@
+# File: app/services/log_pipeline.py
+from logging.handlers import QueueHandler, QueueListener
+from app.config.settings import settings
+from app.services.request_context import current_request_id, current_user_phone
+from typing import Dict, Optional, Tuple
+from datetime import datetime, timezone
+import functools
+import hashlib
+import logging
+import atexit
+import queue
+import json
+import time
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s %(user_id)s] %(message)s"
+
+
+@functools.lru_cache(maxsize=4096)
+def user_id(user_phone: str) -> str:
+    """Stable user correlation ID that keeps the phone number out of the logs"""
+    return hashlib.blake2b(user_phone.encode(), digest_size=6).hexdigest() if user_phone else "-"
+
+
+class ContextFilter(logging.Filter):
+    """Stamps records with the request and user IDs of the task that logged them"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id.get() or "-"
+        record.user_id = user_id(current_user_phone.get())
+        return True
+
+
+class UserSampler(logging.Filter):
+    """
+    Passes at most `limit` INFO-or-lower records per user per window, so one
+    chatty user cannot flood the log. Warnings and errors always pass, and
+    records logged outside a user's request are never sampled.
+    """
+
+    def __init__(self, limit: int, window_seconds: float):
+        super().__init__()
+        self.limit = limit
+        self.window_seconds = window_seconds
+        # user_id -> (window start, records passed in the window)
+        self.windows: Dict[str, Tuple[float, int]] = {}
+        self.dropped = 0
+        self._next_prune = 0.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.limit or record.levelno > logging.INFO or record.user_id == "-":
+            return True
+        now = time.monotonic()
+        started, passed = self.windows.get(record.user_id, (now, 0))
+        if now - started >= self.window_seconds:
+            started, passed = now, 0
+        if passed >= self.limit:
+            self.dropped += 1
+            return False
+        self.windows[record.user_id] = (started, passed + 1)
+
+        if now >= self._next_prune:
+            self._next_prune = now + self.window_seconds
+            cutoff = now - self.window_seconds
+            self.windows = {k: v for k, v in self.windows.items() if v[0] > cutoff}
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the correlation IDs as fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "user_id": getattr(record, "user_id", "-"),
+            "pid": record.process,
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread as they are: %-formatting, JSON
+    encoding and the write all happen there, off the event loop. Never
+    blocks; a full queue drops the record and counts it.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock handler formats here, on the caller's thread; defer it
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Root logging through a bounded queue drained by a background writer thread"""
+
+    def __init__(self):
+        self.handler: Optional[logging.Handler] = None
+        self.listener: Optional[QueueListener] = None
+        self.sampler: Optional[UserSampler] = None
+
+    def start(self):
+        """Replace the root handlers (idempotent)"""
+        if self.handler is not None:
+            return
+
+        output = logging.StreamHandler()
+        output.setFormatter(
+            JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+        )
+        self.sampler = UserSampler(
+            settings.LOG_SAMPLE_PER_USER, settings.LOG_SAMPLE_WINDOW_SECONDS
+        )
+
+        if settings.LOG_ASYNC:
+            self.handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+            self.listener = QueueListener(self.handler.queue, output)
+            self.listener.start()
+            # Write out what is still queued when the process exits
+            atexit.register(self.stop)
+        else:
+            self.handler = output
+
+        # Filters run on the logging thread before the record is queued
+        self.handler.addFilter(ContextFilter())
+        self.handler.addFilter(self.sampler)
+
+        root = logging.getLogger()
+        root.handlers = [self.handler]
+        root.setLevel(getattr(logging, settings.LOG_LEVEL))
+
+    def stop(self):
+        """Drain the queue and stop the writer thread"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def get_stats(self) -> Dict:
+        return {
+            "async": self.listener is not None,
+            "queued": self.handler.queue.qsize() if self.listener is not None else 0,
+            "dropped_queue_full": getattr(self.handler, "dropped", 0),
+            "sampled_out": self.sampler.dropped if self.sampler else 0,
+        }
+
+
+# Global log pipeline instance
+log_pipeline = LogPipeline()
@@ -0,0 +1,129 @@
+# File: app/services/message_coalescer.py
+from app.config.settings import settings
+from app.models.message import InboundMessage
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+import logging
+import asyncio
+import time
+
+BurstHandler = Callable[[InboundMessage], Awaitable[Dict]]
+
+
+class _Burst:
+    """Messages from one user waiting for the debounce window to close"""
+
+    def __init__(self, handler: BurstHandler):
+        self.handler = handler
+        self.messages: List[InboundMessage] = []
+        self.first_at = time.monotonic()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+def merge_messages(messages: List[InboundMessage]) -> InboundMessage:
+    """One message carrying the joined text, with the originals attached"""
+    if len(messages) == 1:
+        return messages[0]
+    last = messages[-1]
+    return last.model_copy(
+        update={
+            "body": "\n".join(m.body for m in messages),
+            "received_at": messages[0].received_at,
+            "bypass_cache": any(m.bypass_cache for m in messages),
+            "coalesced": messages,
+        }
+    )
+
+
+class MessageCoalescer:
+    """Merges a user's messages that arrive within a debounce window into one reply"""
+
+    def __init__(self, window_ms: int = None, max_wait_ms: int = None, max_messages: int = None):
+        self.window = (window_ms or settings.COALESCE_WINDOW_MS) / 1000
+        self.max_wait = (max_wait_ms or settings.COALESCE_MAX_WAIT_MS) / 1000
+        self.max_messages = max_messages or settings.COALESCE_MAX_MESSAGES
+        self._bursts: Dict[str, _Burst] = {}
+        # The loop only holds tasks weakly; a collected flush would never
+        # resolve its burst's future
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Counters
+        self.messages = 0
+        self.bursts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def submit(self, message: InboundMessage, handler: BurstHandler) -> asyncio.Future:
+        """Add a message to the user's burst; the future resolves with the burst's result"""
+        self.messages += 1
+        burst = self._bursts.get(message.user_phone)
+        if burst is None:
+            burst = self._bursts[message.user_phone] = _Burst(handler)
+
+        burst.messages.append(message)
+        if burst.timer is not None:
+            burst.timer.cancel()
+
+        # Restart the window on every message, but never past max_wait from the first
+        remaining = self.max_wait - (time.monotonic() - burst.first_at)
+        delay = min(self.window, remaining)
+        if delay <= 0 or len(burst.messages) >= self.max_messages:
+            burst.timer = None
+            self._close(message.user_phone)
+        else:
+            burst.timer = asyncio.get_running_loop().call_later(
+                delay, self._close, message.user_phone
+            )
+
+        return asyncio.shield(burst.future)
+
+    def _close(self, user_phone: str):
+        """End the user's window now (later messages start a new burst) and reply in a task"""
+        burst = self._bursts.pop(user_phone, None)
+        if burst is None:
+            return
+        if burst.timer is not None:
+            burst.timer.cancel()
+        self.bursts += 1
+        task = asyncio.get_running_loop().create_task(self._flush(user_phone, burst))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, user_phone: str, burst: _Burst):
+        if len(burst.messages) > 1:
+            logging.info("🧩 Merged %s messages from %s", len(burst.messages), user_phone)
+
+        try:
+            result = await burst.handler(merge_messages(burst.messages))
+            burst.future.set_result(result)
+        except Exception as e:
+            logging.error("❌ Coalesced reply failed for %s: %s", user_phone, e)
+            burst.future.set_exception(e)
+            # Nobody may be awaiting in acknowledge mode; mark it retrieved
+            burst.future.exception()
+
+    async def flush_all(self):
+        """Close every open window now and wait for running flushes (used on shutdown)"""
+        for user_phone in list(self._bursts):
+            self._close(user_phone)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict:
+        """Open bursts and LLM calls saved by merging"""
+        return {
+            "enabled": self.enabled,
+            "window_ms": int(self.window * 1000),
+            "max_wait_ms": int(self.max_wait * 1000),
+            "open_bursts": len(self._bursts),
+            "messages": self.messages,
+            "bursts": self.bursts,
+            "replies_saved": self.messages - self.bursts - sum(
+                len(b.messages) for b in self._bursts.values()
+            ),
+        }
+
+
+# Global message coalescer instance
+message_coalescer = MessageCoalescer()
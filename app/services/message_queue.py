@@ -0,0 +1,259 @@
+# File: app/services/message_queue.py
+from collections import deque
+from app.config.settings import settings
+from app.models.message import InboundMessage
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+import logging
+import asyncio
+import time
+import zlib
+
+MessageHandler = Callable[[InboundMessage], Awaitable[Dict]]
+
+# (enqueued_at, message, result future)
+_Job = Tuple[float, InboundMessage, asyncio.Future]
+
+
+class _Shard:
+    """
+    One shard of the keyed scheduler.
+    Each user has a FIFO of pending messages and is either running or waiting
+    in the ready queue, never both, so a user's messages run strictly in order.
+    Workers take users from the ready queue round-robin, so a user who floods
+    the shard only gets one turn per round.
+    """
+
+    def __init__(self, index: int, workers: int, maxsize: int):
+        self.index = index
+        self.worker_count = workers
+        self.maxsize = maxsize
+        self.users: Dict[str, Deque[_Job]] = {}
+        self.ready: asyncio.Queue = asyncio.Queue()
+        self.workers: List[asyncio.Task] = []
+        self.depth = 0
+        self.running = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+        # Counters
+        self.processed = 0
+        self.failed = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def put(self, job: _Job, user_phone: str):
+        pending = self.users.get(user_phone)
+        if pending is None:
+            pending = self.users[user_phone] = deque()
+            self.ready.put_nowait(user_phone)  # Not running, so schedule it
+        pending.append(job)
+        self.depth += 1
+        self.idle.clear()
+
+    async def work(self, handler: MessageHandler):
+        while True:
+            user_phone = await self.ready.get()
+            pending = self.users[user_phone]
+            enqueued_at, message, future = pending.popleft()
+            self.depth -= 1
+            self.running += 1
+
+            wait_ms = (time.monotonic() - enqueued_at) * 1000
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+            try:
+                result = await handler(message)
+                self.processed += 1
+                if not future.done():
+                    future.set_result(result)
+            except asyncio.CancelledError:
+                # Stopped mid-job: a synchronous webhook caller must not hang
+                future.cancel()
+                raise
+            except Exception as e:
+                self.failed += 1
+                logging.error("❌ Shard %s failed on %s: %s", self.index, user_phone, e)
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # Acknowledge mode has no one awaiting
+            finally:
+                self.running -= 1
+                # Back of the line if the user has more, so other users get a turn
+                if pending:
+                    self.ready.put_nowait(user_phone)
+                else:
+                    del self.users[user_phone]
+                if self.depth == 0 and self.running == 0:
+                    self.idle.set()
+
+    def cancel_pending(self) -> int:
+        """Cancel the futures of messages that never ran; returns how many"""
+        cancelled = 0
+        for pending in self.users.values():
+            for _, _, future in pending:
+                cancelled += future.cancel()
+            pending.clear()
+        self.users.clear()
+        self.depth = 0
+        return cancelled
+
+    def lag_ms(self) -> float:
+        """Age of the oldest message still waiting in this shard"""
+        now = time.monotonic()
+        heads = [pending[0][0] for pending in self.users.values() if pending]
+        return (now - min(heads)) * 1000 if heads else 0.0
+
+    def get_stats(self) -> Dict:
+        hottest = max(self.users.items(), key=lambda kv: len(kv[1]), default=None)
+        completed = self.processed + self.failed
+        return {
+            "shard": self.index,
+            "depth": self.depth,
+            "running": self.running,
+            "users": len(self.users),
+            "lag_ms": round(self.lag_ms(), 2),
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait_ms / completed, 2) if completed else 0.0,
+            "max_wait_ms": round(self.max_wait_ms, 2),
+            "hottest_user": (
+                {"user_phone": hottest[0], "pending": len(hottest[1])}
+                if hottest and hottest[1]
+                else None
+            ),
+        }
+
+
+class MessageQueueService:
+    """
+    Keyed scheduler for inbound messages.
+    user_phone hashes to a shard: messages are FIFO per user and run in
+    parallel across users, with round-robin fairness inside each shard.
+    """
+
+    def __init__(self, shards: int = None, workers: int = None, maxsize: int = None):
+        self.shard_count = shards or settings.WEBHOOK_SHARDS
+        self.workers_per_shard = workers or settings.WEBHOOK_WORKERS
+        self.maxsize = maxsize or settings.WEBHOOK_QUEUE_MAXSIZE
+        self.max_per_user = settings.WEBHOOK_MAX_PENDING_PER_USER
+        self.shards: List[_Shard] = []
+        self.handler: Optional[MessageHandler] = None
+        self.accepting = False
+
+        # Counters
+        self.enqueued = 0
+        self.rejected = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self.accepting and bool(self.shards)
+
+    def shard_for(self, user_phone: str) -> _Shard:
+        # Stable across processes, unlike hash()
+        return self.shards[zlib.crc32(user_phone.encode()) % self.shard_count]
+
+    async def start(self, handler: MessageHandler):
+        """Create the shards and spawn their worker tasks"""
+        self.handler = handler
+        per_shard_size = max(1, self.maxsize // self.shard_count)
+        self.shards = [
+            _Shard(i, self.workers_per_shard, per_shard_size)
+            for i in range(self.shard_count)
+        ]
+        for shard in self.shards:
+            shard.workers = [
+                asyncio.create_task(shard.work(handler), name=f"shard-{shard.index}-{w}")
+                for w in range(shard.worker_count)
+            ]
+        self.accepting = True
+        logging.info(
+            "📬 Message scheduler started with %s shards x %s workers (maxsize=%s)",
+            self.shard_count,
+            self.workers_per_shard,
+            self.maxsize,
+        )
+
+    def submit(self, message: InboundMessage) -> Optional[asyncio.Future]:
+        """Schedule a message; the future resolves with the handler result"""
+        if not self.is_running:
+            self.rejected += 1
+            return None
+
+        shard = self.shard_for(message.user_phone)
+        pending = shard.users.get(message.user_phone)
+        if shard.depth >= shard.maxsize or (
+            pending is not None and len(pending) >= self.max_per_user
+        ):
+            self.rejected += 1
+            logging.warning("⚠️ Shard %s full, rejecting %s", shard.index, message.user_phone)
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        shard.put((time.monotonic(), message, future), message.user_phone)
+        self.enqueued += 1
+        return future
+
+    def enqueue(self, message: InboundMessage) -> bool:
+        """Queue a message for processing, False if it was rejected"""
+        return self.submit(message) is not None
+
+    async def run(self, message: InboundMessage) -> Dict:
+        """Process a message in order with the user's other messages and wait for it"""
+        if not self.is_running:
+            return await self.handler(message) if self.handler else None
+
+        future = self.submit(message)
+        if future is None:
+            raise RuntimeError("Message queue is full")
+        return await future
+
+    async def stop(self, timeout: float = None):
+        """Stop accepting work, drain in-flight messages, then stop workers"""
+        if not self.shards:
+            return
+
+        self.accepting = False
+        timeout = timeout or settings.WEBHOOK_SHUTDOWN_TIMEOUT_SECONDS
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(shard.idle.wait() for shard in self.shards)),
+                timeout=timeout,
+            )
+            logging.info("📭 Message scheduler drained")
+        except asyncio.TimeoutError:
+            dropped = sum(shard.depth for shard in self.shards)
+            logging.warning("⚠️ Message scheduler drain timed out, dropping %s messages", dropped)
+
+        tasks = [task for shard in self.shards for task in shard.workers]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for shard in self.shards:
+            shard.cancel_pending()
+        self.shards = []
+
+    def get_stats(self) -> Dict:
+        """Overall and per-shard depth, lag and throughput"""
+        shard_stats = [shard.get_stats() for shard in self.shards]
+        processed = sum(s["processed"] for s in shard_stats)
+        failed = sum(s["failed"] for s in shard_stats)
+        return {
+            "running": self.is_running,
+            "shards": self.shard_count,
+            "workers_per_shard": self.workers_per_shard,
+            "depth": sum(s["depth"] for s in shard_stats),
+            "maxsize": self.maxsize,
+            "enqueued": self.enqueued,
+            "processed": processed,
+            "failed": failed,
+            "rejected": self.rejected,
+            "max_lag_ms": max((s["lag_ms"] for s in shard_stats), default=0.0),
+            "max_wait_ms": max((s["max_wait_ms"] for s in shard_stats), default=0.0),
+            "per_shard": shard_stats,
+        }
+
+
+# Global message queue instance
+message_queue = MessageQueueService()
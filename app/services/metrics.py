@@ -0,0 +1,194 @@
+# File: app/services/metrics.py
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+import logging
+import time
+
+# Seconds; covers cache hits (sub-ms) up to slow Gemini calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class CounterSeries:
+    """One labelled counter value"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class HistogramSeries:
+    """
+    One labelled histogram. Bucket counts live in a preallocated list, so
+    observing is a bisect and three additions: no lock (everything runs on
+    the event loop) and no per-sample allocation.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def observe_since(self, started: float):
+        """Observe the time elapsed since a time.perf_counter() reading"""
+        self.observe(time.perf_counter() - started)
+
+
+class MetricFamily:
+    """A named metric with one series per label combination"""
+
+    def __init__(self, name: str, help_text: str, kind: str, labelnames: Sequence[str], factory):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.factory = factory
+        self.series: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Series for these label values (bind once and reuse on hot paths)"""
+        series = self.series.get(values)
+        if series is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            series = self.series[values] = self.factory()
+        return series
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Counters, histograms and service stats rendered in Prometheus text format"""
+
+    def __init__(self, namespace: str = "whatsapp"):
+        self.namespace = namespace
+        self.families: Dict[str, MetricFamily] = {}
+        self.stats_sources: Dict[str, Callable[[], Dict]] = {}
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        if family.name in self.families:
+            raise ValueError(f"Metric {family.name} already registered")
+        self.families[family.name] = family
+        return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(
+            MetricFamily(f"{self.namespace}_{name}", help_text, "counter", labelnames, CounterSeries)
+        )
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> MetricFamily:
+        bounds = tuple(sorted(buckets))
+        return self._register(
+            MetricFamily(
+                f"{self.namespace}_{name}",
+                help_text,
+                "histogram",
+                labelnames,
+                lambda: HistogramSeries(bounds),
+            )
+        )
+
+    def register_stats(self, name: str, get_stats: Callable[[], Dict]):
+        """Export the numeric fields of a service's get_stats() as gauges"""
+        self.stats_sources[name] = get_stats
+
+    def collect_stats(self) -> Dict[str, Dict]:
+        """All registered get_stats() results, keyed by source name"""
+        return {name: get_stats() for name, get_stats in self.stats_sources.items()}
+
+    def render(self) -> str:
+        """Prometheus text exposition of every metric"""
+        lines: List[str] = []
+
+        for family in self.families.values():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for values, series in list(family.series.items()):
+                if family.kind == "counter":
+                    labels = _format_labels(family.labelnames, values)
+                    lines.append(f"{family.name}{labels} {_format_value(series.value)}")
+                    continue
+
+                cumulative = 0
+                for bound, count in zip(series.bounds + (float("inf"),), series.counts):
+                    cumulative += count
+                    labels = _format_labels(
+                        family.labelnames, values, f'le="{_format_value(bound)}"'
+                    )
+                    lines.append(f"{family.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(family.labelnames, values)
+                lines.append(f"{family.name}_sum{labels} {_format_value(series.sum)}")
+                lines.append(f"{family.name}_count{labels} {series.count}")
+
+        for source, get_stats in self.stats_sources.items():
+            try:
+                stats = get_stats()
+            except Exception as e:
+                logging.error("❌ Metrics source %s failed: %s", source, e)
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue  # Nested breakdowns and labels stay on /stats
+                name = f"{self.namespace}_{source}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
+
+# Webhook pipeline instrumentation
+stage_duration = metrics.histogram(
+    "stage_duration_seconds",
+    "Latency of each webhook pipeline stage",
+    ("stage", "provider"),
+)
+stage_errors = metrics.counter(
+    "stage_errors_total",
+    "Failed webhook pipeline stages",
+    ("stage",),
+)
+replies = metrics.counter(
+    "replies_total",
+    "Replies generated, by the provider that answered",
+    ("provider",),
+)
@@ -0,0 +1,208 @@
+# File: app/services/mongo_store.py
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.config.settings import settings
+from app.services.conversation_store import ConversationStore
+from app.services.index_manager import index_manager, HISTORY_PROJECTION
+from bson import ObjectId
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import logging
+
+# Serve a user's export and retention pages: user_phone match in _id order
+index_manager.register(
+    "conversations",
+    [IndexModel([("user_phone", ASCENDING), ("_id", ASCENDING)], name="user_phone_id")],
+)
+
+# Serve the dispatcher's due-message scan and the per-user head lookup
+index_manager.register(
+    "outbox",
+    [
+        IndexModel([("next_attempt_at", ASCENDING), ("lease_until", ASCENDING)], name="due"),
+        IndexModel([("user_phone", ASCENDING), ("created_at", ASCENDING)], name="user_head"),
+    ],
+)
+
+
+class MongoConversationStore(ConversationStore):
+    """Conversations and service collections in MongoDB"""
+
+    backend = "mongodb"
+
+    def __init__(self, db=None):
+        self.client: AsyncIOMotorClient = None
+        # An already-open database (e.g. a test double) skips connecting
+        self.db = db
+
+    async def connect(self):
+        if self.db is not None:
+            return
+
+        self.client = AsyncIOMotorClient(settings.MONGODB_URL)
+        self.db = self.client[settings.DATABASE_NAME]
+
+        # Test connection
+        await self.client.admin.command("ping")
+        logging.info("✅ Connected to MongoDB successfully!")
+
+        await index_manager.ensure_indexes(self.db)
+        if settings.MONGODB_VERIFY_QUERY_PLANS:
+            await index_manager.verify_history_plan(self.db)
+
+    async def close(self):
+        if self.client:
+            self.client.close()
+            logging.info("🔌 Database connection closed")
+
+    @property
+    def conversations(self):
+        return self.db.conversations
+
+    def collection(self, name: str):
+        return self.db[name]
+
+    def parse_id(self, value: str) -> ObjectId:
+        if not ObjectId.is_valid(value):
+            raise ValueError(f"Not an ObjectId: {value!r}")
+        return ObjectId(value)
+
+    async def recent_history(self, user_phone: str, limit: int) -> List[Dict]:
+        cursor = (
+            self.db.conversations.find({"user_phone": user_phone}, HISTORY_PROJECTION)
+            .sort("timestamp", -1)
+            .limit(limit)
+        )
+        return await cursor.to_list(length=limit)
+
+    async def scan_conversations(
+        self,
+        after_id=None,
+        limit: int = 500,
+        before: Optional[datetime] = None,
+        since: Optional[datetime] = None,
+        user_phone: Optional[str] = None,
+    ) -> List[Dict]:
+        query = {}
+        if after_id is not None:
+            query["_id"] = {"$gt": self.parse_id(after_id) if isinstance(after_id, str) else after_id}
+        if before is not None or since is not None:
+            query["timestamp"] = {}
+            if before is not None:
+                query["timestamp"]["$lt"] = before
+            if since is not None:
+                query["timestamp"]["$gte"] = since
+        if user_phone is not None:
+            query["user_phone"] = user_phone
+        cursor = self.db.conversations.find(query).sort("_id", 1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def delete_conversations_page(
+        self,
+        limit: int,
+        before: Optional[datetime] = None,
+        user_phone: Optional[str] = None,
+    ) -> int:
+        query = {}
+        if before is not None:
+            query["timestamp"] = {"$lt": before}
+        if user_phone is not None:
+            query["user_phone"] = user_phone
+        page = await (
+            self.db.conversations.find(query, {"_id": 1}).sort("_id", 1).limit(limit)
+        ).to_list(length=limit)
+        if not page:
+            return 0
+        query["_id"] = {"$gte": page[0]["_id"], "$lte": page[-1]["_id"]}
+        result = await self.db.conversations.delete_many(query)
+        return result.deleted_count
+
+    async def delete_documents_page(self, collection: str, limit: int) -> int:
+        page = await self.db[collection].find({}, {"_id": 1}).limit(limit).to_list(length=limit)
+        if not page:
+            return 0
+        result = await self.db[collection].delete_many({"_id": {"$in": [d["_id"] for d in page]}})
+        return result.deleted_count
+
+    async def users_over_cap(self, cap: int) -> List[Tuple[str, int]]:
+        cursor = self.db.conversations.aggregate(
+            [
+                {"$group": {"_id": "$user_phone", "turns": {"$sum": 1}}},
+                {"$match": {"turns": {"$gt": cap}}},
+            ],
+            allowDiskUse=True,
+        )
+        return [(doc["_id"], doc["turns"]) async for doc in cursor]
+
+    async def clear_conversations(self) -> int:
+        result = await self.db.conversations.delete_many({})
+        return result.deleted_count
+
+    async def outbox_add(self, message: Dict) -> bool:
+        try:
+            await self.db.outbox.insert_one(message)
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def outbox_claim(self, now: datetime, lease_until: datetime, limit: int) -> List[Dict]:
+        # Each user's oldest message, kept only if it is due: one round trip
+        # for the heads, then one atomic lease per head (at most limit)
+        heads = await self.db.outbox.aggregate(
+            [
+                {"$sort": {"user_phone": 1, "created_at": 1, "_id": 1}},
+                {"$group": {"_id": "$user_phone", "head": {"$first": "$$ROOT"}}},
+                {
+                    "$match": {
+                        "head.next_attempt_at": {"$lte": now},
+                        "head.lease_until": {"$lte": now},
+                    }
+                },
+                {"$limit": limit},
+            ]
+        ).to_list(length=limit)
+        claimed = []
+        for head in heads:
+            message = await self._lease(head["head"]["_id"], now, lease_until)
+            if message is not None:
+                claimed.append(message)
+        return claimed
+
+    async def _lease(self, message_id: str, now: datetime, lease_until: datetime) -> Optional[Dict]:
+        """Atomic lease: fails if the message is not due, is leased, or was just sent"""
+        return await self.db.outbox.find_one_and_update(
+            {"_id": message_id, "next_attempt_at": {"$lte": now}, "lease_until": {"$lte": now}},
+            {"$set": {"lease_until": lease_until}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def outbox_claim_next(
+        self, user_phone: str, now: datetime, lease_until: datetime
+    ) -> Optional[Dict]:
+        head = await self.db.outbox.find_one(
+            {"user_phone": user_phone},
+            {"_id": 1},
+            sort=[("created_at", ASCENDING), ("_id", ASCENDING)],
+        )
+        if head is None:
+            return None
+        return await self._lease(head["_id"], now, lease_until)
+
+    async def outbox_reschedule(
+        self, message_id: str, next_attempt_at: datetime, attempts: int, error: Optional[str]
+    ):
+        await self.db.outbox.update_one(
+            {"_id": message_id},
+            {
+                "$set": {
+                    "next_attempt_at": next_attempt_at,
+                    "lease_until": datetime.min,
+                    "attempts": attempts,
+                    "last_error": error,
+                }
+            },
+        )
+
+    async def outbox_remove(self, message_id: str):
+        await self.db.outbox.delete_one({"_id": message_id})
@@ -0,0 +1,257 @@
+# File: app/services/outbox_service.py
+from app.config.settings import settings
+from app.services.whatsapp_service import whatsapp_service
+from app.services.metrics import stage_duration, stage_errors
+from pymongo.errors import DuplicateKeyError
+from typing import Dict, List, Optional, Set
+from datetime import datetime, timedelta
+import logging
+import asyncio
+import random
+import uuid
+
+# Time from a reply being queued to Twilio accepting it (includes retries)
+DELIVERY_TIME = stage_duration.labels("outbox_delivery", "twilio")
+DEAD_LETTERS = stage_errors.labels("outbox_dead_letter")
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the attempt after `attempts` failures"""
+    delay = settings.OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1)
+    return min(delay, settings.OUTBOX_BACKOFF_MAX_SECONDS) * random.uniform(0.8, 1.2)
+
+
+class OutboxService:
+    """
+    Durable outbound replies. A reply is stored in the outbox before anything
+    is sent, then a dispatcher sends it in the background, retrying failures
+    with exponential backoff and moving messages that keep failing (or that
+    Twilio rejects outright) to outbox_dead_letters. Each send holds a lease,
+    so messages left by a crashed worker are picked up once it expires.
+    Replies to one user go out in order: only a user's oldest pending reply
+    is ever leased, and the next is sent once it is delivered or dead-lettered.
+    Delivery is at-least-once: a crash between Twilio accepting a message
+    and its removal from the outbox sends it again.
+    """
+
+    def __init__(self):
+        self.store = None
+        self.dead_letters = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        # _id -> message, for messages this process is sending
+        self.inflight: Dict[str, Dict] = {}
+        # Users with a reply in inflight (at most one each)
+        self.busy_users: Set[str] = set()
+        self.tasks: Set[asyncio.Task] = set()
+        self._poller: Optional[asyncio.Task] = None
+
+        # Counters
+        self.queued = 0
+        self.sent = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.recovered = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.OUTBOX_ENABLED and self.store is not None
+
+    def start(self, store, dead_letters):
+        """Start dispatching; anything left in the outbox is claimed as its lease expires"""
+        self.store = store
+        self.dead_letters = dead_letters
+        self.semaphore = asyncio.Semaphore(settings.OUTBOX_CONCURRENCY)
+        self._poller = asyncio.create_task(self._poll_loop(), name="outbox-dispatcher")
+
+    async def enqueue(self, to: str, body: str, user_phone: str, message_sids: List[str]) -> bool:
+        """
+        Store a reply and start sending it unless an earlier reply to the user
+        is still pending. Returns False if it could not be stored (the caller
+        should send directly). The _id comes from the inbound MessageSids, so
+        reprocessing a message never queues a second reply.
+        """
+        now = datetime.utcnow()
+        message = {
+            "_id": f"reply:{message_sids[0]}" if message_sids else uuid.uuid4().hex,
+            "to": to,
+            "body": body,
+            "user_phone": user_phone,
+            "attempts": 0,
+            "created_at": now,
+            "next_attempt_at": now,
+            "lease_until": datetime.min,
+            "last_error": None,
+        }
+        try:
+            if not await self.store.outbox_add(message):
+                logging.info("🔁 Reply %s is already in the outbox", message["_id"])
+                return True
+        except Exception as e:
+            logging.error("❌ Outbox write failed: %s", e)
+            return False
+
+        self.queued += 1
+        await self._claim_next(user_phone)
+        return True
+
+    def _dispatch(self, message: Dict):
+        if message["_id"] in self.inflight:
+            return
+        self.inflight[message["_id"]] = message
+        self.busy_users.add(message["user_phone"])
+        task = asyncio.create_task(self._send(message))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _claim_next(self, user_phone: str):
+        """Send the user's oldest pending reply if it is due and no one holds it"""
+        if user_phone in self.busy_users:
+            return  # Sent once the reply in flight is done
+        now = datetime.utcnow()
+        try:
+            message = await self.store.outbox_claim_next(
+                user_phone, now, now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+            )
+        except Exception as e:
+            # The poller claims it instead
+            logging.error("❌ Outbox claim failed for %s: %s", user_phone, e)
+            return
+        if message is not None:
+            self._dispatch(message)
+
+    async def _send(self, message: Dict):
+        message_id = message["_id"]
+        done = False
+        try:
+            async with self.semaphore:
+                # Past its lease after waiting: another worker may own it now
+                if datetime.utcnow() < message["lease_until"]:
+                    done = await self._deliver(message)
+        except Exception as e:
+            # Store unavailable: the lease expires and the message is retried
+            logging.error("❌ Outbox bookkeeping failed for %s: %s", message_id, e)
+        finally:
+            self.inflight.pop(message_id, None)
+            self.busy_users.discard(message["user_phone"])
+        if done:
+            # The user's next reply, if any, is now at the head of their queue
+            await self._claim_next(message["user_phone"])
+
+    async def _deliver(self, message: Dict) -> bool:
+        """Send one message; True once it has left the outbox (sent or dead-lettered)"""
+        try:
+            await whatsapp_service.deliver(message["to"], message["body"])
+        except Exception as e:
+            return await self._failed(message, e)
+        await self.store.outbox_remove(message["_id"])
+        self.sent += 1
+        DELIVERY_TIME.observe((datetime.utcnow() - message["created_at"]).total_seconds())
+        return True
+
+    async def _failed(self, message: Dict, error: Exception) -> bool:
+        attempts = message["attempts"] + 1
+        permanent = whatsapp_service.is_permanent_error(error)
+        if permanent or attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            try:
+                await self.dead_letters.insert_one(
+                    {
+                        **message,
+                        "attempts": attempts,
+                        "last_error": str(error),
+                        "dead_lettered_at": datetime.utcnow(),
+                    }
+                )
+            except DuplicateKeyError:
+                pass  # Dead-lettered before a crash left it in the outbox
+            await self.store.outbox_remove(message["_id"])
+            self.dead_lettered += 1
+            DEAD_LETTERS.inc()
+            logging.error(
+                "☠️ Reply %s to %s dead-lettered after %s attempt(s): %s",
+                message["_id"],
+                message["user_phone"],
+                attempts,
+                error,
+            )
+            return True
+
+        delay = backoff_delay(attempts)
+        await self.store.outbox_reschedule(
+            message["_id"], datetime.utcnow() + timedelta(seconds=delay), attempts, str(error)
+        )
+        self.retried += 1
+        logging.warning(
+            "⏳ Reply %s failed (attempt %s), retrying in %.1fs: %s",
+            message["_id"],
+            attempts,
+            delay,
+            error,
+        )
+        return False
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
+            try:
+                await self.claim_due()
+            except Exception as e:
+                logging.error("❌ Outbox poll error: %s", e)
+
+    async def claim_due(self) -> int:
+        """Lease due messages (retries, held-back replies, and ones a crashed worker left) and send them"""
+        free = settings.OUTBOX_CONCURRENCY - len(self.inflight)
+        if free <= 0:
+            return 0
+        now = datetime.utcnow()
+        messages = await self.store.outbox_claim(
+            now,
+            now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+            min(free, settings.OUTBOX_BATCH_SIZE),
+        )
+        orphaned_before = now - timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        for message in messages:
+            if message["attempts"] == 0 and message["created_at"] < orphaned_before:
+                self.recovered += 1  # Never attempted: queued by a process that went away
+            self._dispatch(message)
+        return len(messages)
+
+    async def stop(self, timeout: float = None):
+        """Stop polling and give in-flight sends time to finish"""
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+        if not self.tasks:
+            return
+        timeout = timeout or settings.WEBHOOK_SHUTDOWN_TIMEOUT_SECONDS
+        _, pending = await asyncio.wait(set(self.tasks), timeout=timeout)
+        unsent = list(self.inflight.values())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        # Make unsent replies due now for the next process instead of after the lease
+        for message in unsent:
+            try:
+                await self.store.outbox_reschedule(
+                    message["_id"], datetime.utcnow(), message["attempts"], message["last_error"]
+                )
+            except Exception as e:
+                logging.error("❌ Could not release %s: %s", message["_id"], e)
+        if unsent:
+            logging.warning("⚠️ %s replies left in the outbox for the next start", len(unsent))
+
+    def get_stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "inflight": len(self.inflight),
+            "queued": self.queued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "recovered": self.recovered,
+        }
+
+
+# Global outbox service instance
+outbox_service = OutboxService()
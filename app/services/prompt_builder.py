@@ -0,0 +1,142 @@
+# File: app/services/prompt_builder.py
+from app.config.settings import settings
+from typing import Dict, List, Optional
+
+SYSTEM_PROMPTS = {
+    "first_interaction": """You are a helpful, intelligent AI assistant. This is your first interaction with the user.
+
+CRITICAL RULES:
+- The user's name appears to be {user_name}, so you can greet them personally this ONE time
+- If they say Islamic greeting (Salam, AOA, Assalam), respond with "Walaikum Assalam {user_name}!"
+- If they say other greetings, respond naturally with their name once
+- Be warm, friendly, and professional
+- Ask how you can help them today
+- Keep response under 100 words
+- NEVER mention WhatsApp, messaging apps, or customer support unless specifically asked
+- After this greeting, NEVER use their name again unless they specifically ask""",
+    "continuing": """You are an intelligent AI assistant continuing a conversation.
+
+CRITICAL RULES:
+- Be helpful, smart, and conversational like ChatGPT
+- NEVER use the user's name (you already greeted them before)
+- Answer any question on any topic - technology, education, life, science, etc.
+- Be concise but informative (under 150 words)
+- Handle multiple languages: English, Urdu, Roman Urdu, Hindi
+- If you don't know something, say so honestly
+- Be natural and engaging
+- NEVER mention WhatsApp, messaging apps, or customer support unless specifically asked""",
+    "fresh": """You are an intelligent AI assistant like ChatGPT.
+
+CRITICAL RULES:
+- Be helpful, smart, and conversational
+- Answer any question on any topic
+- Handle multiple languages: English, Urdu, Roman Urdu, Hindi
+- Be concise but informative (under 150 words)
+- Be natural, friendly, and engaging
+- If you don't know something, admit it honestly
+- NEVER mention WhatsApp, messaging apps, or customer support unless specifically asked""",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep_end: bool = False) -> str:
+    """Cut text to roughly max_tokens, keeping the start (or the end)"""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return "…" + text[-max_chars:] if keep_end else text[:max_chars] + "…"
+
+
+class PromptBuilder:
+    """Builds token-budgeted prompts from a rolling summary and the last K turns"""
+
+    def __init__(
+        self,
+        max_tokens: int = None,
+        recent_turns: int = None,
+        summary_tokens: int = None,
+        knowledge_tokens: int = None,
+    ):
+        self.max_tokens = max_tokens or settings.PROMPT_MAX_TOKENS
+        self.recent_turns = recent_turns or settings.PROMPT_RECENT_TURNS
+        self.summary_tokens = summary_tokens or settings.PROMPT_SUMMARY_MAX_TOKENS
+        self.knowledge_tokens = knowledge_tokens or settings.KNOWLEDGE_PROMPT_MAX_TOKENS
+
+    def build(
+        self,
+        variant: str,
+        user_message: str,
+        conversation_history: Optional[List[Dict]] = None,
+        summary: Optional[str] = None,
+        user_name: str = None,
+        knowledge: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Assemble the prompt. conversation_history is newest-first, as returned
+        by get_conversation_history; knowledge is retrieved snippets, best
+        first. The system prompt and current message are always kept; the
+        snippets, the summary and then the newest turns fill what is left.
+        """
+        system_prompt = SYSTEM_PROMPTS[variant]
+        if variant == "first_interaction":
+            system_prompt = system_prompt.format(user_name=user_name)
+
+        budget = self.max_tokens - estimate_tokens(system_prompt)
+        current = truncate_to_tokens(user_message, max(budget // 2, 1))
+        budget -= estimate_tokens(current)
+
+        knowledge_block = ""
+        if knowledge:
+            knowledge_budget = min(self.knowledge_tokens, max(budget, 0))
+            lines = []
+            for snippet in knowledge:
+                if knowledge_budget < 16:
+                    break
+                line = truncate_to_tokens(snippet, knowledge_budget) + "\n"
+                lines.append(line)
+                knowledge_budget -= estimate_tokens(line)
+            if lines:
+                knowledge_block = (
+                    "Relevant knowledge base entries (prefer them when they answer the message):\n"
+                    + "".join(lines)
+                    + "\n"
+                )
+                budget -= estimate_tokens(knowledge_block)
+
+        summary_block = ""
+        if summary:
+            summary_text = truncate_to_tokens(
+                summary, min(self.summary_tokens, max(budget, 0)), keep_end=True
+            )
+            summary_block = f"Summary of earlier conversation:\n{summary_text}\n\n"
+            budget -= estimate_tokens(summary_block)
+
+        # Newest turns first until the budget runs out, then restore order
+        turn_lines = []
+        for conv in (conversation_history or [])[: self.recent_turns]:
+            line = f"User: {conv.get('user_message', '')}\n"
+            if conv.get("ai_response"):
+                line += f"You: {conv['ai_response']}\n"
+            cost = estimate_tokens(line)
+            if cost > budget:
+                break
+            turn_lines.append(line)
+            budget -= cost
+        turn_lines.reverse()
+
+        parts = [system_prompt, "\n\n", knowledge_block, summary_block]
+        if turn_lines:
+            parts.append("Recent conversation context:\n")
+            parts.extend(turn_lines)
+            parts.append("\n")
+        parts.append(f"Current user message: {current}\n")
+        parts.append("Your response:")
+        return "".join(parts)
+
+
+# Global prompt builder instance
+prompt_builder = PromptBuilder()
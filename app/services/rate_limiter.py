@@ -0,0 +1,202 @@
+# File: app/services/rate_limiter.py
+from collections import deque
+from app.config.settings import settings, worker_count
+from typing import Deque, Dict, Optional, Tuple
+import logging
+import asyncio
+import time
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a token was not granted within the caller's deadline"""
+
+
+class FairRateLimiter:
+    """
+    Client-side token bucket for an outbound API.
+    When callers have to wait, tokens are handed out round-robin across keys
+    (user phones), so one busy number gets its share and no more. Each key
+    also has its own bucket of key_share x burst tokens, refilled at the
+    full rate: one number alone can use the whole rate, but never drains
+    the burst other numbers arriving later rely on.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate_per_second: float,
+        burst: int,
+        max_wait_seconds: float,
+        key_share: float = 0.5,
+    ):
+        self.name = name
+        self.rate = rate_per_second
+        self.burst = burst
+        self.max_wait = max_wait_seconds
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.key_burst = max(1, int(burst * key_share))
+        # key -> (tokens, updated_at); keys back at key_burst are pruned
+        self.key_tokens: Dict[str, Tuple[float, float]] = {}
+
+        # key -> waiting futures (FIFO); ready holds keys with waiters, round-robin
+        self.waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self.ready: Deque[str] = deque()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        # Counters
+        self.granted = 0
+        self.waited = 0
+        self.rejected = 0
+        self.backoffs = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def _key_wait(self, key: str) -> float:
+        """Seconds until key has a token of its own (keyless callers never wait)"""
+        if not key or key not in self.key_tokens:
+            return 0.0
+        tokens, updated_at = self.key_tokens[key]
+        tokens += (time.monotonic() - updated_at) * self.rate
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def _take(self, key: str):
+        self.tokens -= 1
+        self.granted += 1
+        if not key:
+            return
+        now = time.monotonic()
+        tokens, updated_at = self.key_tokens.get(key, (self.key_burst, now))
+        tokens = min(self.key_burst, tokens + (now - updated_at) * self.rate)
+        self.key_tokens[key] = (tokens - 1, now)
+        if len(self.key_tokens) > 4096:
+            full_after = self.key_burst / self.rate
+            self.key_tokens = {
+                k: v for k, v in self.key_tokens.items() if now - v[1] < full_after
+            }
+
+    def try_acquire(self, key: str = "") -> bool:
+        """Take a token only if one is free, the key has its share, and nobody is queued ahead"""
+        self._refill()
+        if self.waiters or self.tokens < 1 or time.monotonic() < self.paused_until:
+            return False
+        if self._key_wait(key) > 0:
+            return False
+        self._take(key)
+        return True
+
+    async def acquire(self, key: str = "", timeout: float = None):
+        """Wait for a token, raising RateLimitExceeded after the deadline"""
+        if self.try_acquire(key):
+            return
+
+        timeout = self.max_wait if timeout is None else timeout
+        future = asyncio.get_running_loop().create_future()
+        queue = self.waiters.get(key)
+        if queue is None:
+            queue = self.waiters[key] = deque()
+            self.ready.append(key)
+        queue.append(future)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch(), name=f"{self.name}-limiter")
+
+        started = time.monotonic()
+        self.waited += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                return  # Granted right at the deadline
+            future.cancel()
+            self.rejected += 1
+            raise RateLimitExceeded(f"{self.name}: no token within {timeout}s")
+        finally:
+            wait_ms = (time.monotonic() - started) * 1000
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    async def _dispatch(self):
+        """Grant tokens to waiting keys in round-robin order as they refill"""
+        while self.ready:
+            self._refill()
+            pause = self.paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+
+            # Next key in round-robin order that has a token of its own
+            waits = []
+            for _ in range(len(self.ready)):
+                waits.append(self._key_wait(self.ready[0]))
+                if waits[-1] <= 0:
+                    break
+                self.ready.rotate(-1)
+            else:
+                await asyncio.sleep(min(waits))
+                continue
+
+            key = self.ready.popleft()
+            queue = self.waiters[key]
+            while queue and queue[0].done():
+                queue.popleft()  # Timed out while waiting
+            if queue:
+                queue.popleft().set_result(None)
+                self._take(key)
+            # Skip timed-out waiters so the key does not come back for nothing
+            while queue and queue[0].done():
+                queue.popleft()
+            if queue:
+                self.ready.append(key)
+            else:
+                del self.waiters[key]
+
+    def backoff(self, seconds: float):
+        """Stop granting tokens for a while after the API answered 429"""
+        self.backoffs += 1
+        self.tokens = 0.0
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        logging.warning("⏳ %s rate limited by the API, pausing %ss", self.name, seconds)
+
+    def get_stats(self) -> Dict:
+        """Grants, waits and rejections"""
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "key_burst": self.key_burst,
+            "tokens": round(self.tokens, 2),
+            "waiting": sum(len(q) for q in self.waiters.values()),
+            "waiting_users": len(self.waiters),
+            "granted": self.granted,
+            "waited": self.waited,
+            "rejected": self.rejected,
+            "backoffs": self.backoffs,
+            "avg_wait_ms": round(self.total_wait_ms / self.waited, 2) if self.waited else 0.0,
+            "max_wait_ms": round(self.max_wait_ms, 2),
+        }
+
+
+# Quotas are per account, so each worker process gets an equal share
+_workers = worker_count()
+
+# Global limiters for the outbound APIs
+gemini_limiter = FairRateLimiter(
+    "gemini",
+    rate_per_second=settings.GEMINI_RATE_LIMIT_RPM / 60 / _workers,
+    burst=max(1, settings.GEMINI_RATE_LIMIT_BURST // _workers),
+    max_wait_seconds=settings.GEMINI_RATE_LIMIT_MAX_WAIT_SECONDS,
+)
+twilio_limiter = FairRateLimiter(
+    "twilio",
+    rate_per_second=settings.TWILIO_RATE_LIMIT_PER_SECOND / _workers,
+    burst=max(1, settings.TWILIO_RATE_LIMIT_BURST // _workers),
+    max_wait_seconds=settings.TWILIO_RATE_LIMIT_MAX_WAIT_SECONDS,
+)
@@ -0,0 +1,8 @@
+# File: app/services/request_context.py
+from contextvars import ContextVar
+
+# User the current task is working for (set per message by the reply pipeline)
+current_user_phone: ContextVar[str] = ContextVar("current_user_phone", default="")
+
+# Correlation ID for log records: the inbound MessageSid (or a generated ID)
+current_request_id: ContextVar[str] = ContextVar("current_request_id", default="")
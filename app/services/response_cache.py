@@ -0,0 +1,71 @@
+# File: app/services/response_cache.py
+from app.config.settings import settings
+from app.services.cache import LRUCache
+from typing import Dict, Optional
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = "".join(
+        " " if unicodedata.category(ch).startswith("P") else ch
+        for ch in message.lower()
+    )
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class ResponseCache:
+    """
+    Caches LLM replies for repeated prompts, keyed on message and prompt
+    variant. Only context-free prompts are cached: a reply written with a
+    user's history or summary may depend on (and repeat) that user's details.
+    """
+
+    def __init__(self):
+        self.cache = LRUCache(
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+        )
+        self.saved_ms = 0
+        self.bypassed = 0
+        self.skipped_context = 0
+
+    def make_key(
+        self,
+        user_message: str,
+        variant: str,
+        user_name: str = None,
+        has_context: bool = False,
+    ) -> Optional[tuple]:
+        """Cache key, or None if the message should not be cached"""
+        if has_context or variant == "continuing":
+            self.skipped_context += 1
+            return None
+        if len(user_message) > settings.RESPONSE_CACHE_MAX_MESSAGE_CHARS:
+            return None
+        normalized = normalize_message(user_message)
+        if not normalized:
+            return None
+        # Personalized greetings embed the name, so it has to be part of the key
+        return (variant, normalized, user_name if variant == "first_interaction" else None)
+
+    def get(self, key: tuple) -> Optional[Dict]:
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.saved_ms += entry["response_time_ms"]
+        return entry
+
+    def set(self, key: tuple, response: str, response_time_ms: int):
+        self.cache.set(key, {"response": response, "response_time_ms": response_time_ms})
+
+    def get_stats(self) -> Dict:
+        """Hit rate and LLM latency saved"""
+        stats = self.cache.get_stats()
+        stats["bypassed"] = self.bypassed
+        stats["skipped_context"] = self.skipped_context
+        stats["latency_saved_ms"] = self.saved_ms
+        return stats
@@ -0,0 +1,224 @@
+# File: app/services/retention_service.py
+from collections import OrderedDict
+from pymongo import IndexModel
+from app.config.settings import settings
+from app.services.index_manager import index_manager
+from typing import Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+import logging
+import asyncio
+import uuid
+
+# TTL mode: let MongoDB expire old turns itself instead of the purge job
+if settings.RETENTION_USE_TTL_INDEX and settings.RETENTION_MAX_AGE_DAYS:
+    index_manager.register(
+        "conversations",
+        [
+            IndexModel(
+                "timestamp",
+                name="timestamp_ttl",
+                expireAfterSeconds=int(settings.RETENTION_MAX_AGE_DAYS * 86400),
+            )
+        ],
+    )
+
+PURGE_ALL = "purge_all"
+RETENTION = "retention"
+
+# Derived from conversations, so a full purge empties them too
+DERIVED_COLLECTIONS = ("conversation_summaries", "conversation_rollups", "analytics_markers")
+
+
+class RetentionJob:
+    """Progress handle for one background delete job"""
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.state = "pending"
+        self.deleted = 0
+        self.documents_deleted = 0
+        self.batches = 0
+        self.users_trimmed = 0
+        self.error: Optional[str] = None
+        self.started_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in ("done", "failed", "cancelled")
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "state": self.state,
+            "deleted": self.deleted,
+            "documents_deleted": self.documents_deleted,
+            "batches": self.batches,
+            "users_trimmed": self.users_trimmed,
+            "error": self.error,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class RetentionService:
+    """
+    Deletes conversations in small _id-range batches with a pause between
+    them, so purges never hold a request open or saturate the primary.
+    Enforces a max age and a per-user cap on a schedule, and runs one-off
+    purges started from the admin endpoint.
+    """
+
+    def __init__(self, max_jobs: int = 20):
+        self.store = None
+        self.on_deleted: Optional[Callable[[], None]] = None
+        self.jobs: "OrderedDict[str, RetentionJob]" = OrderedDict()
+        self.max_jobs = max_jobs
+        self._scheduler: Optional[asyncio.Task] = None
+
+        # Counters
+        self.total_deleted = 0
+
+    @property
+    def ttl_index(self) -> bool:
+        """MongoDB expires old turns itself; other stores leave the age rule to the job"""
+        return bool(
+            settings.RETENTION_USE_TTL_INDEX
+            and settings.RETENTION_MAX_AGE_DAYS
+            and getattr(self.store, "backend", "mongodb") == "mongodb"
+        )
+
+    @property
+    def policy_enabled(self) -> bool:
+        age_by_job = settings.RETENTION_MAX_AGE_DAYS and not self.ttl_index
+        return bool(age_by_job or settings.RETENTION_MAX_TURNS_PER_USER)
+
+    def start(self, store, on_deleted: Callable[[], None] = None):
+        """Attach the store and schedule the retention policy if one is set"""
+        self.store = store
+        self.on_deleted = on_deleted
+        if self.policy_enabled:
+            self._scheduler = asyncio.create_task(self._schedule_loop(), name="retention-scheduler")
+
+    async def _schedule_loop(self):
+        while True:
+            job = self.start_job(RETENTION)
+            await asyncio.gather(job.task, return_exceptions=True)
+            await asyncio.sleep(settings.RETENTION_INTERVAL_HOURS * 3600)
+
+    def running_job(self, kind: str) -> Optional[RetentionJob]:
+        return next((j for j in self.jobs.values() if j.kind == kind and not j.done), None)
+
+    def start_job(self, kind: str) -> RetentionJob:
+        """Start a purge or retention run (or return the one already running)"""
+        job = self.running_job(kind)
+        if job is not None:
+            return job
+
+        job = RetentionJob(kind)
+        runner = self._purge_all if kind == PURGE_ALL else self._enforce_policy
+        job.task = asyncio.create_task(self._run(job, runner), name=f"{kind}-{job.id[:8]}")
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.max_jobs:
+            oldest = next(iter(self.jobs.values()))
+            if not oldest.done:
+                break
+            self.jobs.popitem(last=False)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[RetentionJob]:
+        return self.jobs.get(job_id)
+
+    def cancel_job(self, job_id: str) -> Optional[RetentionJob]:
+        job = self.jobs.get(job_id)
+        if job is not None and not job.done:
+            job.task.cancel()
+        return job
+
+    async def _run(self, job: RetentionJob, runner):
+        job.state = "running"
+        logging.info("🧹 Retention job %s (%s) started", job.id, job.kind)
+        try:
+            await runner(job)
+            job.state = "done"
+            logging.info("🧹 Retention job %s deleted %s turns", job.id, job.deleted)
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+            logging.error("❌ Retention job %s failed: %s", job.id, e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            if job.deleted and self.on_deleted is not None:
+                self.on_deleted()
+
+    async def _delete_batches(
+        self,
+        job: RetentionJob,
+        before: Optional[datetime] = None,
+        user_phone: Optional[str] = None,
+    ):
+        """Delete matching turns page by page, pausing between pages"""
+        while True:
+            deleted = await self.store.delete_conversations_page(
+                settings.RETENTION_BATCH_SIZE, before=before, user_phone=user_phone
+            )
+            if not deleted:
+                return
+            job.deleted += deleted
+            job.batches += 1
+            self.total_deleted += deleted
+            await asyncio.sleep(settings.RETENTION_BATCH_PAUSE_MS / 1000)
+
+    async def _purge_all(self, job: RetentionJob):
+        await self._delete_batches(job)
+        for collection in DERIVED_COLLECTIONS:
+            while True:
+                deleted = await self.store.delete_documents_page(
+                    collection, settings.RETENTION_BATCH_SIZE
+                )
+                if not deleted:
+                    break
+                job.documents_deleted += deleted
+                job.batches += 1
+                await asyncio.sleep(settings.RETENTION_BATCH_PAUSE_MS / 1000)
+
+    async def _enforce_policy(self, job: RetentionJob):
+        if settings.RETENTION_MAX_AGE_DAYS and not self.ttl_index:
+            cutoff = datetime.utcnow() - timedelta(days=settings.RETENTION_MAX_AGE_DAYS)
+            await self._delete_batches(job, before=cutoff)
+
+        cap = settings.RETENTION_MAX_TURNS_PER_USER
+        if cap:
+            for user_phone, _ in await self.store.users_over_cap(cap):
+                # Everything older than the user's cap-th newest turn goes
+                newest = await self.store.recent_history(user_phone, cap)
+                if len(newest) < cap:
+                    continue
+                await self._delete_batches(job, before=newest[-1]["timestamp"], user_phone=user_phone)
+                job.users_trimmed += 1
+
+    async def stop(self):
+        tasks: List[asyncio.Task] = [j.task for j in self.jobs.values() if not j.done]
+        if self._scheduler is not None:
+            tasks.append(self._scheduler)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._scheduler = None
+
+    def get_stats(self) -> Dict:
+        return {
+            "policy_enabled": self.policy_enabled,
+            "ttl_index": self.ttl_index,
+            "running_jobs": sum(1 for j in self.jobs.values() if not j.done),
+            "total_deleted": self.total_deleted,
+        }
+
+
+# Global retention service instance
+retention_service = RetentionService()
@@ -0,0 +1,131 @@
+# File: app/services/service_registry.py
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+import importlib
+import threading
+import logging
+import asyncio
+import time
+
+
+class ServiceRegistry:
+    """
+    Builds heavy SDK clients on first use (or in lifespan) instead of at
+    import, and records how long each component spent importing,
+    initializing and warming up so cold starts can be broken down.
+    """
+
+    def __init__(self):
+        self.factories: Dict[str, Callable[[], Any]] = {}
+        # name -> whether lifespan should build it (default: always)
+        self.eager: Dict[str, Callable[[], bool]] = {}
+        self.warmups: Dict[str, Callable[[], Awaitable[bool]]] = {}
+        self.instances: Dict[str, Any] = {}
+        # component -> phase -> milliseconds
+        self.timings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.warmup_results: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        eager: Optional[Callable[[], bool]] = None,
+    ):
+        """Declare how to build a client; nothing is imported or built yet"""
+        self.factories[name] = factory
+        if eager is not None:
+            self.eager[name] = eager
+
+    def register_warmup(self, name: str, check: Callable[[], Awaitable[bool]]):
+        """Connection pre-check run at startup when warm-up is enabled"""
+        self.warmups[name] = check
+
+    def get(self, name: str) -> Any:
+        """The client, built on first call (safe from executor threads)"""
+        instance = self.instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self.instances:
+                imported_ms = self.timings[name].get("import", 0.0)
+                started = time.perf_counter()
+                self.instances[name] = self.factories[name]()
+                # The factory's SDK import is reported separately
+                imported_ms = self.timings[name].get("import", 0.0) - imported_ms
+                self.record(name, "init", time.perf_counter() - started - imported_ms / 1000)
+            return self.instances[name]
+
+    def set(self, name: str, instance: Any):
+        """Use an already-built client (e.g. a test double) for name"""
+        self.instances[name] = instance
+
+    def is_built(self, name: str) -> bool:
+        return name in self.instances
+
+    def import_module(self, component: str, module: str):
+        """importlib.import_module, timed under the component's import phase"""
+        with self.timed(component, "import"):
+            return importlib.import_module(module)
+
+    def record(self, component: str, phase: str, seconds: float):
+        self.timings[component][phase] = round(
+            self.timings[component].get(phase, 0.0) + seconds * 1000, 2
+        )
+
+    @contextmanager
+    def timed(self, component: str, phase: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(component, phase, time.perf_counter() - started)
+
+    def build_all(self):
+        """Build the clients this configuration uses now, so no request pays for it"""
+        for name in self.factories:
+            if name in self.eager and not self.eager[name]():
+                continue
+            try:
+                self.get(name)
+            except Exception as e:
+                logging.error("❌ Failed to initialize %s: %s", name, e)
+
+    async def warm_up(self, timeout: float) -> Dict[str, bool]:
+        """Run each client's connection pre-check concurrently"""
+
+        async def check(name: str) -> bool:
+            with self.timed(name, "warmup"):
+                try:
+                    return bool(await asyncio.wait_for(self.warmups[name](), timeout))
+                except Exception as e:
+                    logging.warning("⚠️ Warm-up of %s failed: %s", name, e)
+                    return False
+
+        names = list(self.warmups)
+        results = await asyncio.gather(*(check(name) for name in names))
+        self.warmup_results.update(zip(names, results))
+        logging.info("🔥 Warm-up results: %s", self.warmup_results)
+        return self.warmup_results
+
+    def report(self) -> Dict:
+        """Per-component import/init/warm-up milliseconds, slowest first"""
+        components = {
+            name: {**phases, "total": round(sum(phases.values()), 2)}
+            for name, phases in self.timings.items()
+        }
+        return dict(sorted(components.items(), key=lambda item: -item[1]["total"]))
+
+    def get_stats(self) -> Dict:
+        return {
+            "built": len(self.instances),
+            "registered": len(self.factories),
+            "startup_ms": round(sum(sum(p.values()) for p in self.timings.values()), 2),
+            "components": self.report(),
+            "warmup": dict(self.warmup_results),
+        }
+
+
+# Global service registry instance
+service_registry = ServiceRegistry()
@@ -0,0 +1,610 @@
+# File: app/services/sqlite_store.py
+from concurrent.futures import ThreadPoolExecutor
+from pymongo.errors import DuplicateKeyError
+from app.config.settings import settings
+from app.services.conversation_store import ConversationStore
+from app.services.index_manager import index_manager
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import logging
+import asyncio
+import sqlite3
+import json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    user_phone TEXT NOT NULL,
+    user_message TEXT NOT NULL,
+    ai_response TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    response_time_ms INTEGER,
+    message_type TEXT NOT NULL DEFAULT 'text',
+    provider TEXT
+);
+CREATE INDEX IF NOT EXISTS user_phone_timestamp
+    ON conversations (user_phone, timestamp DESC);
+CREATE INDEX IF NOT EXISTS user_phone_id ON conversations (user_phone, id);
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    body TEXT NOT NULL,
+    expires_at TEXT,
+    PRIMARY KEY (collection, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    next_attempt_at TEXT NOT NULL,
+    lease_until TEXT NOT NULL,
+    body TEXT NOT NULL,
+    user_phone TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (next_attempt_at);
+"""
+
+# Fixed statement text, so sqlite3's per-connection statement cache reuses
+# the prepared statements instead of recompiling them per call
+CONVERSATION_COLUMNS = (
+    "id, user_phone, user_message, ai_response, timestamp, "
+    "response_time_ms, message_type, provider"
+)
+INSERT_CONVERSATION = (
+    f"INSERT OR IGNORE INTO conversations ({CONVERSATION_COLUMNS}) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+SELECT_HISTORY = (
+    "SELECT user_message, ai_response, timestamp FROM conversations "
+    "WHERE user_phone = ? ORDER BY timestamp DESC LIMIT ?"
+)
+SCAN_CONVERSATIONS = (
+    f"SELECT {CONVERSATION_COLUMNS} FROM conversations "
+    "WHERE id > ? AND timestamp >= ? AND timestamp < ? ORDER BY id LIMIT ?"
+)
+SCAN_USER_CONVERSATIONS = (
+    f"SELECT {CONVERSATION_COLUMNS} FROM conversations "
+    "WHERE user_phone = ? AND id > ? AND timestamp >= ? AND timestamp < ? ORDER BY id LIMIT ?"
+)
+PAGE_IDS = "SELECT id FROM conversations WHERE timestamp < ? ORDER BY id LIMIT ?"
+USER_PAGE_IDS = (
+    "SELECT id FROM conversations WHERE user_phone = ? AND timestamp < ? ORDER BY id LIMIT ?"
+)
+DELETE_RANGE = "DELETE FROM conversations WHERE id BETWEEN ? AND ? AND timestamp < ?"
+DELETE_USER_RANGE = (
+    "DELETE FROM conversations WHERE user_phone = ? AND id BETWEEN ? AND ? AND timestamp < ?"
+)
+USERS_OVER_CAP = (
+    "SELECT user_phone, COUNT(*) FROM conversations GROUP BY user_phone HAVING COUNT(*) > ?"
+)
+DELETE_CONVERSATIONS = "DELETE FROM conversations"
+SELECT_DOCUMENT = "SELECT body FROM documents WHERE collection = ? AND id = ?"
+INSERT_DOCUMENT = "INSERT INTO documents (collection, id, body, expires_at) VALUES (?, ?, ?, ?)"
+UPSERT_DOCUMENT = (
+    "INSERT OR REPLACE INTO documents (collection, id, body, expires_at) VALUES (?, ?, ?, ?)"
+)
+DELETE_DOCUMENT = "DELETE FROM documents WHERE collection = ? AND id = ?"
+DELETE_DOCUMENTS_PAGE = (
+    "DELETE FROM documents WHERE (collection, id) IN "
+    "(SELECT collection, id FROM documents WHERE collection = ? LIMIT ?)"
+)
+DELETE_EXPIRED = (
+    "DELETE FROM documents WHERE (collection, id) IN "
+    "(SELECT collection, id FROM documents WHERE expires_at <= ? LIMIT ?)"
+)
+# Query operators delete_many accepts, as in the Motor filters services use
+SQL_OPERATORS = {"$lt": "<", "$lte": "<=", "$gt": ">", "$gte": ">="}
+INSERT_OUTBOX = (
+    "INSERT INTO outbox (id, next_attempt_at, lease_until, body, user_phone, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+# Due messages with no older pending message for the same user
+SELECT_DUE_OUTBOX = (
+    "SELECT id, body FROM outbox o WHERE next_attempt_at <= ? AND lease_until <= ? "
+    "AND NOT EXISTS (SELECT 1 FROM outbox p WHERE p.user_phone = o.user_phone "
+    "AND (p.created_at < o.created_at OR (p.created_at = o.created_at AND p.id < o.id))) "
+    "ORDER BY next_attempt_at LIMIT ?"
+)
+SELECT_OUTBOX_HEAD = (
+    "SELECT id, next_attempt_at, lease_until, body FROM outbox "
+    "WHERE user_phone = ? ORDER BY created_at, id LIMIT 1"
+)
+SELECT_OUTBOX = "SELECT body FROM outbox WHERE id = ?"
+LEASE_OUTBOX = "UPDATE outbox SET lease_until = ? WHERE id = ?"
+UPDATE_OUTBOX = "UPDATE outbox SET next_attempt_at = ?, lease_until = ?, body = ? WHERE id = ?"
+DELETE_OUTBOX = "DELETE FROM outbox WHERE id = ?"
+
+
+def _encode_timestamp(value: datetime) -> str:
+    # Fixed-width ISO text sorts chronologically
+    return value.isoformat(timespec="microseconds")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"$date": _encode_timestamp(value)}
+    return str(value)
+
+
+def _json_hook(value: Dict):
+    if len(value) == 1 and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+class SQLiteDocumentCollection:
+    """_id-keyed documents stored as JSON, with the Motor calls services use"""
+
+    def __init__(self, store: "SQLiteConversationStore", name: str):
+        self.store = store
+        self.name = name
+
+    def _load(self, conn: sqlite3.Connection, doc_id: str) -> Optional[Dict]:
+        row = conn.execute(SELECT_DOCUMENT, (self.name, doc_id)).fetchone()
+        return json.loads(row[0], object_hook=_json_hook) if row else None
+
+    def _expires_at(self, document: Dict) -> Optional[str]:
+        """When a TTL index registered for this collection would expire the document"""
+        ttl = self.store.ttls.get(self.name)
+        if ttl is None or not isinstance(document.get(ttl[0]), datetime):
+            return None
+        return _encode_timestamp(document[ttl[0]] + timedelta(seconds=ttl[1]))
+
+    def _where(self, query: Dict) -> Tuple[str, list]:
+        """SQL for a filter of _id/field equality, $in on _id, and range operators"""
+        clauses, params = ["collection = ?"], [self.name]
+        for key, condition in query.items():
+            conditions = condition.items() if isinstance(condition, dict) else [("$eq", condition)]
+            for op, value in conditions:
+                if key == "_id":
+                    column, encode = "id", str
+                elif isinstance(value, datetime):
+                    column, encode = "json_extract(body, ?)", _encode_timestamp
+                    params.append(f'$.{key}."$date"')
+                else:
+                    column, encode = "json_extract(body, ?)", lambda v: v
+                    params.append(f"$.{key}")
+                if op == "$eq":
+                    clauses.append(f"{column} = ?")
+                    params.append(encode(value))
+                elif op == "$in" and key == "_id":
+                    clauses.append(f"id IN ({', '.join('?' * len(value))})")
+                    params.extend(encode(v) for v in value)
+                elif op in SQL_OPERATORS:
+                    clauses.append(f"{column} {SQL_OPERATORS[op]} ?")
+                    params.append(encode(value))
+                else:
+                    raise ValueError(f"Unsupported filter {key}: {op} for SQLite documents")
+        return " AND ".join(clauses), params
+
+    async def insert_one(self, document: Dict):
+        doc_id = str(document["_id"])
+        body = json.dumps(document, default=_json_default)
+        expires_at = self._expires_at(document)
+
+        def insert(conn: sqlite3.Connection):
+            try:
+                with conn:
+                    conn.execute(INSERT_DOCUMENT, (self.name, doc_id, body, expires_at))
+            except sqlite3.IntegrityError:
+                raise DuplicateKeyError(f"duplicate _id {doc_id} in {self.name}")
+            return SimpleNamespace(inserted_id=document["_id"])
+
+        return await self.store.run(insert)
+
+    async def find_one(self, query: Dict, projection: Optional[Dict] = None):
+        doc_id = str(query["_id"])
+        doc = await self.store.run(lambda conn: self._load(conn, doc_id))
+        if doc is None or not projection:
+            return doc
+        return {k: v for k, v in doc.items() if k == "_id" or projection.get(k)}
+
+    async def update_one(self, query: Dict, update: Dict, upsert: bool = False):
+        doc_id = str(query["_id"])
+
+        def apply(conn: sqlite3.Connection):
+            with conn:
+                doc = self._load(conn, doc_id)
+                if doc is None:
+                    if not upsert:
+                        return SimpleNamespace(matched_count=0)
+                    doc = {"_id": query["_id"]}
+                doc.update(update.get("$set", {}))
+                for key, amount in update.get("$inc", {}).items():
+                    doc[key] = doc.get(key, 0) + amount
+                conn.execute(
+                    UPSERT_DOCUMENT,
+                    (
+                        self.name,
+                        doc_id,
+                        json.dumps(doc, default=_json_default),
+                        self._expires_at(doc),
+                    ),
+                )
+            return SimpleNamespace(matched_count=1)
+
+        return await self.store.run(apply)
+
+    async def delete_one(self, query: Dict):
+        doc_id = str(query["_id"])
+
+        def delete(conn: sqlite3.Connection):
+            with conn:
+                cursor = conn.execute(DELETE_DOCUMENT, (self.name, doc_id))
+            return SimpleNamespace(deleted_count=cursor.rowcount)
+
+        return await self.store.run(delete)
+
+    async def delete_many(self, query: Dict):
+        where, params = self._where(query)
+
+        def delete(conn: sqlite3.Connection):
+            with conn:
+                cursor = conn.execute(f"DELETE FROM documents WHERE {where}", params)
+            return SimpleNamespace(deleted_count=cursor.rowcount)
+
+        return await self.store.run(delete)
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    Embedded store for small deployments: one SQLite file in WAL mode.
+    Every statement runs on a single dedicated thread that owns the
+    connection, so the event loop never blocks on disk and SQLite never
+    sees concurrent writers. Batches from the write buffer commit as one
+    transaction.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.SQLITE_PATH
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.conn: Optional[sqlite3.Connection] = None
+        self._collections: Dict[str, SQLiteDocumentCollection] = {}
+        # collection -> (field, seconds) from the TTL indexes services register
+        self.ttls: Dict[str, Tuple[str, float]] = {}
+        self._expiry_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _ttl_indexes() -> Dict[str, Tuple[str, float]]:
+        ttls = {}
+        for collection, indexes in index_manager.indexes.items():
+            if collection == "conversations":
+                continue  # Turns are aged out by the retention job
+            for index in indexes:
+                spec = index.document
+                if "expireAfterSeconds" in spec:
+                    ttls[collection] = (next(iter(spec["key"])), spec["expireAfterSeconds"])
+        return ttls
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,  # Only ever used from the executor thread
+            cached_statements=64,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints; fine with WAL
+        conn.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        conn.executescript(SCHEMA)
+
+        # Columns added after the first release
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(conversations)")}
+        if "provider" not in columns:
+            conn.execute("ALTER TABLE conversations ADD COLUMN provider TEXT")
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+        if "expires_at" not in columns:
+            conn.execute("ALTER TABLE documents ADD COLUMN expires_at TEXT")
+        self._backfill_expiry(conn)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS documents_expires_at ON documents (expires_at) "
+            "WHERE expires_at IS NOT NULL"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+        if "user_phone" not in columns:
+            with conn:
+                conn.execute("ALTER TABLE outbox ADD COLUMN user_phone TEXT NOT NULL DEFAULT ''")
+                conn.execute("ALTER TABLE outbox ADD COLUMN created_at TEXT NOT NULL DEFAULT ''")
+                conn.execute(
+                    "UPDATE outbox SET user_phone = json_extract(body, '$.user_phone'), "
+                    "created_at = json_extract(body, '$.created_at.\"$date\"')"
+                )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_user_head ON outbox (user_phone, created_at, id)"
+        )
+        return conn
+
+    def _backfill_expiry(self, conn: sqlite3.Connection):
+        """Set expires_at on documents written before their collection had a TTL"""
+        for name, (field, seconds) in self.ttls.items():
+            rows = conn.execute(
+                "SELECT id, body FROM documents WHERE collection = ? AND expires_at IS NULL",
+                (name,),
+            ).fetchall()
+            updates = []
+            for doc_id, body in rows:
+                value = json.loads(body, object_hook=_json_hook).get(field)
+                if isinstance(value, datetime):
+                    expires_at = _encode_timestamp(value + timedelta(seconds=seconds))
+                    updates.append((expires_at, name, doc_id))
+            if updates:
+                with conn:
+                    conn.executemany(
+                        "UPDATE documents SET expires_at = ? WHERE collection = ? AND id = ?",
+                        updates,
+                    )
+
+    async def connect(self):
+        self.ttls = self._ttl_indexes()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self.conn = await self.run_raw(self._open)
+        if self.ttls:
+            self._expiry_task = asyncio.create_task(self._expiry_loop(), name="sqlite-ttl")
+        logging.info("✅ Opened SQLite store at %s (WAL)", self.path)
+
+    async def _expiry_loop(self):
+        while True:
+            await asyncio.sleep(settings.SQLITE_TTL_INTERVAL_SECONDS)
+            try:
+                await self.purge_expired()
+            except Exception as e:
+                logging.error("❌ SQLite TTL purge failed: %s", e)
+
+    async def purge_expired(self, now: datetime = None) -> int:
+        """Delete documents past their TTL in batches, as MongoDB's TTL monitor would"""
+        cutoff = _encode_timestamp(now or datetime.utcnow())
+        batch_size = settings.RETENTION_BATCH_SIZE
+
+        def delete(conn: sqlite3.Connection) -> int:
+            with conn:
+                return conn.execute(DELETE_EXPIRED, (cutoff, batch_size)).rowcount
+
+        total = 0
+        while True:
+            deleted = await self.run(delete)
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+    async def run_raw(self, fn: Callable):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn)
+
+    async def run(self, fn: Callable[[sqlite3.Connection], object]):
+        """Run fn(connection) on the store's thread"""
+        return await self.run_raw(lambda: fn(self.conn))
+
+    async def close(self):
+        if self.executor is None:
+            return
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            await asyncio.gather(self._expiry_task, return_exceptions=True)
+            self._expiry_task = None
+        if self.conn is not None:
+            await self.run(lambda conn: conn.close())
+            self.conn = None
+        self.executor.shutdown(wait=True)
+        self.executor = None
+        logging.info("🔌 SQLite store closed")
+
+    @property
+    def conversations(self):
+        return self
+
+    def collection(self, name: str) -> SQLiteDocumentCollection:
+        if name not in self._collections:
+            self._collections[name] = SQLiteDocumentCollection(self, name)
+        return self._collections[name]
+
+    @staticmethod
+    def _row(document: Dict) -> tuple:
+        return (
+            str(document["_id"]),
+            document["user_phone"],
+            document["user_message"],
+            document["ai_response"],
+            _encode_timestamp(document["timestamp"]),
+            document.get("response_time_ms"),
+            document.get("message_type", "text"),
+            document.get("provider"),
+        )
+
+    async def insert_one(self, document: Dict):
+        row = self._row(document)
+
+        def insert(conn: sqlite3.Connection):
+            with conn:
+                conn.execute(INSERT_CONVERSATION, row)
+            return SimpleNamespace(inserted_id=document["_id"])
+
+        return await self.run(insert)
+
+    async def insert_many(self, documents: List[Dict], ordered: bool = True):
+        """Insert a batch in a single transaction (one commit, one fsync)"""
+        rows = [self._row(d) for d in documents]
+
+        def insert(conn: sqlite3.Connection):
+            with conn:
+                conn.executemany(INSERT_CONVERSATION, rows)
+            return SimpleNamespace(inserted_ids=[d["_id"] for d in documents])
+
+        return await self.run(insert)
+
+    async def recent_history(self, user_phone: str, limit: int) -> List[Dict]:
+        def query(conn: sqlite3.Connection):
+            return conn.execute(SELECT_HISTORY, (user_phone, limit)).fetchall()
+
+        rows = await self.run(query)
+        return [
+            {
+                "user_message": user_message,
+                "ai_response": ai_response,
+                "timestamp": datetime.fromisoformat(timestamp),
+            }
+            for user_message, ai_response, timestamp in rows
+        ]
+
+    async def scan_conversations(
+        self,
+        after_id=None,
+        limit: int = 500,
+        before: Optional[datetime] = None,
+        since: Optional[datetime] = None,
+        user_phone: Optional[str] = None,
+    ) -> List[Dict]:
+        # ObjectId hex ids sort by creation time, so id order is insert order
+        params = (
+            str(after_id) if after_id is not None else "",
+            _encode_timestamp(since) if since is not None else "",
+            _encode_timestamp(before) if before is not None else "9999",
+            limit,
+        )
+        if user_phone is None:
+            sql = SCAN_CONVERSATIONS
+        else:
+            sql, params = SCAN_USER_CONVERSATIONS, (user_phone,) + params
+        rows = await self.run(lambda conn: conn.execute(sql, params).fetchall())
+        return [
+            {
+                "_id": row[0],
+                "user_phone": row[1],
+                "user_message": row[2],
+                "ai_response": row[3],
+                "timestamp": datetime.fromisoformat(row[4]),
+                "response_time_ms": row[5],
+                "message_type": row[6],
+                "provider": row[7],
+            }
+            for row in rows
+        ]
+
+    async def delete_conversations_page(
+        self,
+        limit: int,
+        before: Optional[datetime] = None,
+        user_phone: Optional[str] = None,
+    ) -> int:
+        cutoff = _encode_timestamp(before) if before is not None else "9999"
+
+        def delete(conn: sqlite3.Connection) -> int:
+            with conn:
+                if user_phone is None:
+                    ids = conn.execute(PAGE_IDS, (cutoff, limit)).fetchall()
+                    if not ids:
+                        return 0
+                    params = (ids[0][0], ids[-1][0], cutoff)
+                    return conn.execute(DELETE_RANGE, params).rowcount
+                ids = conn.execute(USER_PAGE_IDS, (user_phone, cutoff, limit)).fetchall()
+                if not ids:
+                    return 0
+                params = (user_phone, ids[0][0], ids[-1][0], cutoff)
+                return conn.execute(DELETE_USER_RANGE, params).rowcount
+
+        return await self.run(delete)
+
+    async def delete_documents_page(self, collection: str, limit: int) -> int:
+        def delete(conn: sqlite3.Connection) -> int:
+            with conn:
+                return conn.execute(DELETE_DOCUMENTS_PAGE, (collection, limit)).rowcount
+
+        return await self.run(delete)
+
+    async def users_over_cap(self, cap: int) -> List[Tuple[str, int]]:
+        return await self.run(lambda conn: conn.execute(USERS_OVER_CAP, (cap,)).fetchall())
+
+    async def clear_conversations(self) -> int:
+        def delete(conn: sqlite3.Connection):
+            with conn:
+                return conn.execute(DELETE_CONVERSATIONS).rowcount
+
+        return await self.run(delete)
+
+    @staticmethod
+    def _outbox_row(message: Dict) -> tuple:
+        return (
+            _encode_timestamp(message["next_attempt_at"]),
+            _encode_timestamp(message["lease_until"]),
+            json.dumps(message, default=_json_default),
+        )
+
+    async def outbox_add(self, message: Dict) -> bool:
+        row = (
+            (str(message["_id"]),)
+            + self._outbox_row(message)
+            + (message["user_phone"], _encode_timestamp(message["created_at"]))
+        )
+
+        def insert(conn: sqlite3.Connection) -> bool:
+            try:
+                with conn:
+                    conn.execute(INSERT_OUTBOX, row)
+                return True
+            except sqlite3.IntegrityError:
+                return False
+
+        return await self.run(insert)
+
+    async def outbox_claim(self, now: datetime, lease_until: datetime, limit: int) -> List[Dict]:
+        due = _encode_timestamp(now)
+        lease = _encode_timestamp(lease_until)
+
+        def claim(conn: sqlite3.Connection) -> List[Dict]:
+            with conn:
+                # Take the write lock before reading, so other processes
+                # sharing the file cannot claim the same rows
+                conn.execute("BEGIN IMMEDIATE")
+                rows = conn.execute(SELECT_DUE_OUTBOX, (due, due, limit)).fetchall()
+                conn.executemany(LEASE_OUTBOX, [(lease, row[0]) for row in rows])
+            messages = [json.loads(row[1], object_hook=_json_hook) for row in rows]
+            for message in messages:
+                message["lease_until"] = lease_until
+            return messages
+
+        return await self.run(claim)
+
+    async def outbox_claim_next(
+        self, user_phone: str, now: datetime, lease_until: datetime
+    ) -> Optional[Dict]:
+        due = _encode_timestamp(now)
+        lease = _encode_timestamp(lease_until)
+
+        def claim(conn: sqlite3.Connection) -> Optional[Dict]:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(SELECT_OUTBOX_HEAD, (user_phone,)).fetchone()
+                if row is None or row[1] > due or row[2] > due:
+                    return None
+                conn.execute(LEASE_OUTBOX, (lease, row[0]))
+            message = json.loads(row[3], object_hook=_json_hook)
+            message["lease_until"] = lease_until
+            return message
+
+        return await self.run(claim)
+
+    async def outbox_reschedule(
+        self, message_id: str, next_attempt_at: datetime, attempts: int, error: Optional[str]
+    ):
+        def reschedule(conn: sqlite3.Connection):
+            with conn:
+                row = conn.execute(SELECT_OUTBOX, (message_id,)).fetchone()
+                if row is None:
+                    return
+                message = json.loads(row[0], object_hook=_json_hook)
+                message.update(
+                    next_attempt_at=next_attempt_at,
+                    lease_until=datetime.min,
+                    attempts=attempts,
+                    last_error=error,
+                )
+                conn.execute(UPDATE_OUTBOX, self._outbox_row(message) + (message_id,))
+
+        await self.run(reschedule)
+
+    async def outbox_remove(self, message_id: str):
+        def delete(conn: sqlite3.Connection):
+            with conn:
+                conn.execute(DELETE_OUTBOX, (message_id,))
+
+        await self.run(delete)
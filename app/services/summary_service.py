@@ -0,0 +1,136 @@
+# File: app/services/summary_service.py
+from app.config.settings import settings, worker_count
+from app.services.cache import LRUCache
+from typing import Dict, List, Optional
+from datetime import datetime
+import logging
+import asyncio
+
+
+def condense_turn(turn: Dict, max_chars: int = 160) -> str:
+    """One summary line for a conversation turn"""
+
+    def clip(text: str) -> str:
+        text = " ".join(text.split())
+        return text if len(text) <= max_chars else text[:max_chars] + "…"
+
+    line = f"- User: {clip(turn.get('user_message', ''))}"
+    if turn.get("ai_response"):
+        line += f" | You: {clip(turn['ai_response'])}"
+    return line
+
+
+class SummaryService:
+    """
+    Keeps a rolling per-user summary next to the conversations.
+    Turns that drop out of the prompt's recent window are folded into the
+    summary by a background task, so the hot path only reads it.
+    """
+
+    def __init__(self):
+        self.collection = None
+        self.cache = LRUCache(
+            max_entries=settings.SUMMARY_CACHE_MAX_ENTRIES,
+            max_bytes=settings.SUMMARY_CACHE_MAX_BYTES,
+            ttl_seconds=settings.SUMMARY_CACHE_TTL_SECONDS,
+        )
+        # Another worker may fold newer turns into the stored summary
+        self.use_cache = worker_count() == 1
+        self.max_chars = settings.PROMPT_SUMMARY_MAX_TOKENS * 4
+        self._pending: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Counters
+        self.folded = 0
+        self.dropped = 0
+
+    def start(self, collection):
+        """Start the background refresher for the conversation_summaries collection"""
+        self.collection = collection
+        self._pending = asyncio.Queue(maxsize=settings.SUMMARY_QUEUE_MAXSIZE)
+        self._worker = asyncio.create_task(self._refresh_loop(), name="summary-refresher")
+
+    async def get_summary(self, user_phone: str) -> Optional[str]:
+        """Current summary for a user (cached)"""
+        cached = self.cache.get(user_phone) if self.use_cache else None
+        if cached is not None:
+            return cached or None
+        if self.collection is None:
+            return None
+
+        try:
+            doc = await self.collection.find_one({"_id": user_phone}, {"summary": 1})
+        except Exception as e:
+            logging.error("❌ Summary fetch error: %s", e)
+            return None
+
+        summary = doc.get("summary", "") if doc else ""
+        if self.use_cache:
+            self.cache.set(user_phone, summary)
+        return summary or None
+
+    def schedule_fold(self, user_phone: str, turns: List[Dict]):
+        """Queue turns leaving the recent window to be folded into the summary"""
+        if self._pending is None or not turns:
+            return
+        try:
+            self._pending.put_nowait((user_phone, turns))
+        except asyncio.QueueFull:
+            # Summaries are best effort; never slow the reply path down
+            self.dropped += 1
+
+    async def _refresh_loop(self):
+        while True:
+            user_phone, turns = await self._pending.get()
+            try:
+                await self._fold(user_phone, turns)
+            except Exception as e:
+                logging.error("❌ Summary refresh error for %s: %s", user_phone, e)
+            finally:
+                self._pending.task_done()
+
+    async def _fold(self, user_phone: str, turns: List[Dict]):
+        """Append condensed turns, dropping the oldest lines past the budget"""
+        summary = await self.get_summary(user_phone) or ""
+        lines = summary.splitlines() + [condense_turn(t) for t in turns]
+        while lines and sum(len(l) + 1 for l in lines) > self.max_chars:
+            lines.pop(0)
+        summary = "\n".join(lines)
+
+        await self.collection.update_one(
+            {"_id": user_phone},
+            {
+                "$set": {"summary": summary, "updated_at": datetime.utcnow()},
+                "$inc": {"turns": len(turns)},
+            },
+            upsert=True,
+        )
+        if self.use_cache:
+            self.cache.set(user_phone, summary)
+        self.folded += len(turns)
+
+    async def stop(self):
+        """Finish queued refreshes, then stop the worker"""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._pending.join(), timeout=5)
+        except asyncio.TimeoutError:
+            logging.warning("⚠️ Dropping %s summary refreshes", self._pending.qsize())
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+
+    def clear(self):
+        self.cache.clear()
+
+    def get_stats(self) -> Dict:
+        stats = self.cache.get_stats()
+        stats["folded_turns"] = self.folded
+        stats["dropped_refreshes"] = self.dropped
+        stats["queued"] = self._pending.qsize() if self._pending else 0
+        return stats
+
+
+# Global summary service instance
+summary_service = SummaryService()
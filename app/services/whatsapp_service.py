@@ -1,17 +1,76 @@
-from twilio.rest import Client
 from app.config.settings import settings
+from app.services.service_registry import service_registry
+from app.services.rate_limiter import twilio_limiter
+from app.services.metrics import stage_duration, stage_errors
+from typing import Optional
 import logging
+import asyncio
+import time
+import httpx
+
+# Stage metrics for outbound sends
+SEND_TIME = {
+    True: stage_duration.labels("twilio_send", "httpx"),
+    False: stage_duration.labels("twilio_send", "twilio_sdk"),
+}
+SEND_ERRORS = stage_errors.labels("twilio_send")
+
+
+def build_twilio_client():
+    """Import the Twilio SDK and build its client (only the SDK send path needs it)"""
+    twilio_rest = service_registry.import_module("twilio_sdk", "twilio.rest")
+    return twilio_rest.Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+
+
+service_registry.register(
+    "twilio_sdk", build_twilio_client, eager=lambda: not settings.TWILIO_USE_HTTPX
+)
 
 
 class WhatsAppService:
     """Service for WhatsApp messaging via Twilio"""
 
     def __init__(self):
-        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
         self.from_number = settings.TWILIO_PHONE_NUMBER
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.account_url = (
+            f"{settings.TWILIO_API_BASE_URL.rstrip('/')}/2010-04-01/Accounts/"
+            f"{settings.TWILIO_ACCOUNT_SID}"
+        )
+        self.messages_url = f"{self.account_url}/Messages.json"
+
+    @property
+    def client(self):
+        return service_registry.get("twilio_sdk")
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client for the Twilio REST API"""
+        if self.http_client is None or self.http_client.is_closed:
+            self.http_client = httpx.AsyncClient(
+                auth=(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN),
+                timeout=httpx.Timeout(
+                    settings.TWILIO_READ_TIMEOUT_SECONDS,
+                    connect=settings.TWILIO_CONNECT_TIMEOUT_SECONDS,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.TWILIO_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.TWILIO_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+        return self.http_client
 
     async def send_message(self, to_phone: str, message: str) -> bool:
         """Send WhatsApp message to user"""
+        try:
+            await self.deliver(to_phone, message)
+            return True
+        except Exception as e:
+            logging.error("❌ WhatsApp send error: %s", e)
+            return False
+
+    async def deliver(self, to_phone: str, message: str) -> str:
+        """Send a message and return its SID; raises on failure (see is_permanent_error)"""
+        started = time.perf_counter()
         try:
             # Clean phone number format
             if to_phone.startswith("whatsapp:"):
@@ -24,19 +83,58 @@ class WhatsAppService:
             # Final WhatsApp format
             to_whatsapp = f"whatsapp:{to_phone}"
 
-            logging.info(f"📱 Sending to: {to_whatsapp} from: {self.from_number}")
+            logging.info("📱 Sending to: %s from: %s", to_whatsapp, self.from_number)
+
+            # Wait for our share of the send-rate quota
+            await twilio_limiter.acquire(to_phone)
 
             # Send message
-            message_obj = self.client.messages.create(
-                body=message, from_=self.from_number, to=to_whatsapp
-            )
+            if settings.TWILIO_USE_HTTPX:
+                message_sid = await self._send_via_http(to_whatsapp, message)
+            else:
+                message_obj = await asyncio.to_thread(
+                    self.client.messages.create,
+                    body=message,
+                    from_=self.from_number,
+                    to=to_whatsapp,
+                )
+                message_sid = message_obj.sid
 
-            logging.info(f"📱 Message sent successfully! SID: {message_obj.sid}")
-            return True
+            logging.info("📱 Message sent successfully! SID: %s", message_sid)
+            return message_sid
 
-        except Exception as e:
-            logging.error(f"❌ WhatsApp send error: {e}")
-            return False
+        except Exception:
+            SEND_ERRORS.inc()
+            raise
+        finally:
+            SEND_TIME[settings.TWILIO_USE_HTTPX].observe_since(started)
+
+    @staticmethod
+    def is_permanent_error(error: Exception) -> bool:
+        """
+        Twilio rejected the message itself (4xx other than 408/429: bad
+        number, unsubscribed user, bad credentials), so retrying cannot help
+        """
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None) or getattr(error, "status", None)
+        return isinstance(status, int) and 400 <= status < 500 and status not in (408, 429)
+
+    async def _send_via_http(self, to_whatsapp: str, message: str) -> str:
+        """POST the message to the Messages resource over the pooled client"""
+        response = await self._get_http_client().post(
+            self.messages_url,
+            data={"From": self.from_number, "To": to_whatsapp, "Body": message},
+        )
+        if response.status_code == 429:
+            twilio_limiter.backoff(float(response.headers.get("Retry-After", 1)))
+        response.raise_for_status()
+        return response.json().get("sid")
+
+    async def check_connection(self) -> bool:
+        """Fetch the account: checks credentials and opens a pooled keep-alive connection"""
+        response = await self._get_http_client().get(f"{self.account_url}.json")
+        response.raise_for_status()
+        return True
 
     def validate_phone_number(self, phone: str) -> str:
         """Validate and format phone number"""
@@ -49,6 +147,13 @@ class WhatsAppService:
 
         return phone
 
+    async def close(self):
+        """Close pooled HTTP connections"""
+        if self.http_client is not None and not self.http_client.is_closed:
+            await self.http_client.aclose()
+            logging.info("🔌 Twilio HTTP client closed")
+
 
 # Global WhatsApp service instance
 whatsapp_service = WhatsAppService()
+service_registry.register_warmup("twilio", whatsapp_service.check_connection)
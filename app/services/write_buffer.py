@@ -0,0 +1,153 @@
+# File: app/services/write_buffer.py
+from pymongo.errors import BulkWriteError
+from typing import Dict, List, Optional
+import logging
+import asyncio
+import time
+
+
+class WriteBehindBuffer:
+    """Gathers documents and flushes them to a collection with unordered insert_many"""
+
+    def __init__(self, name: str, batch_size: int, flush_interval_ms: int, max_pending: int):
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.collection = None
+        self._buffer: List[Dict] = []
+        self._in_flight = 0
+        self._flush_requested = asyncio.Event()
+        self._space_available = asyncio.Event()
+        self._space_available.set()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Counters
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.backpressure_waits = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._flusher is not None and not self._flusher.done()
+
+    @property
+    def pending(self) -> int:
+        """Documents buffered or currently being written"""
+        return len(self._buffer) + self._in_flight
+
+    def start(self, collection):
+        """Start the periodic flusher for a collection"""
+        self.collection = collection
+        self._stopping = False
+        self._flusher = asyncio.create_task(self._flush_loop(), name=f"{self.name}-flusher")
+        logging.info(
+            "🧺 Write buffer '%s' started (batch=%s, interval=%ss)",
+            self.name,
+            self.batch_size,
+            self.flush_interval,
+        )
+
+    async def add(self, document: Dict):
+        """Buffer a document, waiting while the database is behind"""
+        # Once stopping, nothing frees space again; stop() flushes what is added
+        while self.pending >= self.max_pending and not self._stopping:
+            self.backpressure_waits += 1
+            self._space_available.clear()
+            self._flush_requested.set()
+            await self._space_available.wait()
+
+        self._buffer.append(document)
+        if len(self._buffer) >= self.batch_size:
+            self._flush_requested.set()
+
+    async def _flush_loop(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error("❌ Write buffer '%s' flush error: %s", self.name, e)
+
+    async def flush(self):
+        """Write everything buffered so far, batch by batch"""
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[: self.batch_size]
+                del self._buffer[: self.batch_size]
+                self._in_flight = len(batch)
+                started = time.monotonic()
+
+                try:
+                    result = await self.collection.insert_many(batch, ordered=False)
+                    self.written += len(result.inserted_ids)
+                except BulkWriteError as e:
+                    # Unordered: everything except the reported errors was written
+                    errors = len(e.details.get("writeErrors", []))
+                    self.written += e.details.get("nInserted", len(batch) - errors)
+                    self.failed += errors
+                    logging.error("❌ Write buffer '%s': %s documents rejected", self.name, errors)
+                except (Exception, asyncio.CancelledError):
+                    # Database unreachable or flusher cancelled mid-write:
+                    # put the batch back and retry next tick (or in stop)
+                    self._buffer[:0] = batch
+                    raise
+                finally:
+                    self._in_flight = 0
+                    self.batches += 1
+                    self.last_flush_ms = (time.monotonic() - started) * 1000
+                    if self.pending < self.max_pending:
+                        self._space_available.set()
+
+    async def stop(self, timeout: float = 30.0):
+        """
+        Let the flusher finish its last flush and exit, then write out
+        whatever is still buffered. The flusher is only cancelled if it
+        does not exit within the timeout, and the final flush gets the
+        same timeout.
+        """
+        self._stopping = True
+        # Wake writers waiting for space so they do not hang on shutdown
+        self._space_available.set()
+        if self._flusher is not None:
+            self._flush_requested.set()
+            _, pending = await asyncio.wait({self._flusher}, timeout=timeout)
+            for task in pending:
+                logging.warning("⚠️ Write buffer '%s' flusher did not exit, cancelling", self.name)
+                task.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+
+        if self._buffer and self.collection is not None:
+            try:
+                await asyncio.wait_for(self.flush(), timeout=timeout)
+                logging.info("🧺 Write buffer '%s' flushed on shutdown", self.name)
+            except Exception as e:
+                logging.error(
+                    "❌ Write buffer '%s' lost %s documents: %s", self.name, len(self._buffer), e
+                )
+
+    def get_stats(self) -> Dict:
+        """Buffer depth, throughput and backpressure"""
+        return {
+            "running": self.is_running,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "batch_size": self.batch_size,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "backpressure_waits": self.backpressure_waits,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
@@ -0,0 +1,43 @@
+# File: benchmarks/bench_app.py
+"""
+app.main with the offline fakes plugged in, for real worker processes
+
+    python -m app.server --app benchmarks.bench_app:app --workers 4
+
+Each worker imports this module itself, so every process gets its own fake
+Mongo, Gemini and Twilio (latencies from BENCH_*_LATENCY_MS, default 0 so
+the run measures the app's own CPU work).
+"""
+import os
+
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACbenchmark")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("TWILIO_USE_HTTPX", "true")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from app.main import app  # noqa: E402,F401
+from app.services.ai_service import ai_service  # noqa: E402
+from app.services.database_service import db_service  # noqa: E402
+from app.services.mongo_store import MongoConversationStore  # noqa: E402
+from app.services.whatsapp_service import whatsapp_service  # noqa: E402
+from benchmarks.fake_gemini import FakeGenerativeModel  # noqa: E402
+from benchmarks.fake_mongo import FakeDatabase  # noqa: E402
+from benchmarks.fake_twilio import FakeTwilioSender  # noqa: E402
+
+
+def latency(name: str) -> float:
+    return float(os.environ.get(f"BENCH_{name}_LATENCY_MS", 0))
+
+
+_connect = db_service.connect_to_database
+
+
+async def connect_fake_database(store=None):
+    """Lifespan connects here instead of to a real MongoDB"""
+    await _connect(store or MongoConversationStore(db=FakeDatabase(latency("MONGO"))))
+
+
+db_service.connect_to_database = connect_fake_database
+ai_service.model = FakeGenerativeModel(latency("GEMINI"))
+whatsapp_service._send_via_http = FakeTwilioSender(latency("TWILIO"))
@@ -0,0 +1,66 @@
+# File: benchmarks/bench_circuit_breaker.py
+"""
+Exercise the Gemini circuit breaker and hedging against a fake model
+
+    python -m benchmarks.bench_circuit_breaker --latency-ms 9000 --requests 40
+    python -m benchmarks.bench_circuit_breaker --latency-ms 200 --jitter-ms 180 --hedge
+
+Reports how long generate_response takes and which provider answered while
+the fake model is slow or failing.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACbenchmark")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from app.config.settings import settings  # noqa: E402
+from benchmarks.fake_gemini import FakeGenerativeModel  # noqa: E402
+
+
+async def run(args) -> dict:
+    settings.GEMINI_HEDGE_ENABLED = args.hedge
+    settings.RESPONSE_CACHE_ENABLED = False
+    settings.LOCAL_INTENT_ANSWERS = False
+
+    from app.services.ai_service import AIService
+
+    service = AIService()
+    service.model = FakeGenerativeModel(args.latency_ms, args.jitter_ms, args.error_rate)
+
+    providers = Counter()
+    latencies = []
+    for i in range(args.requests):
+        started = time.perf_counter()
+        result = await service.generate_response(f"question number {i}")
+        latencies.append((time.perf_counter() - started) * 1000)
+        providers[result["provider"]] += 1
+
+    latencies.sort()
+    return {
+        "requests": args.requests,
+        "fake_latency_ms": args.latency_ms,
+        "fake_error_rate": args.error_rate,
+        "providers": dict(providers),
+        "model_calls": service.model.calls,
+        "p50_ms": round(latencies[len(latencies) // 2], 1),
+        "max_ms": round(latencies[-1], 1),
+        "total_s": round(sum(latencies) / 1000, 2),
+        "breaker": service.breaker.get_stats(),
+        "hedging": service.hedger.get_stats(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Circuit breaker / hedging benchmark")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=9000.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hedge", action="store_true")
+    print(json.dumps(asyncio.run(run(parser.parse_args())), indent=2))
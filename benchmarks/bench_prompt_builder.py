@@ -0,0 +1,80 @@
+# File: benchmarks/bench_prompt_builder.py
+"""
+Microbenchmark: token-budgeted prompt assembly
+
+    python -m benchmarks.bench_prompt_builder --iterations 20000 --output prompt.json
+
+Times PromptBuilder.build for the three prompt variants with empty, short and
+long histories, with and without a rolling summary.
+"""
+import argparse
+import os
+import timeit
+
+from benchmarks.report import emit
+
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACbenchmark")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from app.services.prompt_builder import prompt_builder, estimate_tokens  # noqa: E402
+
+QUESTION = "Explain the difference between TCP and UDP in simple words, with an example"
+SUMMARY = "\n".join(
+    f"- User: question {i} about networking | You: a short answer about sockets {i}"
+    for i in range(12)
+)
+
+
+def history(turns: int, chars: int = 300):
+    """Newest-first turns, as get_conversation_history returns them"""
+    return [
+        {
+            "user_message": f"earlier question {i} " + "x" * chars,
+            "ai_response": f"earlier answer {i} " + "y" * chars,
+        }
+        for i in range(turns)
+    ]
+
+
+CASES = {
+    "fresh_no_history": ("fresh", [], None),
+    "first_interaction": ("first_interaction", [], None),
+    "continuing_3_turns": ("continuing", history(3), None),
+    "continuing_3_turns_summary": ("continuing", history(3), SUMMARY),
+    "continuing_10_long_turns_summary": ("continuing", history(10, 2000), SUMMARY),
+}
+
+
+def bench(variant, turns, summary, iterations: int) -> float:
+    """Mean microseconds per build"""
+    elapsed = timeit.timeit(
+        lambda: prompt_builder.build(variant, QUESTION, turns, summary, "there"),
+        number=iterations,
+    )
+    return elapsed / iterations * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark prompt building")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, (variant, turns, summary) in CASES.items():
+        prompt = prompt_builder.build(variant, QUESTION, turns, summary, "there")
+        results[name] = {
+            "us_per_build": round(bench(variant, turns, summary, args.iterations), 3),
+            "prompt_tokens": estimate_tokens(prompt),
+        }
+
+    emit(
+        {
+            "benchmark": "prompt_builder",
+            "iterations": args.iterations,
+            "max_tokens": prompt_builder.max_tokens,
+            "cases": results,
+        },
+        args.output,
+    )
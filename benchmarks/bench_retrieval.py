@@ -0,0 +1,138 @@
+# File: benchmarks/bench_retrieval.py
+"""
+Microbenchmark: knowledge-base BM25 index build, query latency and memory
+
+    python -m benchmarks.bench_retrieval --entries 5000 --queries 5000 --output retrieval.json
+    python -m benchmarks.bench_retrieval --corpus knowledge/  # a real corpus
+
+Without --corpus a synthetic FAQ (Zipf-distributed words, so some terms
+have long postings) is written to a temporary file. Build time covers
+loading and indexing; memory is the tracemalloc peak during a second build
+and what the index keeps afterwards. Queries mix verbatim questions (direct
+answers), question fragments, paraphrases and messages with no match.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.report import emit, percentiles
+
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACbenchmark")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from app.config.settings import settings  # noqa: E402
+from app.services.knowledge_index import BM25Index, load_corpus  # noqa: E402
+
+
+def synthetic_corpus(entries: int, vocabulary: int, rng: random.Random) -> list:
+    words = [f"w{i}" for i in range(vocabulary)]
+    zipf = [1 / (rank + 1) for rank in range(vocabulary)]
+
+    def text(length: int) -> str:
+        return " ".join(rng.choices(words, weights=zipf, k=length))
+
+    return [
+        {"question": text(rng.randint(4, 10)) + "?", "answer": text(rng.randint(20, 80))}
+        for _ in range(entries)
+    ]
+
+
+def make_queries(entries, count: int, rng: random.Random) -> list:
+    queries = []
+    for i in range(count):
+        entry = rng.choice(entries)
+        words = entry.question.rstrip("?").split()
+        kind = i % 4
+        if kind == 0:
+            queries.append(entry.question)  # Verbatim question
+        elif kind == 1:
+            queries.append(" ".join(words[: max(1, len(words) // 2)]))  # Fragment
+        elif kind == 2:
+            queries.append(" ".join(rng.sample(words, len(words))) + " please explain")
+        else:
+            queries.append("completely unrelated words here")
+    return queries
+
+
+def measure_build(path: str):
+    """Time a build, then repeat it under tracemalloc (which slows allocation) for memory"""
+    started = time.perf_counter()
+    entries = load_corpus(path)
+    loaded = time.perf_counter()
+    index = BM25Index(entries, settings.KNOWLEDGE_BM25_K1, settings.KNOWLEDGE_BM25_B)
+    built = time.perf_counter()
+
+    del index
+    tracemalloc.start()
+    index = BM25Index(load_corpus(path), settings.KNOWLEDGE_BM25_K1, settings.KNOWLEDGE_BM25_B)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return index, {
+        "load_ms": round((loaded - started) * 1000, 2),
+        "index_ms": round((built - loaded) * 1000, 2),
+        "retained_kib": round(retained / 1024, 1),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark knowledge-base retrieval")
+    parser.add_argument("--corpus", help="Corpus file or directory (default: synthetic)")
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--top-k", type=int, default=settings.KNOWLEDGE_TOP_K)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    path = args.corpus
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(synthetic_corpus(args.entries, args.vocabulary, rng), f)
+    try:
+        index, build = measure_build(path)
+    finally:
+        if args.corpus is None:
+            os.remove(path)
+
+    queries = make_queries(index.entries, args.queries, rng)
+    for query in queries[:200]:
+        index.search(
+            query, args.top_k, settings.KNOWLEDGE_MIN_SCORE, settings.KNOWLEDGE_MIN_RELATIVE_SCORE
+        )
+
+    latencies_us, hits, direct = [], 0, 0
+    for query in queries:
+        started = time.perf_counter()
+        results = index.search(
+            query, args.top_k, settings.KNOWLEDGE_MIN_SCORE, settings.KNOWLEDGE_MIN_RELATIVE_SCORE
+        )
+        latencies_us.append((time.perf_counter() - started) * 1e6)
+        hits += bool(results)
+        direct += bool(results) and results[0].match >= settings.KNOWLEDGE_DIRECT_MIN_MATCH
+
+    emit(
+        {
+            "benchmark": "retrieval",
+            "corpus": args.corpus or "synthetic",
+            "entries": len(index),
+            "terms": len(index.vocab),
+            "postings": int(index.postings_docs.size),
+            "build": build,
+            "index_arrays_kib": round(index.nbytes / 1024, 1),
+            "queries": len(queries),
+            "top_k": args.top_k,
+            "query_us": percentiles(latencies_us),
+            "hit_rate": round(hits / len(queries), 3),
+            "direct_answer_rate": round(direct / len(queries), 3),
+        },
+        args.output,
+    )
@@ -0,0 +1,75 @@
+# File: benchmarks/bench_startup.py
+"""
+Cold-start benchmark: import cost of app.main and client build cost
+
+    python -m benchmarks.bench_startup --runs 5 --output startup.json
+
+Each run is a fresh interpreter, so nothing is cached in sys.modules. A run
+times `import app.main`, then builds every registered SDK client the way
+lifespan does, and reports the service registry's per-component breakdown.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from benchmarks.report import emit, percentiles
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from app.services.service_registry import service_registry
+if {build}:
+    service_registry.build_all()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "total_ms": (time.perf_counter() - started) * 1000,
+    "components": service_registry.report(),
+}}))
+"""
+
+
+def run_once(build: bool) -> dict:
+    env = dict(os.environ)
+    env.setdefault("TWILIO_ACCOUNT_SID", "ACbenchmark")
+    env.setdefault("TWILIO_AUTH_TOKEN", "benchmark")
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(build=build)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark application cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-build", action="store_true", help="Only time the imports")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    runs = [run_once(not args.no_build) for _ in range(args.runs)]
+    phases = defaultdict(list)
+    for run in runs:
+        for component, timings in run["components"].items():
+            for phase, ms in timings.items():
+                phases[f"{component}.{phase}"].append(ms)
+
+    emit(
+        {
+            "benchmark": "startup",
+            "runs": args.runs,
+            "build_clients": not args.no_build,
+            "import_ms": percentiles([run["import_ms"] for run in runs]),
+            "total_ms": percentiles([run["total_ms"] for run in runs]),
+            "components_ms": {name: percentiles(values) for name, values in sorted(phases.items())},
+        },
+        args.output,
+    )
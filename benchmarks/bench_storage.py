@@ -0,0 +1,109 @@
+# File: benchmarks/bench_storage.py
+"""
+Benchmark the conversation store backends with the same workload
+
+    python -m benchmarks.bench_storage --backend sqlite --users 200 --turns 20
+    python -m benchmarks.bench_storage --backend mongodb   # needs MONGODB_URL
+    python -m benchmarks.bench_storage --backend fake-mongo --mongo-latency-ms 1
+
+Saves turns through DatabaseService (write buffer included), then reads each
+user's recent history with the history cache off so every read hits the
+store. Reports write throughput and read latency percentiles as JSON.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.report import emit, percentiles
+
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACbenchmark")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["HISTORY_CACHE_ENABLED"] = "false"
+
+
+def make_store(args):
+    if args.backend == "sqlite":
+        from app.services.sqlite_store import SQLiteConversationStore
+
+        return SQLiteConversationStore(
+            args.sqlite_path or tempfile.mktemp(prefix="bench-", suffix=".db")
+        )
+
+    from app.services.mongo_store import MongoConversationStore
+
+    if args.backend == "fake-mongo":
+        from benchmarks.fake_mongo import FakeDatabase
+
+        return MongoConversationStore(db=FakeDatabase(args.mongo_latency_ms))
+    return MongoConversationStore()
+
+
+async def run(args) -> dict:
+    from app.services.database_service import DatabaseService
+
+    service = DatabaseService()
+    await service.connect_to_database(make_store(args))
+    users = [f"+1666{n:07d}" for n in range(args.users)]
+
+    # Writes: interleave users the way live traffic would
+    started = time.perf_counter()
+    for turn in range(args.turns):
+        for user in users:
+            await service.save_conversation(
+                user, f"question {turn} " + "x" * 120, f"answer {turn} " + "y" * 300, 800
+            )
+    await service.write_buffer.flush()
+    write_s = time.perf_counter() - started
+
+    # Reads: random users, concurrently, straight from the store
+    read_ms = []
+
+    async def read_one():
+        user = random.choice(users)
+        t0 = time.perf_counter()
+        history = await service.get_conversation_history(user, limit=args.history_limit)
+        read_ms.append((time.perf_counter() - t0) * 1000)
+        return len(history)
+
+    started = time.perf_counter()
+    for _ in range(args.reads // args.concurrency):
+        await asyncio.gather(*(read_one() for _ in range(args.concurrency)))
+    read_s = time.perf_counter() - started
+
+    if args.clean:
+        await service.clear_conversations()
+    await service.close_connection()
+
+    turns = args.users * args.turns
+    return {
+        "benchmark": "storage",
+        "backend": args.backend,
+        "turns_written": turns,
+        "write_s": round(write_s, 3),
+        "writes_per_s": round(turns / write_s, 1),
+        "write_buffer": service.write_buffer.get_stats(),
+        "reads": len(read_ms),
+        "reads_per_s": round(len(read_ms) / read_s, 1),
+        "read_latency_ms": percentiles(read_ms, digits=3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark conversation storage backends")
+    parser.add_argument("--backend", choices=["sqlite", "mongodb", "fake-mongo"], default="sqlite")
+    parser.add_argument("--sqlite-path", help="SQLite file (default: a temporary file)")
+    parser.add_argument("--mongo-latency-ms", type=float, default=1.0)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--history-limit", type=int, default=3)
+    parser.add_argument("--clean", action="store_true", help="Delete the turns afterwards")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    emit(asyncio.run(run(args)), args.output)
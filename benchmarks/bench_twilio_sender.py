@@ -0,0 +1,73 @@
+# File: benchmarks/bench_twilio_sender.py
+"""
+Benchmark WhatsAppService.send_message against the local Twilio stub
+
+    python -m benchmarks.bench_twilio_sender --messages 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+STUB_PORT = 8099
+
+# Settings are read at import time, so configure them before importing the app
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACbenchmark")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["TWILIO_API_BASE_URL"] = f"http://127.0.0.1:{STUB_PORT}"
+
+from benchmarks.twilio_stub import build_server  # noqa: E402
+from app.config.settings import settings  # noqa: E402
+from app.services.whatsapp_service import WhatsAppService  # noqa: E402
+
+
+async def run(messages: int, concurrency: int, latency_ms: float):
+    server = build_server(STUB_PORT, latency_ms)
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    settings.TWILIO_USE_HTTPX = True
+    service = WhatsAppService()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def send_one(i: int) -> bool:
+        async with semaphore:
+            started = time.perf_counter()
+            ok = await service.send_message(f"whatsapp:+1555000{i % 100:04d}", "hello")
+            latencies.append((time.perf_counter() - started) * 1000)
+            return ok
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(send_one(i) for i in range(messages)))
+    elapsed = time.perf_counter() - started
+
+    await service.close()
+    server.should_exit = True
+    await server_task
+
+    latencies.sort()
+    return {
+        "messages": messages,
+        "concurrency": concurrency,
+        "stub_latency_ms": latency_ms,
+        "succeeded": sum(results),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(messages / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Twilio send path")
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.messages, args.concurrency, args.latency_ms))
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,162 @@
+# File: benchmarks/bench_workers.py
+"""
+Throughput scaling of the multi-process server
+
+    python -m benchmarks.bench_workers --workers 1 2 4 --duration 10 --output workers.json
+
+For each worker count, starts `python -m app.server` with the offline fakes
+(benchmarks.bench_app), waits until every worker serves, then drives the
+webhook closed-loop from several load-generator processes (so the client is
+not the bottleneck) and reports requests/s and latency per worker count.
+"""
+import argparse
+import asyncio
+import itertools
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from benchmarks.report import emit, percentiles
+
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACbenchmark")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+MESSAGES = [
+    "hi",
+    "thank you so much!",
+    "which laptop is best for programming under 200k?",
+    "Explain the difference between TCP and UDP in simple words",
+    "how do I reverse a linked list in python",
+]
+
+
+async def drive(url: str, concurrency: int, duration: float, client_index: int) -> dict:
+    """Closed loop: each of `concurrency` tasks sends its next request when the last returns"""
+    import httpx
+
+    latencies, errors = [], 0
+    sids = itertools.count()
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+
+        async def loop(task_index: int):
+            nonlocal errors
+            user = f"whatsapp:+1555{client_index:03d}{task_index:04d}"
+            while time.perf_counter() < deadline:
+                n = next(sids)
+                data = {
+                    "Body": MESSAGES[n % len(MESSAGES)],
+                    "From": user,
+                    "To": "whatsapp:+14155238886",
+                    "MessageSid": f"SM{client_index:04d}{n:028d}",
+                }
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/api/v1/webhook/whatsapp", data=data)
+                    if response.status_code != 200:
+                        errors += 1
+                except Exception:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(*(loop(i) for i in range(concurrency)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def run_client(args: tuple) -> dict:
+    return asyncio.run(drive(*args))
+
+
+def wait_until_serving(url: str, server: subprocess.Popen, timeout: float = 60.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            if httpx.get(f"{url}/api/v1/health", timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def bench(workers: int, args) -> dict:
+    env = dict(
+        os.environ,
+        LOG_LEVEL="WARNING",
+        BENCH_GEMINI_LATENCY_MS=str(args.gemini_latency_ms),
+        # Measure the app, not the outbound quotas
+        GEMINI_RATE_LIMIT_RPM="1000000000",
+        GEMINI_RATE_LIMIT_BURST="1000000",
+        TWILIO_RATE_LIMIT_PER_SECOND="1000000000",
+        TWILIO_RATE_LIMIT_BURST="1000000",
+    )
+    command = [
+        sys.executable, "-m", "app.server",
+        "--app", "benchmarks.bench_app:app",
+        "--host", "127.0.0.1",
+        "--port", str(args.port),
+        "--workers", str(workers),
+    ]
+    if args.pin_cpus:
+        command.append("--pin-cpus")
+    server = subprocess.Popen(command, env=env)
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_until_serving(url, server)
+        time.sleep(args.warmup)  # Let every worker finish lifespan startup
+
+        jobs = [(url, args.concurrency, args.duration, i) for i in range(args.clients)]
+        started = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+            results = pool.map(run_client, jobs)
+        elapsed = time.perf_counter() - started
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=120)
+
+    latencies = [ms for result in results for ms in result["latencies"]]
+    return {
+        "requests": len(latencies),
+        "errors": sum(result["errors"] for result in results),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "latency_ms": percentiles(latencies),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark throughput by worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=2, help="Load-generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="In-flight requests per client")
+    parser.add_argument("--gemini-latency-ms", type=float, default=0.0)
+    parser.add_argument("--pin-cpus", action="store_true")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {str(workers): bench(workers, args) for workers in args.workers}
+    baseline = results[str(args.workers[0])]["requests_per_s"] or 1
+    for result in results.values():
+        result["speedup"] = round(result["requests_per_s"] / baseline, 2)
+
+    emit(
+        {
+            "benchmark": "workers",
+            "cpus": os.cpu_count(),
+            "duration_s": args.duration,
+            "clients": args.clients,
+            "concurrency_per_client": args.concurrency,
+            "gemini_latency_ms": args.gemini_latency_ms,
+            "results": results,
+        },
+        args.output,
+    )
@@ -0,0 +1,60 @@
+# File: benchmarks/check_query_plan.py
+"""
+Assert the history query is served by an index on a local mongod
+
+    python -m benchmarks.check_query_plan --url mongodb://localhost:27017
+
+Seeds a throwaway database, runs the index bootstrap and fails (exit 1)
+if the winning plan for the history query is a collection scan or sort.
+"""
+from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import sys
+
+from app.services.index_manager import IndexManager
+
+
+async def check(url: str, database: str, users: int, turns: int) -> bool:
+    client = AsyncIOMotorClient(url)
+    db = client[database]
+    try:
+        await db.conversations.drop()
+        now = datetime.utcnow()
+        await db.conversations.insert_many(
+            [
+                {
+                    "user_phone": f"+1555{u:07d}",
+                    "user_message": f"message {t}",
+                    "ai_response": f"reply {t}",
+                    "timestamp": now - timedelta(minutes=t),
+                    "message_type": "text",
+                }
+                for u in range(users)
+                for t in range(turns)
+            ],
+            ordered=False,
+        )
+
+        manager = IndexManager()
+        await manager.ensure_indexes(db)
+        explain = await manager.explain_history_query(db, "+15550000001")
+        uses_index = manager.plan_uses_index(explain)
+        print(f"history query uses index: {uses_index}")
+        return uses_index
+    finally:
+        await client.drop_database(database)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the history query plan")
+    parser.add_argument("--url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="whatsapp_ai_plan_check")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    ok = asyncio.run(check(args.url, args.database, args.users, args.turns))
+    sys.exit(0 if ok else 1)
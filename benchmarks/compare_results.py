@@ -0,0 +1,71 @@
+# File: benchmarks/compare_results.py
+"""
+Compare two benchmark JSON reports and flag regressions
+
+    python -m benchmarks.compare_results baseline.json current.json --threshold 10
+
+Walks both reports, pairs up numeric fields by path and prints the change.
+Latency-like fields (_ms, _us, lag, p50/p95/p99/max) regress when they go
+up; throughput-like fields (_rps, _per_s) regress when they go down. Exits
+with status 1 if anything regressed by more than the threshold percent.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Tuple
+
+LOWER_IS_BETTER = ("_ms", "_us", "_us_per_message", "us_per_build", "p50", "p95", "p99", "max", "mean_ms")
+HIGHER_IS_BETTER = ("_rps", "_per_s")
+
+
+def flatten(report: Dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for key, value in report.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, float(value)
+
+
+def direction(path: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if informational"""
+    parts = path.split(".")
+    if any(p.endswith(HIGHER_IS_BETTER) for p in parts):
+        return 1
+    if any(p.endswith(LOWER_IS_BETTER) for p in parts):
+        return -1
+    return 0
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> Dict:
+    before = dict(flatten(baseline))
+    after = dict(flatten(current))
+    changes, regressions = {}, []
+
+    for path in sorted(before.keys() & after.keys()):
+        sign = direction(path)
+        if not sign or before[path] == 0:
+            continue
+        change = (after[path] - before[path]) / before[path] * 100
+        changes[path] = {"before": before[path], "after": after[path], "change_pct": round(change, 1)}
+        if change * sign < -threshold:
+            regressions.append(path)
+
+    return {"threshold_pct": threshold, "regressions": regressions, "changes": changes}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    result = compare(baseline, current, args.threshold)
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result["regressions"] else 0)
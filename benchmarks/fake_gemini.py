@@ -0,0 +1,38 @@
+# File: benchmarks/fake_gemini.py
+"""Stand-in for genai.GenerativeModel with configurable latency and failures"""
+import asyncio
+import random
+import time
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Answers after latency_ms (+ jitter); fails with probability error_rate"""
+
+    def __init__(self, latency_ms: float = 300.0, jitter_ms: float = 0.0, error_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.calls = 0
+
+    def _latency(self) -> float:
+        return max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def _result(self, prompt: str) -> FakeResponse:
+        if random.random() < self.error_rate:
+            raise RuntimeError("fake Gemini failure")
+        return FakeResponse(f"Fake reply to a {len(prompt)}-character prompt")
+
+    async def generate_content_async(self, prompt: str, generation_config=None):
+        self.calls += 1
+        await asyncio.sleep(self._latency())
+        return self._result(prompt)
+
+    def generate_content(self, prompt: str, generation_config=None):
+        self.calls += 1
+        time.sleep(self._latency())
+        return self._result(prompt)
@@ -0,0 +1,189 @@
+# File: benchmarks/fake_mongo.py
+"""In-memory stand-in for the Motor database, covering the calls the app makes"""
+from pymongo.errors import DuplicateKeyError
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+import asyncio
+import operator
+import random
+
+# Query operators the app's filters use
+OPERATORS = {
+    "$lt": operator.lt,
+    "$lte": operator.le,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$in": lambda value, bound: value in bound,
+}
+
+
+class FakeCursor:
+    def __init__(self, collection: "FakeCollection", docs: List[Dict], projection: Optional[Dict]):
+        self.collection = collection
+        self.docs = docs
+        self.projection = projection
+        self._limit = 0
+
+    def sort(self, key, direction: int = 1):
+        # sort("field", 1) or sort([("field", 1), ...]) like Motor
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self.docs.sort(key=lambda d: d.get(field), reverse=order < 0)
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def _project(self, doc: Dict) -> Dict:
+        if not self.projection:
+            return dict(doc)
+        keep = {k for k, v in self.projection.items() if v}
+        projected = {k: v for k, v in doc.items() if k in keep}
+        if self.projection.get("_id", 1) and "_id" in doc:
+            projected["_id"] = doc["_id"]
+        return projected
+
+    async def to_list(self, length: Optional[int] = None):
+        await self.collection.delay()
+        docs = self.docs[: self._limit] if self._limit else self.docs
+        return [self._project(d) for d in docs[:length]]
+
+
+class FakeCollection:
+    """A list of documents plus an _id index, with simulated latency and failures"""
+
+    def __init__(self, latency_ms: float = 1.0, error_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.docs: Dict[object, Dict] = {}
+        self.operations = 0
+
+    async def delay(self):
+        self.operations += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        if random.random() < self.error_rate:
+            raise ConnectionError("fake Mongo failure")
+
+    def _matches(self, doc: Dict, query: Dict) -> bool:
+        for key, condition in query.items():
+            value = doc
+            for part in key.split("."):  # Dotted paths into subdocuments
+                value = value.get(part) if isinstance(value, dict) else None
+            if isinstance(condition, dict):
+                if not all(OPERATORS[op](value, bound) for op, bound in condition.items()):
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+    async def insert_one(self, document: Dict):
+        await self.delay()
+        if document["_id"] in self.docs:
+            raise DuplicateKeyError(f"duplicate _id {document['_id']}")
+        self.docs[document["_id"]] = dict(document)
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    async def insert_many(self, documents: List[Dict], ordered: bool = True):
+        await self.delay()
+        for document in documents:
+            self.docs[document["_id"]] = dict(document)
+        return SimpleNamespace(inserted_ids=[d["_id"] for d in documents])
+
+    def find(self, query: Dict, projection: Optional[Dict] = None) -> FakeCursor:
+        matches = [d for d in self.docs.values() if self._matches(d, query)]
+        return FakeCursor(self, matches, projection)
+
+    async def find_one(self, query: Dict, projection: Optional[Dict] = None, sort=None):
+        cursor = self.find(query, projection)
+        if sort:
+            cursor.sort(sort)
+        docs = await cursor.limit(1).to_list(1)
+        return docs[0] if docs else None
+
+    def aggregate(self, pipeline: List[Dict]) -> FakeCursor:
+        """$sort, $match, $limit, and $group by one field with $first of $$ROOT"""
+        docs = [dict(d) for d in self.docs.values()]
+        for stage in pipeline:
+            (name, spec), = stage.items()
+            if name == "$sort":
+                FakeCursor(self, docs, None).sort(list(spec.items()))
+            elif name == "$match":
+                docs = [d for d in docs if self._matches(d, spec)]
+            elif name == "$limit":
+                docs = docs[:spec]
+            elif name == "$group":
+                key = spec["_id"][1:]
+                field = next(f for f in spec if f != "_id")
+                groups: Dict = {}
+                for doc in docs:
+                    groups.setdefault(doc.get(key), {"_id": doc.get(key), field: doc})
+                docs = list(groups.values())
+            else:
+                raise ValueError(f"Unsupported aggregate stage {name}")
+        return FakeCursor(self, docs, None)
+
+    async def distinct(self, key: str, query: Optional[Dict] = None):
+        await self.delay()
+        values = (d.get(key) for d in self.docs.values() if self._matches(d, query or {}))
+        return list(dict.fromkeys(values))
+
+    async def update_one(self, query: Dict, update: Dict, upsert: bool = False):
+        await self.delay()
+        doc = next((d for d in self.docs.values() if self._matches(d, query)), None)
+        if doc is None:
+            if not upsert:
+                return SimpleNamespace(matched_count=0)
+            doc = self.docs[query.get("_id")] = dict(query)
+        doc.update(update.get("$set", {}))
+        for key, amount in update.get("$inc", {}).items():
+            doc[key] = doc.get(key, 0) + amount
+        return SimpleNamespace(matched_count=1)
+
+    async def find_one_and_update(self, query: Dict, update: Dict, sort=None, return_document=None):
+        """Atomic here for free: the event loop never switches inside it"""
+        await self.delay()
+        matches = [d for d in self.docs.values() if self._matches(d, query)]
+        for key, direction in reversed(sort or []):
+            matches.sort(key=lambda d: d.get(key), reverse=direction < 0)
+        if not matches:
+            return None
+        doc = matches[0]
+        doc.update(update.get("$set", {}))
+        for key, amount in update.get("$inc", {}).items():
+            doc[key] = doc.get(key, 0) + amount
+        return dict(doc)
+
+    async def delete_one(self, query: Dict):
+        await self.delay()
+        doc = next((d for d in self.docs.values() if self._matches(d, query)), None)
+        if doc is not None:
+            del self.docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=int(doc is not None))
+
+    async def delete_many(self, query: Dict):
+        await self.delay()
+        doomed = [k for k, d in self.docs.items() if self._matches(d, query)]
+        for key in doomed:
+            del self.docs[key]
+        return SimpleNamespace(deleted_count=len(doomed))
+
+
+class FakeDatabase:
+    """Collections are created on first attribute access, like Motor"""
+
+    def __init__(self, latency_ms: float = 1.0, error_rate: float = 0.0):
+        self._latency_ms = latency_ms
+        self._error_rate = error_rate
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self._latency_ms, self._error_rate)
+        return self._collections[name]
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        return getattr(self, name)
@@ -0,0 +1,39 @@
+# File: benchmarks/fake_twilio.py
+"""In-process stand-in for the Twilio Messages API call"""
+from typing import Callable, Optional
+import asyncio
+import itertools
+import random
+import time
+
+
+class FakeTwilioSender:
+    """
+    Replaces WhatsAppService._send_via_http: waits latency_ms (+ jitter),
+    fails with probability error_rate, and reports each delivered body to
+    on_sent so callers can measure end-to-end latency.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 80.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        on_sent: Optional[Callable[[str, str, float], None]] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.on_sent = on_sent
+        self.sent = 0
+        self._sids = itertools.count(1)
+
+    async def __call__(self, to_whatsapp: str, message: str) -> str:
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        await asyncio.sleep(max(0.0, delay) / 1000)
+        if random.random() < self.error_rate:
+            raise ConnectionError("fake Twilio failure")
+        self.sent += 1
+        if self.on_sent is not None:
+            self.on_sent(to_whatsapp, message, time.perf_counter())
+        return f"SM{next(self._sids):032d}"
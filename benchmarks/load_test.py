@@ -0,0 +1,232 @@
+# File: benchmarks/load_test.py
+"""
+Offline load test of the WhatsApp webhook
+
+    python -m benchmarks.load_test --rps 200 --duration 20 --users 500
+    python -m benchmarks.load_test --rps 500 --ack-mode --gemini-latency-ms 1200 --output run.json
+    python -m benchmarks.load_test --rps 200 --storage sqlite
+
+Drives POST /api/v1/webhook/whatsapp in-process at a fixed arrival rate (open
+loop, so a slow server does not slow the load down). Gemini, Twilio and Mongo
+are replaced by local fakes with configurable latency and error rates (or,
+with --storage sqlite, the real embedded store on a temporary file); all the
+app's own code (scheduler, caches, write buffer, limiters) runs as-is.
+
+Reports throughput, HTTP and end-to-end latency percentiles, event-loop lag
+and per-stage timings from the metrics registry as JSON.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict, deque
+
+from benchmarks.report import emit, percentiles
+
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACbenchmark")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+MESSAGES = [
+    "hi",
+    "Assalamu Alaikum",
+    "thank you so much!",
+    "kya haal hai",
+    "which laptop is best for programming under 200k?",
+    "Explain the difference between TCP and UDP in simple words",
+    "mujhe apne assignment mein madad chahiye, deadline kal hai",
+    "What are some good habits for learning a new language?",
+    "Can you summarize the causes of the first world war?",
+    "how do I reverse a linked list in python",
+]
+
+
+async def monitor_loop_lag(samples: list, interval: float, stop: asyncio.Event):
+    """Record how late the loop wakes a sleeper (ms beyond the interval)"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, (time.perf_counter() - started - interval) * 1000))
+
+
+def stage_timings() -> dict:
+    """Mean latency and count per pipeline stage from the metrics registry"""
+    from app.services.metrics import stage_duration, stage_errors
+
+    timings = {}
+    for (stage, provider), series in stage_duration.series.items():
+        if series.count:
+            timings[f"{stage}/{provider}"] = {
+                "count": series.count,
+                "mean_ms": round(series.sum / series.count * 1000, 3),
+            }
+    errors = {stage: s.value for (stage,), s in stage_errors.series.items() if s.value}
+    return {"stages": timings, "errors": errors}
+
+
+def make_store(args):
+    """Conversation store for the --storage choice"""
+    if args.storage == "sqlite":
+        from app.services.sqlite_store import SQLiteConversationStore
+
+        path = args.sqlite_path or tempfile.mktemp(prefix="bench-", suffix=".db")
+        return SQLiteConversationStore(path)
+
+    from app.services.mongo_store import MongoConversationStore
+    from benchmarks.fake_mongo import FakeDatabase
+
+    return MongoConversationStore(db=FakeDatabase(args.mongo_latency_ms, args.mongo_error_rate))
+
+
+async def run(args) -> dict:
+    import httpx
+    from app.main import app
+    from app.routes import webhook
+    from app.config.settings import settings
+    from app.services.ai_service import ai_service
+    from app.services.database_service import db_service
+    from app.services.whatsapp_service import whatsapp_service
+    from app.services.message_queue import message_queue
+    from app.services.message_coalescer import message_coalescer
+    from app.services.idempotency_service import idempotency_service
+    from app.services.summary_service import summary_service
+    from app.services.llm_executor import llm_executor
+    from benchmarks.fake_gemini import FakeGenerativeModel
+    from benchmarks.fake_twilio import FakeTwilioSender
+
+    # End-to-end latency: each send completes the user's oldest pending message
+    pending_sends = defaultdict(deque)
+    e2e_ms = []
+
+    def on_sent(to_whatsapp: str, message: str, at: float):
+        queue = pending_sends.get(to_whatsapp)
+        if queue:
+            e2e_ms.append((at - queue.popleft()) * 1000)
+
+    # Plug the fakes in where the real clients would be
+    await db_service.connect_to_database(make_store(args))
+    idempotency_service.start(db_service.collection("processed_messages"))
+    summary_service.start(db_service.collection("conversation_summaries"))
+    ai_service.model = FakeGenerativeModel(
+        args.gemini_latency_ms, args.gemini_jitter_ms, args.gemini_error_rate
+    )
+    settings.TWILIO_USE_HTTPX = True
+    whatsapp_service._send_via_http = FakeTwilioSender(
+        args.twilio_latency_ms, args.twilio_jitter_ms, args.twilio_error_rate, on_sent
+    )
+    await message_queue.start(webhook.process_message)
+
+    lag_ms = []
+    stop_monitor = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop_lag(lag_ms, 0.005, stop_monitor))
+
+    statuses = Counter()
+    http_ms = []
+    total = int(args.rps * args.duration)
+    sid_counter = itertools.count(1)
+    users = [f"+1555{n:07d}" for n in range(args.users)]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def send_one():
+            from_number = f"whatsapp:{random.choice(users)}"
+            data = {
+                "Body": random.choice(MESSAGES),
+                "From": from_number,
+                "To": "whatsapp:+14155238886",
+                "MessageSid": f"SM{next(sid_counter):032d}",
+            }
+            started = time.perf_counter()
+            pending_sends[from_number].append(started)
+            try:
+                response = await client.post("/api/v1/webhook/whatsapp", data=data)
+                statuses[response.status_code] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            http_ms.append((time.perf_counter() - started) * 1000)
+
+        tasks = []
+        started = time.perf_counter()
+        for i in range(total):
+            # Open loop: request i goes out at i / rps whatever the server is doing
+            delay = started + i / args.rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send_one()))
+        await asyncio.gather(*tasks)
+        sent_s = time.perf_counter() - started
+
+        # Ack mode: replies are still being produced after the HTTP responses
+        await message_coalescer.flush_all()
+        await message_queue.stop(timeout=args.drain_timeout)
+        elapsed = time.perf_counter() - started
+
+    stop_monitor.set()
+    await monitor
+    await summary_service.stop()
+    await db_service.close_connection()
+    llm_executor.shutdown()
+
+    return {
+        "benchmark": "load_test",
+        "config": {
+            "target_rps": args.rps,
+            "duration_s": args.duration,
+            "users": args.users,
+            "ack_mode": settings.WEBHOOK_ACK_MODE,
+            "storage": args.storage,
+            "coalesce_window_ms": settings.COALESCE_WINDOW_MS,
+            "gemini_latency_ms": args.gemini_latency_ms,
+            "gemini_error_rate": args.gemini_error_rate,
+            "twilio_latency_ms": args.twilio_latency_ms,
+            "twilio_error_rate": args.twilio_error_rate,
+            "mongo_latency_ms": args.mongo_latency_ms,
+            "mongo_error_rate": args.mongo_error_rate,
+        },
+        "requests": total,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "achieved_rps": round(total / sent_s, 1),
+        "throughput_replies_per_s": round(len(e2e_ms) / elapsed, 1),
+        "replies_sent": len(e2e_ms),
+        "elapsed_s": round(elapsed, 2),
+        "http_latency_ms": percentiles(http_ms),
+        "end_to_end_latency_ms": percentiles(e2e_ms),
+        "loop_lag_ms": percentiles(lag_ms),
+        "model_calls": ai_service.model.calls,
+        "pipeline": stage_timings(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline webhook load test")
+    parser.add_argument("--rps", type=float, default=100.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--ack-mode", action="store_true")
+    parser.add_argument("--coalesce-window-ms", type=int, default=None)
+    parser.add_argument("--gemini-latency-ms", type=float, default=800.0)
+    parser.add_argument("--gemini-jitter-ms", type=float, default=300.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--twilio-latency-ms", type=float, default=80.0)
+    parser.add_argument("--twilio-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--twilio-error-rate", type=float, default=0.0)
+    parser.add_argument("--mongo-latency-ms", type=float, default=2.0)
+    parser.add_argument("--mongo-error-rate", type=float, default=0.0)
+    parser.add_argument("--storage", choices=["fake-mongo", "sqlite"], default="fake-mongo")
+    parser.add_argument("--sqlite-path", help="SQLite file (default: a temporary file)")
+    parser.add_argument("--drain-timeout", type=float, default=60.0)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so apply overrides before the app loads
+    os.environ["WEBHOOK_ACK_MODE"] = str(args.ack_mode).lower()
+    os.environ["LOG_LEVEL"] = args.log_level
+    if args.coalesce_window_ms is not None:
+        os.environ["COALESCE_WINDOW_MS"] = str(args.coalesce_window_ms)
+
+    emit(asyncio.run(run(args)), args.output)
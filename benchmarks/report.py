@@ -0,0 +1,39 @@
+# File: benchmarks/report.py
+"""Shared helpers for benchmark reports"""
+from typing import Dict, List, Optional
+import json
+import platform
+import sys
+import time
+
+
+def percentiles(values: List[float], digits: int = 2) -> Dict[str, Optional[float]]:
+    """p50/p95/p99/max of a list of samples"""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], digits)
+
+    return {
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], digits),
+    }
+
+
+def emit(report: Dict, output: Optional[str] = None):
+    """Print the report as JSON and optionally save it for later comparison"""
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        **report,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
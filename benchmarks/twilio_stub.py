@@ -0,0 +1,65 @@
+# File: benchmarks/twilio_stub.py
+"""
+Minimal stand-in for the Twilio Messages API
+
+Run it and point TWILIO_API_BASE_URL at it to exercise the send path offline:
+    python -m benchmarks.twilio_stub --port 8099 --latency-ms 80
+"""
+from fastapi import FastAPI, Form
+from fastapi.responses import JSONResponse
+import argparse
+import asyncio
+import itertools
+import uvicorn
+
+STUB_LATENCY_MS = 0.0
+
+app = FastAPI(title="Twilio stub")
+_sid_counter = itertools.count(1)
+
+
+@app.get("/2010-04-01/Accounts/{account_sid}.json")
+async def fetch_account(account_sid: str):
+    """Account lookup the sender's warm-up check makes"""
+    return {"sid": account_sid, "status": "active"}
+
+
+@app.post("/2010-04-01/Accounts/{account_sid}/Messages.json")
+async def create_message(
+    account_sid: str,
+    Body: str = Form(...),
+    From: str = Form(...),
+    To: str = Form(...),
+):
+    """Accept a message the way Twilio does and return a fake SID"""
+    if STUB_LATENCY_MS:
+        await asyncio.sleep(STUB_LATENCY_MS / 1000)
+
+    return JSONResponse(
+        status_code=201,
+        content={
+            "sid": f"SM{next(_sid_counter):032d}",
+            "account_sid": account_sid,
+            "from": From,
+            "to": To,
+            "body": Body,
+            "status": "queued",
+        },
+    )
+
+
+def build_server(port: int, latency_ms: float = 0.0) -> uvicorn.Server:
+    """Uvicorn server for the stub, ready to serve() inside an existing loop"""
+    global STUB_LATENCY_MS
+    STUB_LATENCY_MS = latency_ms
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    return uvicorn.Server(config)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Twilio API stub")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    asyncio.run(build_server(args.port, args.latency_ms).serve())
@@ -0,0 +1,36 @@
+# File: tests/conftest.py
+"""Shared fixtures; settings need credentials before any app module is imported"""
+import asyncio
+import os
+
+import pytest
+
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACtest")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "test")
+os.environ.setdefault("GEMINI_API_KEY", "test")
+# One process, as under plain uvicorn: quotas unsplit, per-user caches on
+os.environ.setdefault("SERVER_WORKERS", "1")
+
+
+@pytest.fixture(params=["sqlite", "mongodb"])
+def with_store(request, tmp_path):
+    """Run an async check against a fresh store of each backend"""
+    from app.services.mongo_store import MongoConversationStore
+    from app.services.sqlite_store import SQLiteConversationStore
+    from benchmarks.fake_mongo import FakeDatabase
+
+    def run(check):
+        async def main():
+            if request.param == "sqlite":
+                store = SQLiteConversationStore(str(tmp_path / "store.db"))
+            else:
+                store = MongoConversationStore(db=FakeDatabase(latency_ms=0))
+            await store.connect()
+            try:
+                return await check(store)
+            finally:
+                await store.close()
+
+        return asyncio.run(main())
+
+    return run
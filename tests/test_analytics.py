@@ -0,0 +1,104 @@
+# File: tests/test_analytics.py
+"""Hourly rollups: increments, percentiles and a re-runnable backfill"""
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.services.analytics_service import (
+    AnalyticsService,
+    hour_key,
+    latency_percentile,
+    rollup_increments,
+)
+
+
+def turn(user_phone: str, at: datetime, response_time_ms=120, message_type="text") -> dict:
+    return {
+        "_id": ObjectId(),
+        "user_phone": user_phone,
+        "user_message": "hello",
+        "ai_response": "" if message_type == "coalesced" else "hi",
+        "timestamp": at,
+        "response_time_ms": response_time_ms,
+        "message_type": message_type,
+        "provider": "gemini",
+    }
+
+
+def test_rollup_increments():
+    now = datetime.utcnow()
+    assert rollup_increments(turn("+1", now)) == {
+        "messages": 1,
+        "provider_gemini": 1,
+        "response_time_sum": 120,
+        "response_time_count": 1,
+        "latency_le_250": 1,
+    }
+    assert rollup_increments(turn("+1", now, response_time_ms=None)) == {
+        "messages": 1,
+        "provider_gemini": 1,
+    }
+    assert rollup_increments(turn("+1", now, response_time_ms=60000))["latency_le_inf"] == 1
+
+
+def test_latency_percentile():
+    bucket = {"response_time_count": 20, "latency_le_100": 18, "latency_le_1000": 2}
+    assert latency_percentile(bucket, 0.5) == 100
+    assert latency_percentile(bucket, 0.95) == 1000
+    assert latency_percentile({}, 0.95) is None
+
+
+def test_coalesced_burst_counts_one_reply(with_store):
+    async def check(store):
+        analytics = AnalyticsService()
+        analytics.rollups = store.collection("conversation_rollups")
+        analytics.markers = store.collection("analytics_markers")
+
+        # A 3-message burst: Gemini was called once, for the last turn
+        now = datetime.utcnow()
+        analytics.record(turn("+1", now, message_type="coalesced"))
+        analytics.record(turn("+1", now, message_type="coalesced"))
+        analytics.record(turn("+1", now, response_time_ms=3000))
+        await analytics.flush()
+
+        summary = await analytics.get_summary(hours=1)
+        assert summary["messages"] == 3
+        assert summary["provider_mix"] == {"gemini": 1}
+        assert summary["avg_response_time_ms"] == 3000
+        assert summary["p95_response_time_ms"] == 4000
+        assert summary["active_users_last_hour"] == 1
+
+    with_store(check)
+
+
+def test_backfill_can_be_rerun(with_store):
+    async def check(store):
+        analytics = AnalyticsService()
+        analytics.rollups = store.collection("conversation_rollups")
+        analytics.markers = store.collection("analytics_markers")
+
+        earlier = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=3)
+        await store.conversations.insert_many(
+            [
+                turn("+1", earlier),
+                turn("+1", earlier + timedelta(minutes=5), message_type="coalesced"),
+                turn("+2", earlier + timedelta(minutes=10), response_time_ms=900),
+            ]
+        )
+
+        buckets = []
+        for _ in range(2):
+            analytics.start_backfill(store)
+            await analytics.backfill_task
+            assert analytics.backfill_status["state"] == "done"
+            bucket = await analytics.rollups.find_one({"_id": hour_key(earlier)})
+            bucket.pop("updated_at")
+            buckets.append(bucket)
+
+        assert buckets[0] == buckets[1]
+        assert buckets[0]["messages"] == 3
+        assert buckets[0]["provider_gemini"] == 2
+        assert buckets[0]["response_time_sum"] == 1020
+        assert buckets[0]["active_users"] == 2
+
+    with_store(check)
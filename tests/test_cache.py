@@ -0,0 +1,78 @@
+# File: tests/test_cache.py
+"""LRU bounds and TTL, and the write-through history cache"""
+import time
+
+from app.services.cache import LRUCache
+from app.services.database_service import DatabaseService
+from app.services.metrics import stage_duration
+
+
+def test_evicts_least_recently_used_by_count():
+    cache = LRUCache(max_entries=2, max_bytes=10_000, ttl_seconds=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "b" is now the oldest
+    cache.set("c", "3")
+    assert "b" not in cache
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.evictions == 1
+
+
+def test_evicts_by_bytes():
+    cache = LRUCache(max_entries=100, max_bytes=25, ttl_seconds=60, sizeof=len)
+    cache.set("a", "x" * 10)
+    cache.set("b", "x" * 10)
+    cache.set("c", "x" * 10)
+    assert "a" not in cache and len(cache) == 2
+    assert cache.current_bytes == 20
+
+    # Replacing a value resizes it; one bigger than the budget is not kept
+    cache.set("b", "x" * 5)
+    assert cache.current_bytes == 15
+    cache.set("d", "x" * 30)
+    assert "d" not in cache and cache.current_bytes == 15
+
+
+def test_entries_expire_after_ttl():
+    cache = LRUCache(max_entries=10, max_bytes=10_000, ttl_seconds=0.01)
+    cache.set("a", "1")
+    assert cache.get("a") == "1"
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.expirations == 1 and cache.current_bytes == 0
+
+
+def make_db(store) -> DatabaseService:
+    """Service on an open store, writing directly (no write-behind buffer)"""
+    db = DatabaseService()
+    db.store = store
+    db._fetch_time = stage_duration.labels("history_fetch", store.backend)
+    db._save_time = stage_duration.labels("db_save", store.backend)
+    return db
+
+
+def test_saved_turns_are_written_through_to_cached_history(with_store):
+    async def check(store):
+        db = make_db(store)
+        assert db.cache_history
+        await db.save_conversation("+1", "first", "reply 1")
+        assert "+1" not in db.history_cache  # Never cached a history it has not read
+
+        assert [t["user_message"] for t in await db.get_conversation_history("+1", 2)] == ["first"]
+        await db.save_conversation("+1", "second", "reply 2")
+        await db.save_conversation("+1", "third", "reply 3")
+
+        hits = db.history_cache.hits
+        history = await db.get_conversation_history("+1", 2)
+        assert db.history_cache.hits == hits + 1
+        # Newest first and cut to the cached limit, as the store returns it
+        assert [t["user_message"] for t in history] == ["third", "second"]
+        assert history == [
+            {k: t[k] for k in ("user_message", "ai_response", "timestamp")}
+            for t in await store.recent_history("+1", 2)
+        ]
+
+        # A bigger limit than was cached goes back to the store
+        assert len(await db.get_conversation_history("+1", 5)) == 3
+
+    with_store(check)
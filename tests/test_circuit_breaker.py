@@ -0,0 +1,167 @@
+# File: tests/test_circuit_breaker.py
+"""Breaker state transitions and hedging past the tracked percentile"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import circuit_breaker
+from app.services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    Hedger,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def make_breaker(**overrides) -> CircuitBreaker:
+    options = dict(
+        window_size=10,
+        min_calls=4,
+        error_rate=0.5,
+        slow_call_ms=1000,
+        slow_rate=0.8,
+        open_seconds=30,
+        half_open_probes=2,
+    )
+    options.update(overrides)
+    return CircuitBreaker("test", **options)
+
+
+def test_trips_on_error_rate_and_fails_fast(clock):
+    breaker = make_breaker()
+    for failed in (False, True, False):
+        assert breaker.allow()
+        breaker.record(10, failed)
+    assert breaker.state == CLOSED  # Under min_calls
+
+    assert breaker.allow()
+    breaker.record(10, failed=True)
+    assert breaker.state == OPEN
+    assert breaker.trips == 1
+
+    assert not breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.reject_if_open()
+    assert breaker.rejected == 2
+
+
+def test_trips_on_slow_calls(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.allow()
+        breaker.record(1500, failed=False)
+    assert breaker.state == OPEN
+
+
+def test_half_open_probes_close_the_breaker(clock):
+    breaker = make_breaker()
+    breaker._trip()
+
+    clock.now += 30
+    breaker.reject_if_open()  # Cooldown over: no longer rejects
+    assert breaker.allow() and breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # Both probe slots taken
+
+    breaker.record(10, failed=False)
+    assert breaker.state == HALF_OPEN
+    breaker.record(10, failed=False)
+    assert breaker.state == CLOSED
+    assert breaker.rates() == (0.0, 0.0)
+
+
+def test_failed_probe_reopens(clock):
+    breaker = make_breaker()
+    breaker._trip()
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record(10, failed=True)
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+    assert not breaker.allow()  # A fresh cooldown
+
+
+def test_cancelled_probe_frees_its_slot(clock):
+    breaker = make_breaker(half_open_probes=1)
+    breaker._trip()
+    clock.now += 30
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def check():
+        probe = asyncio.ensure_future(breaker.call(hang))
+        await asyncio.sleep(0)
+        assert breaker.probes_in_flight == 1
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        assert breaker.probes_in_flight == 0
+
+    asyncio.run(check())
+
+
+def primed_hedger(latency_ms: float) -> Hedger:
+    hedger = Hedger(percentile=0.95, min_delay_ms=0)
+    for _ in range(hedger.latency.refresh_every):
+        hedger.latency.add(latency_ms)
+    return hedger
+
+
+def test_hedges_only_past_the_percentile():
+    async def check():
+        hedger = primed_hedger(20)
+        assert hedger.delay_ms() == 20
+
+        calls = []
+
+        async def attempt():
+            calls.append(len(calls) + 1)
+            number = calls[-1]
+            # The first attempt is stuck; the backup answers quickly
+            await asyncio.sleep(1 if number == 1 else 0.001)
+            return f"reply {number}"
+
+        assert await hedger.call(attempt) == "reply 2"
+        assert (hedger.hedges, hedger.hedge_wins) == (1, 1)
+
+        async def fast():
+            return "fast"
+
+        assert await hedger.call(fast) == "fast"
+        assert hedger.hedges == 1
+
+    asyncio.run(check())
+
+
+def test_no_hedging_until_latency_is_known():
+    async def check():
+        hedger = Hedger(percentile=0.95, min_delay_ms=0)
+        assert hedger.delay_ms() is None
+
+        async def slow():
+            await asyncio.sleep(0.01)
+            return "slow"
+
+        assert await hedger.call(slow) == "slow"
+        assert hedger.hedges == 0
+
+    asyncio.run(check())
@@ -0,0 +1,76 @@
+# File: tests/test_export.py
+"""Paged NDJSON export: page boundaries, resume cursors and gzip framing"""
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.config.settings import settings
+from app.services.export_service import ExportService, decode_cursor
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+def turn(user_phone: str, minute: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "user_phone": user_phone,
+        "user_message": f"message {minute}",
+        "ai_response": f"reply {minute}",
+        "timestamp": START + timedelta(minutes=minute),
+        "response_time_ms": 10,
+        "message_type": "text",
+        "provider": "gemini",
+    }
+
+
+@pytest.fixture
+def pages_of_two(monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+
+
+async def collect(store, **options):
+    return [chunk async for chunk in ExportService().stream(store, **options)]
+
+
+def records(chunks) -> list:
+    return [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+
+
+def test_export_resumes_across_page_boundaries(with_store, pages_of_two):
+    async def check(store):
+        await store.conversations.insert_many(
+            [turn("+1", minute) for minute in range(5)] + [turn("+2", 9)]
+        )
+
+        chunks = await collect(store, user_phone="+1")
+        assert len(chunks) == 3  # One chunk per page of two
+        exported = records(chunks)
+        assert [r["user_message"] for r in exported] == [f"message {m}" for m in range(5)]
+
+        # Resume after the last record of the first page
+        resumed = records(await collect(store, user_phone="+1", cursor=exported[1]["cursor"]))
+        assert resumed == exported[2:]
+
+        everyone = records(await collect(store))
+        assert len(everyone) == 6
+
+        with pytest.raises(ValueError):
+            decode_cursor("not-an-id", store)
+
+    with_store(check)
+
+
+def test_gzip_export_is_one_stream(with_store, pages_of_two):
+    async def check(store):
+        await store.conversations.insert_many([turn("+1", minute) for minute in range(5)])
+
+        plain = b"".join(await collect(store))
+        compressed = await collect(store, compress=True)
+        # Pages are compressed into a single gzip member, ended by the flush
+        assert gzip.decompress(b"".join(compressed)) == plain
+        assert compressed[0][:2] == b"\x1f\x8b"
+
+    with_store(check)
@@ -0,0 +1,88 @@
+# File: tests/test_idempotency.py
+"""MessageSid deduplication: claims, in-flight retries, duplicates and releases"""
+import asyncio
+
+import pytest
+
+from app.services.idempotency_service import (
+    DUPLICATE,
+    DUPLICATE_RESPONSE,
+    IN_FLIGHT,
+    NEW,
+    IdempotencyService,
+)
+
+
+def make_service(store, max_recent: int = 100) -> IdempotencyService:
+    service = IdempotencyService(max_recent=max_recent)
+    service.start(store.collection("processed_messages"))
+    return service
+
+
+def test_retry_in_flight_gets_the_original_result(with_store):
+    async def check(store):
+        service = make_service(store)
+        assert await service.claim("SM1") == (NEW, None)
+
+        claim, pending = await service.claim("SM1")
+        assert claim == IN_FLIGHT
+        waiter = asyncio.ensure_future(asyncio.shield(pending))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        result = {"status": "success", "response": "Hello!"}
+        service.complete(["SM1"], result)
+        assert await waiter == result
+        assert service.in_flight_hits == 1 and service.in_flight == {}
+
+    with_store(check)
+
+
+def test_completed_sid_is_a_duplicate(with_store):
+    async def check(store):
+        service = make_service(store)
+        await service.claim("SM1")
+        service.complete(["SM1"], {"status": "success"})
+        assert await service.claim("SM1") == (DUPLICATE, None)
+        assert service.memory_duplicates == 1
+
+        # Another worker (or this one after a restart) sees the stored claim
+        restarted = make_service(store)
+        assert await restarted.claim("SM1") == (DUPLICATE, None)
+        assert restarted.db_duplicates == 1
+        assert await restarted.claim("SM1") == (DUPLICATE, None)  # Now remembered
+        assert restarted.memory_duplicates == 1
+
+    with_store(check)
+
+
+def test_failed_attempt_releases_the_sid(with_store):
+    async def check(store):
+        service = make_service(store)
+        await service.claim("SM1")
+        _, pending = await service.claim("SM1")
+
+        error = RuntimeError("Message queue is full")
+        await service.release(["SM1"], error)
+        with pytest.raises(RuntimeError):
+            await pending  # The waiting retry fails instead of hanging
+
+        # Twilio's next retry is processed afresh, here and in other workers
+        assert await make_service(store).claim("SM1") == (NEW, None)
+
+    with_store(check)
+
+
+def test_recent_sids_are_bounded(with_store):
+    async def check(store):
+        service = make_service(store, max_recent=2)
+        for sid in ("SM1", "SM2", "SM3"):
+            await service.claim(sid)
+        service.complete(["SM1", "SM2", "SM3"], DUPLICATE_RESPONSE)
+        assert list(service.recent) == ["SM2", "SM3"]
+
+        # The oldest falls back to the stored claim
+        assert await service.claim("SM1") == (DUPLICATE, None)
+        assert service.db_duplicates == 1
+
+    with_store(check)
@@ -0,0 +1,80 @@
+# File: tests/test_index_manager.py
+"""The history query must be served by the user_phone_timestamp index"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.index_manager import IndexManager
+
+IXSCAN = {
+    "stage": "IXSCAN",
+    "keyPattern": {"user_phone": 1, "timestamp": -1},
+    "indexName": "user_phone_timestamp",
+}
+
+
+def explain(plan: dict, sbe: bool = False) -> dict:
+    winning = {"queryPlan": plan, "slotBasedPlan": {}} if sbe else plan
+    return {"queryPlanner": {"winningPlan": winning}}
+
+
+def scanned_indexes(explain: dict) -> set:
+    plan = explain["queryPlanner"]["winningPlan"]
+    pending, names = [plan.get("queryPlan", plan)], set()
+    while pending:
+        stage = pending.pop()
+        if stage.get("stage") == "IXSCAN":
+            names.add(stage["indexName"])
+        pending.extend([stage["inputStage"]] if "inputStage" in stage else [])
+        pending.extend(stage.get("inputStages", []))
+    return names
+
+
+def test_index_scan_without_sort_passes():
+    fetch = {"stage": "FETCH", "inputStage": IXSCAN}
+    plan = {"stage": "LIMIT", "inputStage": {"stage": "PROJECTION_SIMPLE", "inputStage": fetch}}
+    assert IndexManager.plan_uses_index(explain(plan))
+    # Newer servers nest the classic plan under queryPlan
+    assert IndexManager.plan_uses_index(explain(plan, sbe=True))
+    assert scanned_indexes(explain(plan, sbe=True)) == {"user_phone_timestamp"}
+
+
+def test_collection_scan_or_blocking_sort_fails():
+    collscan = {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}
+    assert not IndexManager.plan_uses_index(explain(collscan))
+
+    # An index on user_phone alone still needs an in-memory sort
+    sorted_ixscan = {"stage": "SORT", "inputStage": {"stage": "FETCH", "inputStage": IXSCAN}}
+    assert not IndexManager.plan_uses_index(explain(sorted_ixscan))
+
+
+@pytest.mark.skipif(
+    not os.environ.get("MONGODB_TEST_URL"), reason="Set MONGODB_TEST_URL to check a live mongod"
+)
+def test_live_history_plan_uses_compound_index():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    async def check():
+        client = AsyncIOMotorClient(os.environ["MONGODB_TEST_URL"])
+        db = client["whatsapp_ai_plan_test"]
+        try:
+            now = datetime.utcnow()
+            await db.conversations.insert_many(
+                [
+                    {"user_phone": f"+1555{u:07d}", "timestamp": now - timedelta(minutes=t)}
+                    for u in range(50)
+                    for t in range(20)
+                ]
+            )
+            manager = IndexManager()
+            await manager.ensure_indexes(db)
+            result = await manager.explain_history_query(db, "+15550000001")
+            assert IndexManager.plan_uses_index(result)
+            assert scanned_indexes(result) == {"user_phone_timestamp"}
+        finally:
+            await client.drop_database("whatsapp_ai_plan_test")
+            client.close()
+
+    asyncio.run(check())
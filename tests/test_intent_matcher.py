@@ -0,0 +1,47 @@
+# File: tests/test_intent_matcher.py
+"""Small-talk intents match whole words, in every script the keywords use"""
+import pytest
+
+from app.services.intent_matcher import IntentMatcher, intent_matcher, tokenize
+
+
+def test_keywords_match_whole_words_only():
+    assert intent_matcher.classify("hi").primary == "greeting"
+    assert intent_matcher.classify("this is a question").intents == ()
+    assert intent_matcher.classify("which shipping options exist").intents == ()
+    assert intent_matcher.classify("Hi!! 😊").confidence == 1.0
+
+
+@pytest.mark.parametrize(
+    "message, intent",
+    [
+        ("नमस्ते", "greeting"),
+        ("शुक्रिया जी", "thanks"),
+        ("धन्यवाद", "thanks"),
+        ("अलविदा", "farewell"),
+        ("मदद", "help"),
+        ("السلام علیکم", "islamic_greeting"),
+        ("شکریہ!", "thanks"),
+        ("خدا حافظ", "farewell"),
+        ("آپ کیسے ہیں؟", "wellbeing"),
+    ],
+)
+def test_hindi_and_urdu_keywords(message, intent):
+    match = intent_matcher.classify(message)
+    assert match.primary == intent
+    assert match.confidence == 1.0
+
+
+def test_devanagari_words_stay_whole():
+    # \w+ split these at vowel signs and virama: ['नमस', 'त'], ['श', 'क', 'र', 'य']
+    assert tokenize("नमस्ते, शुक्रिया!") == ["नमस्ते", "शुक्रिया"]
+
+    # A one-letter fragment of a keyword must not match on its own
+    matcher = IntentMatcher({"greeting": ["नमस्ते"]})
+    assert matcher.classify("त").intents == ()
+    assert matcher.classify("नमस्कार").intents == ()
+
+
+def test_confidence_is_the_share_of_covered_words():
+    assert intent_matcher.classify("thanks a lot bro").confidence == 1.0
+    assert intent_matcher.classify("thanks, where is my order").confidence == pytest.approx(0.2)
@@ -0,0 +1,92 @@
+# File: tests/test_message_coalescer.py
+"""Debounce windows: restart, max wait, max messages and result fan-out"""
+import asyncio
+
+import pytest
+
+from app.models.message import InboundMessage
+from app.services.message_coalescer import MessageCoalescer
+
+
+def message(body: str, user_phone: str = "+1") -> InboundMessage:
+    return InboundMessage(user_phone=user_phone, from_number=f"whatsapp:{user_phone}", body=body)
+
+
+class Handler:
+    def __init__(self):
+        self.bursts = []
+
+    async def __call__(self, merged: InboundMessage):
+        self.bursts.append([m.body for m in merged.coalesced] or [merged.body])
+        return {"reply": merged.body}
+
+
+def test_window_restarts_and_every_message_gets_the_result():
+    async def check():
+        coalescer = MessageCoalescer(window_ms=50, max_wait_ms=1000, max_messages=10)
+        handler = Handler()
+        futures = []
+        for body in ("a", "b", "c"):
+            futures.append(coalescer.submit(message(body), handler))
+            await asyncio.sleep(0.03)  # Shorter than the window: it keeps restarting
+
+        results = await asyncio.gather(*futures)
+        assert handler.bursts == [["a", "b", "c"]]
+        assert results == [{"reply": "a\nb\nc"}] * 3
+        assert coalescer.get_stats()["replies_saved"] == 2
+
+    asyncio.run(check())
+
+
+def test_max_wait_closes_a_burst_that_keeps_growing():
+    async def check():
+        coalescer = MessageCoalescer(window_ms=50, max_wait_ms=100, max_messages=10)
+        handler = Handler()
+        futures = []
+        for i in range(6):
+            futures.append(coalescer.submit(message(str(i)), handler))
+            await asyncio.sleep(0.03)
+
+        await asyncio.gather(*futures)
+        assert len(handler.bursts) >= 2
+        assert sum(handler.bursts, []) == ["0", "1", "2", "3", "4", "5"]
+
+    asyncio.run(check())
+
+
+def test_max_messages_flushes_at_once():
+    async def check():
+        coalescer = MessageCoalescer(window_ms=10000, max_wait_ms=10000, max_messages=2)
+        handler = Handler()
+        first = coalescer.submit(message("a"), handler)
+        second = coalescer.submit(message("b"), handler)
+        third = coalescer.submit(message("c"), handler)
+
+        await asyncio.wait_for(asyncio.gather(first, second), timeout=1)
+        assert handler.bursts == [["a", "b"]]
+        assert not third.done()
+
+        # Shutdown closes the open window without waiting it out
+        await asyncio.wait_for(coalescer.flush_all(), timeout=1)
+        assert (await third) == {"reply": "c"}
+
+    asyncio.run(check())
+
+
+def test_users_are_merged_separately_and_failures_fan_out():
+    async def check():
+        coalescer = MessageCoalescer(window_ms=20, max_wait_ms=1000, max_messages=10)
+
+        async def failing(merged):
+            raise RuntimeError(f"no reply for {merged.user_phone}")
+
+        handler = Handler()
+        ok = coalescer.submit(message("hi", "+2"), handler)
+        failed = [coalescer.submit(message(b, "+1"), failing) for b in ("a", "b")]
+
+        assert (await ok) == {"reply": "hi"}
+        for future in failed:
+            with pytest.raises(RuntimeError, match=r"\+1"):
+                await future
+
+    asyncio.run(check())
@@ -0,0 +1,145 @@
+# File: tests/test_message_queue.py
+"""Keyed scheduler: per-user FIFO, round-robin fairness, caps and shutdown"""
+import asyncio
+import random
+
+import pytest
+
+from app.models.message import InboundMessage
+from app.services.message_queue import MessageQueueService
+
+
+def message(user_phone: str, body: str) -> InboundMessage:
+    return InboundMessage(user_phone=user_phone, from_number=f"whatsapp:{user_phone}", body=body)
+
+
+def test_messages_run_in_order_per_user():
+    async def check():
+        queue = MessageQueueService(shards=2, workers=4, maxsize=100)
+        done = []
+
+        async def handler(m):
+            await asyncio.sleep(random.uniform(0, 0.005))
+            done.append((m.user_phone, m.body))
+            return m.body
+
+        await queue.start(handler)
+        futures = [
+            queue.submit(message(user, str(i))) for i in range(10) for user in ("+1", "+2", "+3")
+        ]
+        assert await asyncio.gather(*futures) == [str(i) for i in range(10) for _ in range(3)]
+        for user in ("+1", "+2", "+3"):
+            assert [body for u, body in done if u == user] == [str(i) for i in range(10)]
+        await queue.stop()
+
+    asyncio.run(check())
+
+
+def test_a_flooding_user_gets_one_turn_per_round():
+    async def check():
+        queue = MessageQueueService(shards=1, workers=1, maxsize=100)
+        done = []
+
+        async def handler(m):
+            done.append(m.body)
+
+        await queue.start(handler)
+        futures = [queue.submit(message("+1", f"a{i}")) for i in range(4)]
+        futures.append(queue.submit(message("+2", "b0")))
+        await asyncio.gather(*futures)
+        assert done == ["a0", "b0", "a1", "a2", "a3"]
+        await queue.stop()
+
+    asyncio.run(check())
+
+
+def test_pending_messages_per_user_are_capped():
+    async def check():
+        queue = MessageQueueService(shards=1, workers=1, maxsize=100)
+        queue.max_per_user = 2
+        release = asyncio.Event()
+
+        async def handler(m):
+            await release.wait()
+
+        await queue.start(handler)
+        running = queue.submit(message("+1", "0"))
+        await asyncio.sleep(0)  # The worker takes it; it no longer counts as pending
+        waiting = [queue.submit(message("+1", str(i))) for i in (1, 2)]
+        assert None not in waiting
+        assert queue.submit(message("+1", "3")) is None
+        assert queue.submit(message("+2", "0")) is not None  # Other users are unaffected
+        assert queue.rejected == 1
+
+        release.set()
+        await asyncio.gather(running, *waiting)
+        await queue.stop()
+
+    asyncio.run(check())
+
+
+def test_stop_cancels_the_futures_of_unfinished_messages():
+    async def check():
+        queue = MessageQueueService(shards=1, workers=1, maxsize=100)
+
+        async def handler(m):
+            await asyncio.sleep(10)
+
+        await queue.start(handler)
+        in_flight = queue.submit(message("+1", "0"))
+        queued = queue.submit(message("+1", "1"))
+        await asyncio.sleep(0)
+
+        await queue.stop(timeout=0.05)
+        # Synchronous webhook callers are released instead of hanging
+        assert in_flight.cancelled() and queued.cancelled()
+
+    asyncio.run(check())
+
+
+def test_full_queue_rejects_and_run_raises():
+    async def check():
+        queue = MessageQueueService(shards=1, workers=1, maxsize=2)
+        assert not queue.enqueue(message("+1", "early"))  # Not started yet
+        release = asyncio.Event()
+
+        async def handler(m):
+            await release.wait()
+
+        await queue.start(handler)
+        queue.submit(message("+1", "0"))
+        await asyncio.sleep(0)
+        assert queue.enqueue(message("+2", "0")) and queue.enqueue(message("+3", "0"))
+        assert not queue.enqueue(message("+4", "0"))
+        with pytest.raises(RuntimeError):
+            await queue.run(message("+4", "1"))
+        assert queue.rejected == 3
+
+        release.set()
+        await queue.stop()
+
+    asyncio.run(check())
+
+
+def test_acknowledged_message_failure_does_not_stop_the_worker():
+    async def check():
+        queue = MessageQueueService(shards=2, workers=1, maxsize=100)
+        done = []
+
+        async def handler(m):
+            await asyncio.sleep(0.001)
+            if m.body == "boom":
+                raise ValueError(m.body)
+            done.append(m.body)
+
+        await queue.start(handler)
+        for body in ("a", "boom", "b"):
+            assert queue.enqueue(message("+1", body))  # Nobody awaits the result
+        await asyncio.gather(*(shard.idle.wait() for shard in queue.shards))
+
+        # The failure is counted and the worker carries on with the next message
+        assert done == ["a", "b"]
+        assert queue.get_stats()["failed"] == 1
+        await queue.stop(timeout=1)
+
+    asyncio.run(check())
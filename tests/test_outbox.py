@@ -0,0 +1,132 @@
+# File: tests/test_outbox.py
+"""Outbox retries, backoff and dead-lettering"""
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.config.settings import settings
+from app.services import outbox_service as outbox_module
+from app.services.outbox_service import OutboxService, backoff_delay
+
+
+class Twilio:
+    """whatsapp_service stand-in that fails with the queued errors, then succeeds"""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.sent = []
+
+    async def deliver(self, to: str, body: str) -> str:
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(body)
+        return "SM1"
+
+    is_permanent_error = staticmethod(outbox_module.whatsapp_service.is_permanent_error)
+
+
+def rejected(status: int) -> Exception:
+    error = RuntimeError(f"HTTP {status}")
+    error.response = SimpleNamespace(status_code=status)
+    return error
+
+
+@pytest.fixture
+def twilio(monkeypatch):
+    def install(*errors):
+        fake = Twilio(*errors)
+        monkeypatch.setattr(outbox_module, "whatsapp_service", fake)
+        return fake
+
+    return install
+
+
+def make_outbox(store) -> OutboxService:
+    outbox = OutboxService()
+    outbox.store = store
+    outbox.dead_letters = store.collection("outbox_dead_letters")
+    outbox.semaphore = asyncio.Semaphore(4)
+    return outbox
+
+
+async def settle(outbox: OutboxService):
+    while outbox.tasks:
+        await asyncio.gather(*list(outbox.tasks))
+
+
+async def pending(store) -> list:
+    far = datetime.utcnow() + timedelta(days=1)
+    return await store.outbox_claim(far, far, 10)
+
+
+def test_backoff_grows_and_is_capped():
+    base = settings.OUTBOX_BACKOFF_BASE_SECONDS
+    assert 0.8 * base <= backoff_delay(1) <= 1.2 * base
+    assert 0.8 * 4 * base <= backoff_delay(3) <= 1.2 * 4 * base
+    assert backoff_delay(50) <= 1.2 * settings.OUTBOX_BACKOFF_MAX_SECONDS
+
+
+def test_transient_failure_is_rescheduled_then_sent(with_store, twilio):
+    fake = twilio(ConnectionError("timeout"))
+
+    async def check(store):
+        outbox = make_outbox(store)
+        before = datetime.utcnow()
+        assert await outbox.enqueue("whatsapp:+1", "hello", "+1", ["SM0"])
+        await settle(outbox)
+        assert outbox.retried == 1 and fake.sent == []
+
+        (message,) = await pending(store)
+        assert message["attempts"] == 1
+        assert message["last_error"] == "timeout"
+        delay = (message["next_attempt_at"] - before).total_seconds()
+        assert 0.8 * settings.OUTBOX_BACKOFF_BASE_SECONDS <= delay
+        assert delay <= 1.2 * settings.OUTBOX_BACKOFF_BASE_SECONDS + 1
+
+        # The retry succeeds and the reply leaves the outbox
+        assert await outbox._deliver(message)
+        assert fake.sent == ["hello"]
+        assert await pending(store) == []
+
+    with_store(check)
+
+
+def test_permanent_rejection_is_dead_lettered_at_once(with_store, twilio):
+    twilio(rejected(400))
+
+    async def check(store):
+        outbox = make_outbox(store)
+        await outbox.enqueue("whatsapp:+1", "hello", "+1", ["SM0"])
+        await settle(outbox)
+
+        assert outbox.dead_lettered == 1
+        assert await pending(store) == []
+        letter = await outbox.dead_letters.find_one({"_id": "reply:SM0"})
+        assert letter["attempts"] == 1
+        assert letter["last_error"] == "HTTP 400"
+
+    with_store(check)
+
+
+def test_last_attempt_is_dead_lettered_once_even_after_a_crash(
+    with_store, twilio, monkeypatch
+):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 2)
+    twilio(ConnectionError("timeout"), ConnectionError("timeout"))
+
+    async def check(store):
+        outbox = make_outbox(store)
+        await outbox.enqueue("whatsapp:+1", "hello", "+1", ["SM0"])
+        await settle(outbox)
+        (message,) = await pending(store)
+
+        # A crash after the dead-letter insert left the message in the outbox
+        await outbox.dead_letters.insert_one({"_id": message["_id"], "attempts": 2})
+
+        assert await outbox._deliver(message)
+        assert outbox.dead_lettered == 1
+        assert await pending(store) == []
+
+    with_store(check)
@@ -0,0 +1,52 @@
+# File: tests/test_prompt_builder.py
+"""Prompt assembly: chronological recent turns inside a token budget"""
+from app.services.prompt_builder import PromptBuilder, estimate_tokens
+
+
+def history(count: int, size: int = 10) -> list:
+    """Newest-first turns, as get_conversation_history returns them"""
+    return [
+        {"user_message": f"question {i} " + "x" * size, "ai_response": f"answer {i}"}
+        for i in reversed(range(count))
+    ]
+
+
+def test_newest_turns_in_chronological_order():
+    builder = PromptBuilder(max_tokens=2000, recent_turns=3)
+    prompt = builder.build("continuing", "what next?", history(5))
+
+    # The newest three, oldest first (the old [-3:] slice took the oldest three)
+    positions = [prompt.find(f"question {i} ") for i in (2, 3, 4)]
+    assert -1 not in positions and positions == sorted(positions)
+    assert "question 0 " not in prompt and "question 1 " not in prompt
+    assert prompt.endswith("Current user message: what next?\nYour response:")
+
+
+def test_budget_drops_the_oldest_turns_first():
+    builder = PromptBuilder(max_tokens=2000, recent_turns=5)
+    full = builder.build("fresh", "hi", history(5, size=200))
+    one_turn = estimate_tokens("User: question 4 " + "x" * 200 + "\nYou: answer 4\n")
+
+    # Room for roughly two of the five turns
+    tight = PromptBuilder(max_tokens=estimate_tokens(full) - 3 * one_turn, recent_turns=5)
+    prompt = tight.build("fresh", "hi", history(5, size=200))
+    assert "question 4 " in prompt and "question 3 " in prompt
+    assert "question 0 " not in prompt
+    assert estimate_tokens(prompt) <= tight.max_tokens + 8
+
+
+def test_current_message_and_summary_are_trimmed_to_fit():
+    builder = PromptBuilder(max_tokens=400, recent_turns=3, summary_tokens=20)
+    summary = "\n".join(f"- line {i}" for i in range(100))
+    prompt = builder.build("continuing", "y" * 10000, history(3), summary=summary)
+
+    # The summary keeps its newest lines; the message is cut, never dropped
+    assert "- line 99" in prompt and "- line 0\n" not in prompt
+    assert "Current user message: yyy" in prompt
+    assert estimate_tokens(prompt) <= 400 + 16
+
+
+def test_first_interaction_greets_by_name():
+    prompt = PromptBuilder().build("first_interaction", "salam", user_name="Ali")
+    assert "Walaikum Assalam Ali!" in prompt
+    assert "Recent conversation context" not in prompt
@@ -0,0 +1,79 @@
+# File: tests/test_rate_limiter.py
+"""Token buckets: per-key share, round-robin waits, deadlines and 429 pauses"""
+import asyncio
+import time
+
+import pytest
+
+from app.services.rate_limiter import FairRateLimiter, RateLimitExceeded
+
+
+def test_one_key_cannot_drain_the_burst():
+    limiter = FairRateLimiter("test", rate_per_second=1, burst=4, max_wait_seconds=1)
+    assert limiter.key_burst == 2
+    assert limiter.try_acquire("+1") and limiter.try_acquire("+1")
+    assert not limiter.try_acquire("+1")  # Half the burst is left for other numbers
+    assert limiter.try_acquire("+2")
+    # Callers without a key only share the global bucket
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire("+3")
+
+
+def test_waiting_key_over_its_share_does_not_hold_up_others():
+    async def check():
+        limiter = FairRateLimiter("test", rate_per_second=20, burst=4, max_wait_seconds=1)
+        limiter.try_acquire("+1")
+        limiter.try_acquire("+1")
+        chatty = asyncio.ensure_future(limiter.acquire("+1"))
+        await asyncio.sleep(0)
+
+        started = time.monotonic()
+        await limiter.acquire("+2", timeout=0.5)
+        assert time.monotonic() - started < 0.03  # Granted past the waiting key
+        await chatty
+
+    asyncio.run(check())
+
+
+def test_waiters_are_served_round_robin():
+    async def check():
+        limiter = FairRateLimiter("test", rate_per_second=50, burst=1, max_wait_seconds=1)
+        assert limiter.try_acquire("+0")
+        order = []
+
+        async def acquire(key, label):
+            await limiter.acquire(key)
+            order.append(label)
+
+        tasks = [asyncio.ensure_future(acquire("+1", f"a{i}")) for i in range(3)]
+        tasks.append(asyncio.ensure_future(acquire("+2", "b0")))
+        await asyncio.gather(*tasks)
+        assert order == ["a0", "b0", "a1", "a2"]
+
+    asyncio.run(check())
+
+
+def test_deadline_expiry_raises():
+    async def check():
+        limiter = FairRateLimiter("test", rate_per_second=1, burst=1, max_wait_seconds=1)
+        assert limiter.try_acquire("+1")
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire("+2", timeout=0.05)
+        assert limiter.rejected == 1
+        assert limiter.waiters["+2"][0].cancelled()  # The dispatcher skips it
+
+    asyncio.run(check())
+
+
+def test_api_429_pauses_all_grants():
+    async def check():
+        limiter = FairRateLimiter("test", rate_per_second=100, burst=5, max_wait_seconds=1)
+        limiter.backoff(0.1)
+        assert not limiter.try_acquire("+1")
+
+        started = time.monotonic()
+        await limiter.acquire("+1")
+        assert time.monotonic() - started >= 0.09
+        assert limiter.backoffs == 1
+
+    asyncio.run(check())
@@ -0,0 +1,40 @@
+# File: tests/test_response_cache.py
+"""Reply cache keys: normalized, per variant, never for prompts with context"""
+from app.config.settings import settings
+from app.services.response_cache import ResponseCache, normalize_message
+
+
+def test_messages_are_normalized():
+    assert normalize_message("  What are your   HOURS?! ") == "what are your hours"
+
+
+def test_prompts_with_history_or_summary_are_not_cached():
+    cache = ResponseCache()
+    assert cache.make_key("what are your hours", "fresh", has_context=True) is None
+    assert cache.make_key("what are your hours", "continuing") is None
+    assert cache.skipped_context == 2
+    assert cache.make_key("what are your hours", "fresh") == ("fresh", "what are your hours", None)
+
+
+def test_only_greetings_are_keyed_by_name():
+    cache = ResponseCache()
+    assert cache.make_key("Hello!", "first_interaction", "Ali") == (
+        "first_interaction",
+        "hello",
+        "Ali",
+    )
+    assert cache.make_key("hello", "fresh", "Ali") == cache.make_key("hello", "fresh", "Sara")
+
+
+def test_long_and_empty_messages_are_not_cached():
+    cache = ResponseCache()
+    assert cache.make_key("x" * (settings.RESPONSE_CACHE_MAX_MESSAGE_CHARS + 1), "fresh") is None
+    assert cache.make_key("?!", "fresh") is None
+
+
+def test_hits_count_the_latency_saved():
+    cache = ResponseCache()
+    key = cache.make_key("hours?", "fresh")
+    cache.set(key, "9 to 5", response_time_ms=800)
+    assert cache.get(cache.make_key("HOURS", "fresh"))["response"] == "9 to 5"
+    assert cache.saved_ms == 800
@@ -0,0 +1,146 @@
+# File: tests/test_stores.py
+"""The same storage checks against SQLite and the in-memory MongoDB stand-in"""
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.services.idempotency_service import IdempotencyService, NEW, DUPLICATE
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+def turn(user_phone: str, minute: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "user_phone": user_phone,
+        "user_message": f"message {minute}",
+        "ai_response": f"reply {minute}",
+        "timestamp": START + timedelta(minutes=minute),
+        "response_time_ms": 10,
+        "message_type": "text",
+        "provider": "gemini",
+    }
+
+
+def reply(message_id: str, user_phone: str, minute: int) -> dict:
+    created = START + timedelta(minutes=minute)
+    return {
+        "_id": message_id,
+        "to": f"whatsapp:{user_phone}",
+        "body": message_id,
+        "user_phone": user_phone,
+        "attempts": 0,
+        "created_at": created,
+        "next_attempt_at": created,
+        "lease_until": datetime.min,
+        "last_error": None,
+    }
+
+
+def test_history_is_newest_first_and_per_user(with_store):
+    async def check(store):
+        # Inserted out of order, as the write buffer may flush them
+        await store.conversations.insert_many(
+            [turn("+1", 3), turn("+1", 1), turn("+2", 9), turn("+1", 4), turn("+1", 2)],
+            ordered=False,
+        )
+        history = await store.recent_history("+1", 3)
+        assert [t["user_message"] for t in history] == ["message 4", "message 3", "message 2"]
+
+    with_store(check)
+
+
+def test_outbox_claims_only_each_users_oldest_reply(with_store):
+    async def check(store):
+        for message in (reply("a1", "+1", 0), reply("a2", "+1", 1), reply("b1", "+2", 2)):
+            assert await store.outbox_add(message)
+        now = START + timedelta(minutes=10)
+        lease = now + timedelta(seconds=60)
+
+        claimed = await store.outbox_claim(now, lease, 10)
+        assert sorted(m["_id"] for m in claimed) == ["a1", "b1"]
+        # Leased: nobody else gets them, and a2 waits behind a1
+        assert await store.outbox_claim(now, lease, 10) == []
+        assert await store.outbox_claim_next("+1", now, lease) is None
+
+        # a1 fails and is retried later: a2 still waits
+        await store.outbox_reschedule("a1", now + timedelta(minutes=5), 1, "timeout")
+        assert await store.outbox_claim(now, lease, 10) == []
+
+        await store.outbox_remove("a1")
+        message = await store.outbox_claim_next("+1", now, lease)
+        assert message["_id"] == "a2"
+        assert message["lease_until"] == lease
+
+    with_store(check)
+
+
+def test_duplicate_keys_are_rejected(with_store):
+    async def check(store):
+        assert await store.outbox_add(reply("a1", "+1", 0))
+        assert not await store.outbox_add(reply("a1", "+1", 0))
+
+        processed = store.collection("processed_messages")
+        await processed.insert_one({"_id": "SM1", "created_at": START})
+        with pytest.raises(DuplicateKeyError):
+            await processed.insert_one({"_id": "SM1", "created_at": START})
+
+        # A second worker sees the SID the first one claimed
+        first, second = IdempotencyService(), IdempotencyService()
+        first.start(processed)
+        second.start(processed)
+        assert (await first.claim("SM2"))[0] == NEW
+        assert (await second.claim("SM2"))[0] == DUPLICATE
+
+    with_store(check)
+
+
+def test_delete_many_filters(with_store):
+    async def check(store):
+        markers = store.collection("analytics_markers")
+        for i in range(4):
+            await markers.insert_one({"_id": f"m{i}", "created_at": START + timedelta(days=i)})
+
+        result = await markers.delete_many({"created_at": {"$lt": START + timedelta(days=2)}})
+        assert result.deleted_count == 2
+        assert (await markers.delete_many({"_id": "m3"})).deleted_count == 1
+        assert await markers.find_one({"_id": "m2"}) is not None
+        assert await markers.find_one({"_id": "m3"}) is None
+
+    with_store(check)
+
+
+def test_sqlite_purges_documents_past_their_ttl(with_store, request):
+    if request.node.callspec.params["with_store"] != "sqlite":
+        pytest.skip("MongoDB expires documents with its own TTL monitor")
+
+    async def check(store):
+        # idempotency_service registers a created_at TTL on processed_messages
+        field, seconds = store.ttls["processed_messages"]
+        processed = store.collection("processed_messages")
+        await processed.insert_one({"_id": "old", field: START})
+        await processed.insert_one({"_id": "new", field: START + timedelta(seconds=seconds)})
+
+        assert await store.purge_expired(now=START + timedelta(seconds=seconds + 1)) == 1
+        assert await processed.find_one({"_id": "old"}) is None
+        assert await processed.find_one({"_id": "new"}) is not None
+
+    with_store(check)
+
+
+def test_documents_are_deleted_in_pages(with_store):
+    async def check(store):
+        summaries = store.collection("conversation_summaries")
+        for i in range(5):
+            await summaries.insert_one({"_id": f"+{i}", "summary": "..."})
+        await store.collection("conversation_rollups").insert_one({"_id": "+0"})
+
+        assert await store.delete_documents_page("conversation_summaries", 3) == 3
+        assert await store.delete_documents_page("conversation_summaries", 3) == 2
+        assert await store.delete_documents_page("conversation_summaries", 3) == 0
+        # Other collections are left alone
+        assert await store.collection("conversation_rollups").find_one({"_id": "+0"}) is not None
+
+    with_store(check)
@@ -0,0 +1,51 @@
+# File: tests/test_write_buffer.py
+"""Shutdown of the write-behind buffer"""
+import asyncio
+from types import SimpleNamespace
+
+from app.services.write_buffer import WriteBehindBuffer
+
+
+class SlowCollection:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.documents = []
+
+    async def insert_many(self, documents, ordered=True):
+        await asyncio.sleep(self.delay)
+        self.documents.extend(documents)
+        return SimpleNamespace(inserted_ids=[d["_id"] for d in documents])
+
+
+def test_stop_waits_for_a_flush_in_progress():
+    async def check():
+        collection = SlowCollection(delay=0.05)
+        buffer = WriteBehindBuffer("test", batch_size=2, flush_interval_ms=10, max_pending=100)
+        buffer.start(collection)
+        for i in range(5):
+            await buffer.add({"_id": i})
+        await asyncio.sleep(0.02)  # The flusher is now inside insert_many
+
+        await buffer.stop()
+        assert sorted(d["_id"] for d in collection.documents) == [0, 1, 2, 3, 4]
+        assert not buffer.is_running
+
+    asyncio.run(check())
+
+
+def test_stop_releases_writers_waiting_for_space():
+    async def check():
+        collection = SlowCollection(delay=10)
+        buffer = WriteBehindBuffer("test", batch_size=1, flush_interval_ms=10, max_pending=1)
+        buffer.start(collection)
+        await buffer.add({"_id": 0})
+        waiter = asyncio.create_task(buffer.add({"_id": 1}))
+        await asyncio.sleep(0.02)
+        assert not waiter.done()
+
+        # The stuck insert is cancelled after the timeout; its batch is kept
+        await buffer.stop(timeout=0.05)
+        await asyncio.wait_for(waiter, timeout=1)
+        assert buffer.pending == 2
+
+    asyncio.run(check())